@@ -1,10 +1,27 @@
 """
 Ghost Identity Protection System - Main Application Entry Point
 """
-from flask import Flask
-from flask_cors import CORS
 from app import create_app
+import multiprocessing
+import os
 
 if __name__ == '__main__':
-    app = create_app()
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    port = int(os.getenv('PORT', '5000'))
+    if os.getenv('FLASK_ENV') == 'development':
+        app = create_app()
+        # The reloader re-executes every import in a child process, so it stays off
+        app.run(debug=os.getenv('FLASK_DEBUG', '0') == '1', host='0.0.0.0', port=port,
+                use_reloader=False)
+    else:
+        # Serve with pre-forked gunicorn workers; --preload imports the app once before forking
+        workers = str(multiprocessing.cpu_count() * 2 + 1)
+        worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+        args = ['gunicorn', '-w', workers, '-k', worker_class, '-b', f'0.0.0.0:{port}']
+        if worker_class == 'gevent':
+            # gevent workers monkey-patch sockets when they start, so blocking SMTP/HTTP
+            # deliveries yield to other requests. The app must be imported after the
+            # patch, which rules out --preload
+            args += ['--worker-connections', os.getenv('GUNICORN_WORKER_CONNECTIONS', '1000')]
+        else:
+            args += ['--threads', os.getenv('GUNICORN_THREADS', '8'), '--preload']
+        os.execvp('gunicorn', args + ['wsgi:application'])
@@ -8,34 +8,73 @@ from flask_sqlalchemy import SQLAlchemy
 from dotenv import load_dotenv
 import os
 
-# Load environment variables
-load_dotenv()
+# Load environment variables (skipped when the environment was already populated)
+if not os.getenv('GHOST_ENV_LOADED'):
+    load_dotenv()
+    os.environ['GHOST_ENV_LOADED'] = '1'
 
 # Initialize extensions
 db = SQLAlchemy()
 
+
+def _load_config():
+    """Read application configuration from the environment once per process"""
+    config = {
+        'SECRET_KEY': os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production'),
+        'SQLALCHEMY_DATABASE_URI': os.environ.get('DATABASE_URL', 'sqlite:///ghost_identity_db.sqlite'),
+        'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+        
+        # Largest request body accepted; Werkzeug stops reading past it (death certificates are up to 10MB)
+        'MAX_CONTENT_LENGTH': int(os.environ.get('MAX_CONTENT_LENGTH', str(11 * 1024 * 1024))),
+        
+        # Azure AI Configuration
+        'AZURE_VISION_ENDPOINT': os.environ.get('AZURE_VISION_ENDPOINT'),
+        'AZURE_VISION_KEY': os.environ.get('AZURE_VISION_KEY'),
+        'AZURE_OPENAI_ENDPOINT': os.environ.get('AZURE_OPENAI_ENDPOINT'),
+        'AZURE_OPENAI_KEY': os.environ.get('AZURE_OPENAI_KEY'),
+        'AZURE_OPENAI_DEPLOYMENT': os.environ.get('AZURE_OPENAI_DEPLOYMENT')
+    }
+    
+    # Connection pool configuration (SQLite manages its own connections)
+    if not config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+        config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+            'pool_size': int(os.environ.get('DB_POOL_SIZE', '10')),
+            'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', '20')),
+            'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', '30')),
+            'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', '1800')),
+            'pool_pre_ping': True
+        }
+    
+    return config
+
+
+_CONFIG = _load_config()
+_CORS_ORIGINS = ('http://localhost:3000', 'http://127.0.0.1:3000')
+_CORS_HEADERS = ('Content-Type', 'Authorization')
+_CORS_METHODS = ('GET', 'POST', 'PUT', 'DELETE', 'OPTIONS')
+_CORS_MAX_AGE = int(os.environ.get('CORS_MAX_AGE', '86400'))
+
 def create_app():
     """Application factory pattern"""
     app = Flask(__name__)
     
+    # Use orjson for jsonify() and request.get_json() when it is installed
+    from app.utils.json_provider import OrjsonProvider, ORJSON_AVAILABLE
+    if ORJSON_AVAILABLE:
+        app.json = OrjsonProvider(app)
+    
     # Configure CORS with specific settings
     CORS(app, 
-         origins=['http://localhost:3000', 'http://127.0.0.1:3000'],
+         origins=_CORS_ORIGINS,
          supports_credentials=True,
-         allow_headers=['Content-Type', 'Authorization'],
-         methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS'])
+         allow_headers=_CORS_HEADERS,
+         methods=_CORS_METHODS,
+         max_age=_CORS_MAX_AGE)  # Let browsers cache preflight responses
     
     # Configuration
-    app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
-    app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///ghost_identity_db.sqlite')
-    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-    
-    # Azure AI Configuration
-    app.config['AZURE_VISION_ENDPOINT'] = os.getenv('AZURE_VISION_ENDPOINT')
-    app.config['AZURE_VISION_KEY'] = os.getenv('AZURE_VISION_KEY')
-    app.config['AZURE_OPENAI_ENDPOINT'] = os.getenv('AZURE_OPENAI_ENDPOINT')
-    app.config['AZURE_OPENAI_KEY'] = os.getenv('AZURE_OPENAI_KEY')
-    app.config['AZURE_OPENAI_DEPLOYMENT'] = os.getenv('AZURE_OPENAI_DEPLOYMENT')
+    app.config.update(_CONFIG)
+    if 'SQLALCHEMY_ENGINE_OPTIONS' in _CONFIG:
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = dict(_CONFIG['SQLALCHEMY_ENGINE_OPTIONS'])
     
     # Initialize extensions with app
     db.init_app(app)
@@ -51,4 +90,7 @@ def create_app():
     app.register_blueprint(verification_bp)
     app.register_blueprint(notifications_bp)
     
+    # Build the URL matcher now instead of on the first request
+    app.url_map.update()
+    
     return app
\ No newline at end of file
@@ -2,8 +2,10 @@
 Authentication and User Management API Endpoints
 Handles user registration, authentication, and profile management with enhanced KYC verification
 """
-from flask import Blueprint, request, jsonify, session, current_app
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask import Blueprint, request, jsonify, session, current_app, g
+from sqlalchemy import or_, select, lambda_stmt
+from app import db
+from werkzeug.security import check_password_hash
 from app.models.user_profile import UserProfile
 from app.services.database import DatabaseService
 from app.services.audit import AuditService
@@ -14,18 +16,121 @@ import pyotp
 import qrcode
 import io
 import base64
-from functools import wraps
+from functools import wraps, lru_cache
 import re
+import bcrypt
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/api/auth')
 
 # Email validation regex
 EMAIL_REGEX = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
 
+# Separator cleanup patterns for identity numbers
+AADHAAR_CLEAN_RE = re.compile(r'[\s-]')
+PHONE_CLEAN_RE = re.compile(r'[\s\-\+]')
+
+# bcrypt work factor for password hashes
+BCRYPT_ROUNDS = 12
+
+# Fields that must be present and non-empty in a registration payload
+REGISTER_REQUIRED_FIELDS = (
+    'email', 'password', 'phone_number', 'full_name', 'date_of_birth',
+    'aadhaar_number', 'pan_number', 'address_line1', 'city', 'state', 'pincode'
+)
+
+# Registration field -> cleanup applied before validation
+REGISTER_FIELD_NORMALIZERS = (
+    ('email', lambda value: value.lower().strip()),
+    ('phone_number', str.strip),
+    ('full_name', str.strip),
+    ('date_of_birth', lambda value: value),
+    ('aadhaar_number', lambda value: AADHAAR_CLEAN_RE.sub('', value)),
+    ('pan_number', lambda value: value.upper().strip()),
+    ('address_line1', str.strip),
+    ('address_line2', str.strip),
+    ('city', str.strip),
+    ('state', str.strip),
+    ('pincode', str.strip)
+)
+
+def normalize_register_payload(data):
+    """
+    Clean the KYC fields of a registration payload in a single pass
+    
+    Args:
+        data: Parsed registration JSON
+        
+    Returns:
+        Dictionary of cleaned KYC fields (password excluded)
+    """
+    return {field: normalize(data.get(field) or '') for field, normalize in REGISTER_FIELD_NORMALIZERS}
+
+def find_user_by_email(email):
+    """Look up a user by email; lambda_stmt caches the compiled SQL between calls"""
+    stmt = lambda_stmt(lambda: select(UserProfile).where(UserProfile.email == email))
+    return db.session.execute(stmt).scalars().first()
+
+def find_user_by_phone(phone_number):
+    """Look up a user by phone number; lambda_stmt caches the compiled SQL between calls"""
+    stmt = lambda_stmt(lambda: select(UserProfile).where(UserProfile.phone_number == phone_number))
+    return db.session.execute(stmt).scalars().first()
+
 def validate_email(email):
     """Validate email format"""
     return EMAIL_REGEX.match(email) is not None
 
+def hash_password(password):
+    """Hash a password with bcrypt"""
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode('utf-8')
+
+def verify_password(stored_hash, password):
+    """
+    Verify a password against its stored hash
+    
+    Args:
+        stored_hash: bcrypt hash, or a legacy werkzeug pbkdf2 hash
+        password: Plain text password to check
+        
+    Returns:
+        Tuple of (is_valid, needs_rehash)
+    """
+    if stored_hash.startswith('$2'):
+        is_valid = bcrypt.checkpw(password.encode('utf-8'), stored_hash.encode('utf-8'))
+        needs_rehash = int(stored_hash.split('$')[2]) != BCRYPT_ROUNDS
+        return is_valid, is_valid and needs_rehash
+    
+    # Accounts created before the switch to bcrypt carry werkzeug hashes
+    is_valid = check_password_hash(stored_hash, password)
+    return is_valid, is_valid
+
+@lru_cache(maxsize=1)
+def _dummy_password_hash():
+    """Hash checked for unknown login IDs so they cost the same as a wrong password"""
+    return hash_password(secrets.token_urlsafe(16))
+
+def render_mfa_qr_code(mfa_secret, email):
+    """
+    Render the authenticator app QR code for an MFA secret
+    
+    Returns:
+        PNG QR code as a base64 data URI
+    """
+    totp_uri = pyotp.totp.TOTP(mfa_secret).provisioning_uri(
+        name=email,
+        issuer_name="Ghost Identity Protection"
+    )
+    
+    qr = qrcode.QRCode(version=1, box_size=10, border=5)
+    qr.add_data(totp_uri)
+    qr.make(fit=True)
+    
+    img = qr.make_image(fill_color="black", back_color="white")
+    img_buffer = io.BytesIO()
+    img.save(img_buffer, format='PNG')
+    
+    qr_code_base64 = base64.b64encode(img_buffer.getvalue()).decode()
+    return f"data:image/png;base64,{qr_code_base64}"
+
 def require_auth(f):
     """Decorator to require authentication for protected endpoints"""
     @wraps(f)
@@ -39,6 +144,9 @@ def require_auth(f):
             session.clear()
             return jsonify({'error': 'Invalid session'}), 401
         
+        # Make the loaded user available to the handler
+        g.current_user = user
+        
         return f(*args, **kwargs)
     return decorated_function
 
@@ -76,27 +184,24 @@ def register():
         data = request.get_json()
         
         # Validate required fields
-        required_fields = [
-            'email', 'password', 'phone_number', 'full_name', 'date_of_birth',
-            'aadhaar_number', 'pan_number', 'address_line1', 'city', 'state', 'pincode'
-        ]
-        for field in required_fields:
-            if not data.get(field):
-                return jsonify({'error': f'Missing required field: {field}'}), 400
+        missing_field = next((field for field in REGISTER_REQUIRED_FIELDS if not data.get(field)), None)
+        if missing_field:
+            return jsonify({'error': f'Missing required field: {missing_field}'}), 400
         
         # Extract and clean data
-        email = data['email'].lower().strip()
         password = data['password']
-        phone_number = data['phone_number'].strip()
-        full_name = data['full_name'].strip()
-        date_of_birth_str = data['date_of_birth']
-        aadhaar_number = re.sub(r'[\s-]', '', data['aadhaar_number'])
-        pan_number = data['pan_number'].upper().strip()
-        address_line1 = data['address_line1'].strip()
-        address_line2 = data.get('address_line2', '').strip()
-        city = data['city'].strip()
-        state = data['state'].strip()
-        pincode = data['pincode'].strip()
+        kyc_data = normalize_register_payload(data)
+        email = kyc_data['email']
+        phone_number = kyc_data['phone_number']
+        full_name = kyc_data['full_name']
+        date_of_birth_str = kyc_data['date_of_birth']
+        aadhaar_number = kyc_data['aadhaar_number']
+        pan_number = kyc_data['pan_number']
+        address_line1 = kyc_data['address_line1']
+        address_line2 = kyc_data['address_line2']
+        city = kyc_data['city']
+        state = kyc_data['state']
+        pincode = kyc_data['pincode']
         
         # Validate email format
         if not validate_email(email):
@@ -107,20 +212,6 @@ def register():
             return jsonify({'error': 'Password must be at least 8 characters long'}), 400
         
         # Comprehensive KYC validation
-        kyc_data = {
-            'email': email,
-            'phone_number': phone_number,
-            'full_name': full_name,
-            'date_of_birth': date_of_birth_str,
-            'aadhaar_number': aadhaar_number,
-            'pan_number': pan_number,
-            'address_line1': address_line1,
-            'address_line2': address_line2,
-            'city': city,
-            'state': state,
-            'pincode': pincode
-        }
-        
         validation_result = KYCVerificationService.validate_all_kyc_data(kyc_data)
         if not validation_result['is_valid']:
             return jsonify({
@@ -135,21 +226,28 @@ def register():
             return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
         
         # Check if user already exists (email, phone, Aadhaar, or PAN)
-        existing_user = UserProfile.query.filter(
-            (UserProfile.email == email) |
-            (UserProfile.phone_number == phone_number) |
-            (UserProfile.aadhaar_number == aadhaar_number) |
-            (UserProfile.pan_number == pan_number)
-        ).first()
+        # Only the identifying columns are loaded, not the full row with its encrypted metadata
+        existing_user = db.session.query(
+            UserProfile.email,
+            UserProfile.phone_number,
+            UserProfile.aadhaar_number,
+            UserProfile.pan_number
+        ).filter(or_(
+            UserProfile.email == email,
+            UserProfile.phone_number == phone_number,
+            UserProfile.aadhaar_number == aadhaar_number,
+            UserProfile.pan_number == pan_number
+        )).first()
         
         if existing_user:
-            if existing_user.email == email:
+            existing_email, existing_phone, existing_aadhaar, existing_pan = existing_user
+            if existing_email == email:
                 return jsonify({'error': 'User with this email already exists'}), 409
-            elif existing_user.phone_number == phone_number:
+            elif existing_phone == phone_number:
                 return jsonify({'error': 'User with this phone number already exists'}), 409
-            elif existing_user.aadhaar_number == aadhaar_number:
+            elif existing_aadhaar == aadhaar_number:
                 return jsonify({'error': 'User with this Aadhaar number already exists'}), 409
-            elif existing_user.pan_number == pan_number:
+            elif existing_pan == pan_number:
                 return jsonify({'error': 'User with this PAN number already exists'}), 409
         
         # Verify identity documents
@@ -174,13 +272,18 @@ def register():
             identity_verification_score=str(identity_verification['verification_score'])
         )
         
+        # One timestamp for the metadata and the audit entry
+        now = datetime.utcnow().isoformat()
+        
         # Generate password hash and store in encrypted metadata
-        password_hash = generate_password_hash(password)
+        password_hash = hash_password(password)
+        mfa_secret = pyotp.random_base32()
         user.set_encrypted_metadata({
             'password_hash': password_hash,
-            'mfa_secret': pyotp.random_base32(),
+            'mfa_secret': mfa_secret,
+            'mfa_qr_code': render_mfa_qr_code(mfa_secret, email),
             'identity_verification': identity_verification,
-            'created_at': datetime.utcnow().isoformat()
+            'created_at': now
         })
         
         # Save user to database
@@ -189,17 +292,16 @@ def register():
             phone_otp = KYCVerificationService.generate_otp()
             email_otp = KYCVerificationService.generate_otp()
             
-            # Store OTPs in session for verification
-            session[f'phone_otp_{user.user_id}'] = phone_otp
-            session[f'email_otp_{user.user_id}'] = email_otp
-            session[f'otp_generated_at_{user.user_id}'] = datetime.utcnow().isoformat()
+            # Store hashed OTPs server-side for verification
+            KYCVerificationService.store_otp(user.user_id, 'phone', phone_otp)
+            KYCVerificationService.store_otp(user.user_id, 'email', email_otp)
             
-            # Send OTPs
-            KYCVerificationService.send_otp_sms(phone_number, phone_otp)
-            KYCVerificationService.send_otp_email(email, email_otp)
+            # Send OTPs in the background
+            KYCVerificationService.dispatch_otp('phone', phone_number, phone_otp)
+            KYCVerificationService.dispatch_otp('email', email, email_otp)
             
             # Log user registration
-            AuditService.log_user_action(
+            AuditService.enqueue_user_action(
                 user_id=user.user_id,
                 action='register',
                 details={
@@ -208,7 +310,7 @@ def register():
                     'full_name': full_name,
                     'kyc_status': user.kyc_status,
                     'identity_verification_score': identity_verification['verification_score'],
-                    'registration_timestamp': datetime.utcnow().isoformat()
+                    'registration_timestamp': now
                 }
             )
             
@@ -265,25 +367,19 @@ def verify_otp():
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
-        # Check if OTP exists in session
-        otp_key = f'{otp_type}_otp_{user_id}'
-        stored_otp = session.get(otp_key)
+        # Verify OTP against the stored hash
+        otp_status = KYCVerificationService.check_otp(user_id, otp_type, otp)
         
-        if not stored_otp:
+        if otp_status == 'missing':
             return jsonify({'error': 'No OTP found. Please request a new OTP.'}), 400
         
-        # Check OTP expiry (10 minutes)
-        otp_generated_at = session.get(f'otp_generated_at_{user_id}')
-        if otp_generated_at:
-            generated_time = datetime.fromisoformat(otp_generated_at)
-            if (datetime.utcnow() - generated_time).total_seconds() > 600:  # 10 minutes
-                # Clear expired OTP
-                session.pop(otp_key, None)
-                session.pop(f'otp_generated_at_{user_id}', None)
-                return jsonify({'error': 'OTP has expired. Please request a new OTP.'}), 400
-        
-        # Verify OTP
-        if stored_otp != otp:
+        if otp_status == 'expired':
+            return jsonify({'error': 'OTP has expired. Please request a new OTP.'}), 400
+        
+        if otp_status == 'locked':
+            return jsonify({'error': 'Too many incorrect attempts. Please request a new OTP.'}), 429
+        
+        if otp_status != 'valid':
             return jsonify({'error': 'Invalid OTP'}), 401
         
         # Update verification status
@@ -292,14 +388,10 @@ def verify_otp():
         elif otp_type == 'email':
             user.email_verified = 'verified'
         
-        # Clear OTP from session
-        session.pop(otp_key, None)
-        session.pop(f'otp_generated_at_{user_id}', None)
-        
         # Save user
         if DatabaseService.safe_update(user):
             # Log verification
-            AuditService.log_user_action(
+            AuditService.enqueue_user_action(
                 user_id=user.user_id,
                 action=f'{otp_type}_verified',
                 details={
@@ -359,23 +451,17 @@ def resend_otp():
         # Generate new OTP
         new_otp = KYCVerificationService.generate_otp()
         
-        # Store OTP in session
-        session[f'{otp_type}_otp_{user_id}'] = new_otp
-        session[f'otp_generated_at_{user_id}'] = datetime.utcnow().isoformat()
+        # Store hashed OTP server-side
+        KYCVerificationService.store_otp(user_id, otp_type, new_otp)
         
-        # Send OTP
-        if otp_type == 'phone':
-            success = KYCVerificationService.send_otp_sms(user.phone_number, new_otp)
-        else:
-            success = KYCVerificationService.send_otp_email(user.email, new_otp)
+        # Send OTP in the background
+        destination = user.phone_number if otp_type == 'phone' else user.email
+        KYCVerificationService.dispatch_otp(otp_type, destination, new_otp)
         
-        if success:
-            return jsonify({
-                'message': f'OTP sent to your {otp_type}',
-                'expires_in': 600  # 10 minutes
-            }), 200
-        else:
-            return jsonify({'error': f'Failed to send OTP to {otp_type}'}), 500
+        return jsonify({
+            'message': f'OTP is being sent to your {otp_type}',
+            'expires_in': KYCVerificationService.OTP_TTL_SECONDS
+        }), 202
             
     except Exception as e:
         current_app.logger.error(f"Resend OTP error: {str(e)}")
@@ -402,16 +488,20 @@ def login():
         
         # Determine if login_id is email or phone
         user = None
-        if validate_email(login_id.lower()):
-            user = UserProfile.query.filter_by(email=login_id.lower()).first()
+        # Phone numbers never contain '@', so there is no need to run the email regex here;
+        # a malformed email simply matches no user
+        if '@' in login_id:
+            user = find_user_by_email(login_id.lower())
         else:
             # Try phone number
-            phone_clean = re.sub(r'[\s\-\+]', '', login_id)
+            phone_clean = PHONE_CLEAN_RE.sub('', login_id)
             if phone_clean.startswith('91') and len(phone_clean) == 12:
                 phone_clean = phone_clean[2:]
-            user = UserProfile.query.filter_by(phone_number=phone_clean).first()
+            user = find_user_by_phone(phone_clean)
         
         if not user:
+            # Spend the same hashing time as a real check so unknown IDs can't be timed
+            verify_password(_dummy_password_hash(), password)
             return jsonify({'error': 'Invalid credentials'}), 401
         
         # Check if user is active
@@ -435,9 +525,10 @@ def login():
             return jsonify({'error': 'Account configuration error'}), 500
         
         # Verify password
-        if not check_password_hash(metadata['password_hash'], password):
+        is_valid, needs_rehash = verify_password(metadata['password_hash'], password)
+        if not is_valid:
             # Log failed login attempt
-            AuditService.log_user_action(
+            AuditService.enqueue_user_action(
                 user_id=user.user_id,
                 action='login_failed',
                 details={
@@ -449,13 +540,19 @@ def login():
             )
             return jsonify({'error': 'Invalid credentials'}), 401
         
+        # Upgrade legacy or outdated hashes now that the plain password is known
+        if needs_rehash:
+            metadata['password_hash'] = hash_password(password)
+            user.set_encrypted_metadata(metadata)
+            DatabaseService.safe_update(user, encrypted_metadata=user.encrypted_metadata)
+        
         # Set session
         session['user_id'] = user.user_id
         session['email'] = user.email
         session['mfa_verified'] = False  # Require MFA for sensitive operations
         
         # Log successful login
-        AuditService.log_user_action(
+        AuditService.enqueue_user_action(
             user_id=user.user_id,
             action='login_success',
             details={
@@ -481,9 +578,7 @@ def setup_mfa():
     Get MFA setup information (QR code and secret)
     """
     try:
-        user = DatabaseService.get_by_id(UserProfile, session['user_id'])
-        if not user:
-            return jsonify({'error': 'User not found'}), 404
+        user = g.current_user
         
         metadata = user.get_decrypted_metadata()
         if not metadata or 'mfa_secret' not in metadata:
@@ -491,27 +586,17 @@ def setup_mfa():
         
         mfa_secret = metadata['mfa_secret']
         
-        # Generate QR code for authenticator app
-        totp_uri = pyotp.totp.TOTP(mfa_secret).provisioning_uri(
-            name=user.email,
-            issuer_name="Ghost Identity Protection"
-        )
-        
-        # Create QR code image
-        qr = qrcode.QRCode(version=1, box_size=10, border=5)
-        qr.add_data(totp_uri)
-        qr.make(fit=True)
-        
-        img = qr.make_image(fill_color="black", back_color="white")
-        img_buffer = io.BytesIO()
-        img.save(img_buffer, format='PNG')
-        img_buffer.seek(0)
-        
-        qr_code_base64 = base64.b64encode(img_buffer.getvalue()).decode()
+        # QR code is rendered once at registration; older accounts get it rendered here
+        qr_code = metadata.get('mfa_qr_code')
+        if not qr_code:
+            qr_code = render_mfa_qr_code(mfa_secret, user.email)
+            metadata['mfa_qr_code'] = qr_code
+            user.set_encrypted_metadata(metadata)
+            DatabaseService.safe_update(user, encrypted_metadata=user.encrypted_metadata)
         
         return jsonify({
             'mfa_secret': mfa_secret,
-            'qr_code': f"data:image/png;base64,{qr_code_base64}",
+            'qr_code': qr_code,
             'manual_entry_key': mfa_secret
         }), 200
         
@@ -537,9 +622,7 @@ def verify_mfa():
         if not token or len(token) != 6 or not token.isdigit():
             return jsonify({'error': 'Invalid MFA token format'}), 400
         
-        user = DatabaseService.get_by_id(UserProfile, session['user_id'])
-        if not user:
-            return jsonify({'error': 'User not found'}), 404
+        user = g.current_user
         
         metadata = user.get_decrypted_metadata()
         if not metadata or 'mfa_secret' not in metadata:
@@ -548,11 +631,12 @@ def verify_mfa():
         mfa_secret = metadata['mfa_secret']
         totp = pyotp.TOTP(mfa_secret)
         
+        # TOTP.verify compares codes with hmac.compare_digest
         if totp.verify(token):
             session['mfa_verified'] = True
             
             # Log successful MFA verification
-            AuditService.log_user_action(
+            AuditService.enqueue_user_action(
                 user_id=user.user_id,
                 action='mfa_verified',
                 details={
@@ -563,7 +647,7 @@ def verify_mfa():
             return jsonify({'message': 'MFA verification successful'}), 200
         else:
             # Log failed MFA attempt
-            AuditService.log_user_action(
+            AuditService.enqueue_user_action(
                 user_id=user.user_id,
                 action='mfa_failed',
                 details={
@@ -582,9 +666,7 @@ def verify_mfa():
 def get_profile():
     """Get current user's profile information"""
     try:
-        user = DatabaseService.get_by_id(UserProfile, session['user_id'])
-        if not user:
-            return jsonify({'error': 'User not found'}), 404
+        user = g.current_user
         
         return jsonify({
             'user': user.to_dict(),
@@ -610,9 +692,7 @@ def update_profile():
     """
     try:
         data = request.get_json()
-        user = DatabaseService.get_by_id(UserProfile, session['user_id'])
-        if not user:
-            return jsonify({'error': 'User not found'}), 404
+        user = g.current_user
         
         # Track changes for audit log
         changes = {}
@@ -641,7 +721,7 @@ def update_profile():
             # Save changes
             if DatabaseService.safe_update(user, **{k: v['new'] for k, v in changes.items()}):
                 # Log profile update
-                AuditService.log_user_action(
+                AuditService.enqueue_user_action(
                     user_id=user.user_id,
                     action='profile_updated',
                     details={
@@ -687,9 +767,7 @@ def change_password():
         if len(new_password) < 8:
             return jsonify({'error': 'New password must be at least 8 characters long'}), 400
         
-        user = DatabaseService.get_by_id(UserProfile, session['user_id'])
-        if not user:
-            return jsonify({'error': 'User not found'}), 404
+        user = g.current_user
         
         # Get current password hash
         metadata = user.get_decrypted_metadata()
@@ -697,21 +775,22 @@ def change_password():
             return jsonify({'error': 'Account configuration error'}), 500
         
         # Verify current password
-        if not check_password_hash(metadata['password_hash'], current_password):
+        if not verify_password(metadata['password_hash'], current_password)[0]:
             return jsonify({'error': 'Current password is incorrect'}), 401
         
         # Update password hash
-        metadata['password_hash'] = generate_password_hash(new_password)
-        metadata['password_changed_at'] = datetime.utcnow().isoformat()
+        now = datetime.utcnow().isoformat()
+        metadata['password_hash'] = hash_password(new_password)
+        metadata['password_changed_at'] = now
         user.set_encrypted_metadata(metadata)
         
         if DatabaseService.safe_update(user, encrypted_metadata=user.encrypted_metadata):
             # Log password change
-            AuditService.log_user_action(
+            AuditService.enqueue_user_action(
                 user_id=user.user_id,
                 action='password_changed',
                 details={
-                    'timestamp': datetime.utcnow().isoformat()
+                    'timestamp': now
                 }
             )
             
@@ -732,7 +811,7 @@ def logout():
         
         # Log logout
         if user_id:
-            AuditService.log_user_action(
+            AuditService.enqueue_user_action(
                 user_id=user_id,
                 action='logout',
                 details={
@@ -2,63 +2,285 @@
 Notification API endpoints
 Provides REST API for notification delivery and template management
 """
+import os
+import time
+import hashlib
 import logging
-from flask import Blueprint, request, jsonify
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from functools import lru_cache, wraps
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
 from typing import Dict, Any, List
+from werkzeug.exceptions import BadRequest, HTTPException, UnsupportedMediaType
 
-from app.services.notification_delivery import NotificationDeliveryService, DeliveryStatus
+from app.services.notification_delivery import NotificationDeliveryService, DeliveryStatus, MessageBatcher, RetryWorker
 from app.services.notification_templates import NotificationTemplateService
-from app.services.action_engine import ActionEngineService
 from app.services.audit import AuditService
 from app.services.error_handling import UserFeedbackService
+from app.utils.request_schema import RequestSchema
 
 logger = logging.getLogger(__name__)
 
 # Create Blueprint
 notifications_bp = Blueprint('notifications', __name__, url_prefix='/api/notifications')
 
-# Initialize services lazily to avoid configuration issues during import
+# Request body schemas per endpoint
+_DELIVER_SCHEMA = RequestSchema({
+    'notification': (dict, True),
+    'user_id': (str, False),
+    'delivery_method': (str, False)
+}, nested={
+    'notification': RequestSchema({
+        'platform': (str, True),
+        'action_type': (str, True)
+    })
+})
+_BATCH_SCHEMA = RequestSchema({
+    'notifications': (list, True),
+    'user_id': (str, False)
+})
+_CREATE_TEMPLATE_SCHEMA = RequestSchema({
+    'platform': (str, True),
+    'action_type': (str, True),
+    'template_type': (str, True),
+    'template_data': (dict, True),
+    'user_id': (str, False)
+})
+_VALIDATE_TEMPLATE_SCHEMA = RequestSchema({
+    'template_data': (dict, True)
+})
+_GENERATE_SCHEMA = RequestSchema({
+    'platform': (str, True),
+    'action_type': (str, True),
+    'context': (dict, True),
+    'template_type': (str, False)
+})
+_EXECUTE_SCHEMA = RequestSchema({
+    'user_policies': (list, True),
+    'user_info': (dict, True),
+    'user_id': (str, True),
+    'delivery_method': (str, False)
+})
+
+# Seconds a /deliver request waits for its batched delivery before answering 202
+DELIVERY_WAIT_TIMEOUT = float(os.getenv('NOTIFICATION_DELIVERY_TIMEOUT', '30'))
+
+# Services are created once per app in _init_services when the blueprint is
+# registered, so request handlers use them without per-call initialization
 delivery_service = None
 template_service = None
-action_engine = None
 audit_service = None
 feedback_service = None
+message_batcher = None
+retry_worker = None
+
+def _init_services(state):
+    """
+    Create the notification services when the blueprint is first registered
+    
+    Args:
+        state: Blueprint setup state for the app being configured
+    """
+    global delivery_service, template_service, audit_service
+    global feedback_service, message_batcher, retry_worker
+    
+    delivery_service = NotificationDeliveryService()
+    template_service = NotificationTemplateService()
+    
+    # Lookups cached for a previously configured app came from its template service
+    clear_template_caches()
+    audit_service = AuditService()
+    feedback_service = UserFeedbackService()
+    
+    message_batcher = MessageBatcher(
+        lambda notifications, user_id: delivery_service.batch_deliver_notifications(
+            notifications=notifications,
+            user_id=user_id
+        )
+    )
+    retry_worker = RetryWorker(delivery_service)
+    
+    state.app.extensions['notifications'] = {
+        'delivery': delivery_service,
+        'templates': template_service,
+        'audit': audit_service,
+        'feedback': feedback_service
+    }
+
+notifications_bp.record_once(_init_services)
+
+@notifications_bp.before_request
+def start_retry_worker():
+    """
+    Start this process's retry worker on its first notification request
+    
+    Registered on the blueprint, not the app, so other blueprints' requests
+    never reach it. Started here rather than at registration so that each
+    pre-forked server worker runs its own thread; once the thread exists
+    RetryWorker.start returns before taking its lock.
+    """
+    retry_worker.start(current_app._get_current_object())
+
+def _json_body():
+    """
+    Decode the request body once with the app's JSON provider
+    
+    The raw body is not kept on the request after decoding.
+    
+    Returns:
+        Decoded JSON value, or None for an empty body
+    """
+    raw = request.get_data(cache=False)
+    if not raw:
+        return None
+    if not request.is_json:
+        raise UnsupportedMediaType("Request body must be application/json")
+    
+    try:
+        return current_app.json.loads(raw)
+    except ValueError:
+        raise BadRequest("Request body is not valid JSON")
+
+def json_endpoint(func):
+    """
+    Turn errors raised by a JSON endpoint into JSON error responses
+    
+    HTTP errors raised while handling the request (for example a 400 for an
+    unparseable JSON body) keep their status code; anything else is logged
+    with its traceback and returns 500.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        except HTTPException as e:
+            return jsonify({
+                'error': e.description,
+                'status': 'error'
+            }), e.code
+        except Exception:
+            logger.exception('Error in %s endpoint', func.__name__)
+            return jsonify({
+                'error': 'Internal server error',
+                'status': 'error'
+            }), 500
+    
+    return wrapper
 
-def get_delivery_service():
-    global delivery_service
-    if delivery_service is None:
-        delivery_service = NotificationDeliveryService()
-    return delivery_service
-
-def get_template_service():
-    global template_service
-    if template_service is None:
-        template_service = NotificationTemplateService()
-    return template_service
-
-def get_action_engine():
-    global action_engine
-    if action_engine is None:
-        action_engine = ActionEngineService()
-    return action_engine
-
-def get_audit_service():
-    global audit_service
-    if audit_service is None:
-        audit_service = AuditService()
-    return audit_service
-
-def get_feedback_service():
-    global feedback_service
-    if feedback_service is None:
-        feedback_service = UserFeedbackService()
-    return feedback_service
+# Template lookups are pure for a given set of templates; clear these caches
+# whenever templates change or template_service is replaced (see clear_template_caches).
+# Cached values are shared between requests: callers must treat them as read-only.
+
+@lru_cache(maxsize=512)
+def _cached_template(platform: str, action_type: str, template_type: str):
+    """
+    Get a template from template_service, cached per (platform, action, type)
+    
+    Returns:
+        Shared, read-only template dictionary, or None if there is no such template
+    """
+    return template_service.get_template(platform, action_type, template_type)
+
+@lru_cache(maxsize=512)
+def _cached_requirements(platform: str):
+    """
+    Get a platform's requirements from template_service, cached per platform
+    
+    Returns:
+        Shared, read-only requirements dictionary
+    """
+    return template_service.get_platform_requirements(platform)
+
+@lru_cache(maxsize=128)
+def _cached_template_list(platform: str = None):
+    """
+    List available templates from template_service, cached per platform filter
+    
+    Returns:
+        Shared, read-only template listing
+    """
+    return template_service.list_available_templates(platform=platform)
+
+def clear_template_caches():
+    """Drop cached template lookups and statistics, e.g. after templates change"""
+    _cached_template.cache_clear()
+    _cached_requirements.cache_clear()
+    _cached_template_list.cache_clear()
+    _stats_cache.pop('template_statistics', None)
+
+# Aggregated statistics are recomputed at most once per STATS_TTL seconds;
+# concurrent pollers share one computation
+STATS_TTL = float(os.getenv('NOTIFICATION_STATS_TTL', '5'))
+_stats_cache = {}  # name -> (computed_at, value)
+_stats_lock = threading.Lock()
+
+def _cached_stats(name: str, compute):
+    entry = _stats_cache.get(name)
+    if entry is not None and time.monotonic() - entry[0] < STATS_TTL:
+        return entry[1]
+    
+    with _stats_lock:
+        entry = _stats_cache.get(name)
+        if entry is None or time.monotonic() - entry[0] >= STATS_TTL:
+            entry = (time.monotonic(), compute())
+            _stats_cache[name] = entry
+        return entry[1]
+
+def _wants_stream() -> bool:
+    """Check whether the client asked for NDJSON streaming of delivery results"""
+    if request.args.get('stream') in ('1', 'true'):
+        return True
+    return request.accept_mimetypes.best == 'application/x-ndjson'
+
+def _stream_batch_delivery(notifications: List[Dict[str, Any]], user_id: str, **summary):
+    """
+    Stream batch delivery results as NDJSON
+    
+    Each delivery result is written as one line when it settles, followed by a
+    final summary line with the counts.
+    
+    Args:
+        notifications: List of notification dictionaries
+        user_id: User ID for audit logging
+        summary: Extra fields to include in the summary line
+        
+    Returns:
+        Streaming application/x-ndjson response
+    """
+    def generate():
+        dumps = current_app.json.dumps
+        successful = 0
+        failed = 0
+        
+        for result in delivery_service.batch_deliver_stream(notifications, user_id=user_id):
+            if result.get('status') in (DeliveryStatus.SENT.value, DeliveryStatus.DELIVERED.value):
+                successful += 1
+            else:
+                failed += 1
+            yield dumps({'delivery_result': result}) + '\n'
+        
+        yield dumps({
+            'status': 'complete',
+            'total_notifications': len(notifications),
+            'successful_deliveries': successful,
+            'failed_deliveries': failed,
+            **summary
+        }) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
 
 @notifications_bp.route('/deliver', methods=['POST'])
+@json_endpoint
 def deliver_notification():
     """
     Deliver a single notification
     
+    The notification is delivered with the next coalesced batch, so it also
+    produces that batch's notification_batch_delivery_start/_complete audit
+    entries. If delivery takes longer than DELIVERY_WAIT_TIMEOUT seconds the
+    response is 202 with status 'queued'; the delivery still completes in the
+    background.
+    
     Expected JSON payload:
     {
         "notification": {
@@ -72,52 +294,39 @@ def deliver_notification():
         "user_id": "user_uuid"
     }
     """
+    data = _DELIVER_SCHEMA.validate(_json_body())
+    
+    notification = data['notification']
+    user_id = data.get('user_id')
+    delivery_method = data.get('delivery_method')
+    
+    if delivery_method:
+        notification = {**notification, 'delivery_method': delivery_method}
+    
+    # Deliver notification as part of the next coalesced batch
+    future = message_batcher.add(notification, user_id=user_id)
     try:
-        data = request.get_json()
-        
-        if not data or 'notification' not in data:
-            return jsonify({
-                'error': 'Missing notification data',
-                'status': 'error'
-            }), 400
-        
-        notification = data['notification']
-        user_id = data.get('user_id')
-        delivery_method = data.get('delivery_method')
-        
-        # Validate required fields
-        required_fields = ['platform', 'action_type']
-        for field in required_fields:
-            if field not in notification:
-                return jsonify({
-                    'error': f'Missing required field: {field}',
-                    'status': 'error'
-                }), 400
-        
-        # Deliver notification
-        result = get_delivery_service().deliver_notification(
-            notification=notification,
-            delivery_method=delivery_method,
-            user_id=user_id
-        )
-        
-        return jsonify({
-            'status': 'success',
-            'delivery_result': result
-        }), 200
-        
-    except Exception as e:
-        logger.error(f"Error in deliver_notification endpoint: {str(e)}")
+        result = future.result(timeout=DELIVERY_WAIT_TIMEOUT)
+    except FutureTimeoutError:
         return jsonify({
-            'error': str(e),
-            'status': 'error'
-        }), 500
+            'status': 'queued',
+            'message': 'Delivery is still in progress'
+        }), 202
+    
+    return jsonify({
+        'status': 'success',
+        'delivery_result': result
+    }), 200
 
 @notifications_bp.route('/deliver/batch', methods=['POST'])
+@json_endpoint
 def deliver_batch_notifications():
     """
     Deliver multiple notifications in batch
     
+    Send "Accept: application/x-ndjson" or ?stream=1 to receive one result
+    line per notification as deliveries settle, followed by a summary line.
+    
     Expected JSON payload:
     {
         "notifications": [
@@ -131,120 +340,83 @@ def deliver_batch_notifications():
         "user_id": "user_uuid"
     }
     """
-    try:
-        data = request.get_json()
-        
-        if not data or 'notifications' not in data:
-            return jsonify({
-                'error': 'Missing notifications data',
-                'status': 'error'
-            }), 400
-        
-        notifications = data['notifications']
-        user_id = data.get('user_id')
-        
-        if not isinstance(notifications, list) or len(notifications) == 0:
-            return jsonify({
-                'error': 'Notifications must be a non-empty list',
-                'status': 'error'
-            }), 400
-        
-        # Deliver notifications in batch
-        result = get_delivery_service().batch_deliver_notifications(
-            notifications=notifications,
-            user_id=user_id
-        )
-        
-        return jsonify({
-            'status': 'success',
-            'batch_result': result
-        }), 200
-        
-    except Exception as e:
-        logger.error(f"Error in deliver_batch_notifications endpoint: {str(e)}")
+    data = _BATCH_SCHEMA.validate(_json_body())
+    
+    notifications = data['notifications']
+    user_id = data.get('user_id')
+    
+    if not notifications:
         return jsonify({
-            'error': str(e),
+            'error': 'Notifications must be a non-empty list',
             'status': 'error'
-        }), 500
+        }), 400
+    
+    if _wants_stream():
+        return _stream_batch_delivery(notifications, user_id)
+    
+    # Deliver notifications in batch, split into count- and size-bounded sub-batches
+    result = delivery_service.batch_deliver_chunked(
+        notifications=notifications,
+        user_id=user_id
+    )
+    
+    return jsonify({
+        'status': 'success',
+        'batch_result': result
+    }), 200
 
 @notifications_bp.route('/status/<notification_id>', methods=['GET'])
+@json_endpoint
 def get_delivery_status(notification_id: str):
     """
     Get delivery status for a specific notification
     """
-    try:
-        status = get_delivery_service().get_delivery_status(notification_id)
-        
-        if not status:
-            return jsonify({
-                'error': 'Notification not found',
-                'status': 'error'
-            }), 404
-        
-        return jsonify({
-            'status': 'success',
-            'delivery_status': status
-        }), 200
-        
-    except Exception as e:
-        logger.error(f"Error in get_delivery_status endpoint: {str(e)}")
+    status = delivery_service.get_delivery_status(notification_id)
+    
+    if not status:
         return jsonify({
-            'error': str(e),
+            'error': 'Notification not found',
             'status': 'error'
-        }), 500
+        }), 404
+    
+    return jsonify({
+        'status': 'success',
+        'delivery_status': status
+    }), 200
 
 @notifications_bp.route('/retry/process', methods=['POST'])
+@json_endpoint
 def process_retry_queue():
     """
-    Process notifications that are ready for retry
+    Report the most recent background retry run
     
-    Expected JSON payload:
-    {
-        "user_id": "user_uuid"
-    }
+    Due retries are processed by the background retry worker every
+    NOTIFICATION_RETRY_INTERVAL seconds; this endpoint no longer triggers a run.
     """
-    try:
-        data = request.get_json() or {}
-        user_id = data.get('user_id')
-        
-        # Process retry queue
-        result = get_delivery_service().process_retry_queue(user_id=user_id)
-        
-        return jsonify({
-            'status': 'success',
-            'retry_result': result
-        }), 200
-        
-    except Exception as e:
-        logger.error(f"Error in process_retry_queue endpoint: {str(e)}")
-        return jsonify({
-            'error': str(e),
-            'status': 'error'
-        }), 500
+    last_run = retry_worker.last_run()
+    
+    return jsonify({
+        'status': 'success',
+        **last_run
+    }), 200
 
 @notifications_bp.route('/statistics', methods=['GET'])
+@json_endpoint
 def get_delivery_statistics():
     """
     Get delivery statistics across all notifications
     """
-    try:
-        stats = get_delivery_service().get_delivery_statistics()
-        
-        return jsonify({
-            'status': 'success',
-            'statistics': stats
-        }), 200
-        
-    except Exception as e:
-        logger.error(f"Error in get_delivery_statistics endpoint: {str(e)}")
-        return jsonify({
-            'error': str(e),
-            'status': 'error'
-        }), 500
+    stats = _cached_stats('delivery_statistics', delivery_service.get_delivery_statistics)
+    
+    return jsonify({
+        'status': 'success',
+        'statistics': stats
+    }), 200
 
 # Template Management Endpoints
 
 @notifications_bp.route('/templates/<platform>/<action_type>', methods=['GET'])
+@json_endpoint
 def get_template(platform: str, action_type: str):
     """
     Get a template for a specific platform and action
@@ -252,30 +424,23 @@ def get_template(platform: str, action_type: str):
     Query parameters:
     - template_type: email, form, api, letter (default: email)
     """
-    try:
-        template_type = request.args.get('template_type', 'email')
-        
-        template = get_template_service().get_template(platform, action_type, template_type)
-        
-        if not template:
-            return jsonify({
-                'error': 'Template not found',
-                'status': 'error'
-            }), 404
-        
-        return jsonify({
-            'status': 'success',
-            'template': template
-        }), 200
-        
-    except Exception as e:
-        logger.error(f"Error in get_template endpoint: {str(e)}")
+    template_type = request.args.get('template_type', 'email')
+    
+    template = _cached_template(platform, action_type, template_type)
+    
+    if not template:
         return jsonify({
-            'error': str(e),
+            'error': 'Template not found',
             'status': 'error'
-        }), 500
+        }), 404
+    
+    return jsonify({
+        'status': 'success',
+        'template': template
+    }), 200
 
 @notifications_bp.route('/templates', methods=['POST'])
+@json_endpoint
 def create_custom_template():
     """
     Create a custom template
@@ -294,57 +459,50 @@ def create_custom_template():
         "user_id": "user_uuid"
     }
     """
-    try:
-        data = request.get_json()
-        
-        if not data:
-            return jsonify({
-                'error': 'Missing request data',
-                'status': 'error'
-            }), 400
-        
-        required_fields = ['platform', 'action_type', 'template_type', 'template_data']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({
-                    'error': f'Missing required field: {field}',
-                    'status': 'error'
-                }), 400
-        
-        platform = data['platform']
-        action_type = data['action_type']
-        template_type = data['template_type']
-        template_data = data['template_data']
-        user_id = data.get('user_id')
-        
-        # Create custom template
-        success = get_template_service().create_custom_template(
-            platform=platform,
-            action_type=action_type,
-            template_type=template_type,
-            template_data=template_data,
-            user_id=user_id
-        )
-        
-        if success:
-            return jsonify({
-                'status': 'success',
-                'message': 'Custom template created successfully'
-            }), 201
-        else:
-            return jsonify({
-                'error': 'Failed to create custom template',
-                'status': 'error'
-            }), 400
-        
-    except Exception as e:
-        logger.error(f"Error in create_custom_template endpoint: {str(e)}")
+    data = _CREATE_TEMPLATE_SCHEMA.validate(_json_body())
+    
+    platform = data['platform']
+    action_type = data['action_type']
+    template_type = data['template_type']
+    template_data = data['template_data']
+    user_id = data.get('user_id')
+    
+    # Create custom template
+    success = template_service.create_custom_template(
+        platform=platform,
+        action_type=action_type,
+        template_type=template_type,
+        template_data=template_data,
+        user_id=user_id
+    )
+    
+    if success:
+        clear_template_caches()
+        return jsonify({
+            'status': 'success',
+            'message': 'Custom template created successfully'
+        }), 201
+    else:
         return jsonify({
-            'error': str(e),
+            'error': 'Failed to create custom template',
             'status': 'error'
-        }), 500
+        }), 400
+
+@notifications_bp.route('/templates/invalidate', methods=['POST'])
+@json_endpoint
+def invalidate_template_caches():
+    """
+    Clear cached template lookups after templates are changed outside this API
+    """
+    clear_template_caches()
+    
+    return jsonify({
+        'status': 'success',
+        'message': 'Template caches cleared'
+    }), 200
 
 @notifications_bp.route('/templates/validate', methods=['POST'])
+@json_endpoint
 def validate_template():
     """
     Validate template data
@@ -358,33 +516,20 @@ def validate_template():
         }
     }
     """
-    try:
-        data = request.get_json()
-        
-        if not data or 'template_data' not in data:
-            return jsonify({
-                'error': 'Missing template_data',
-                'status': 'error'
-            }), 400
-        
-        template_data = data['template_data']
-        
-        # Validate template
-        validation_result = get_template_service().validate_template(template_data)
-        
-        return jsonify({
-            'status': 'success',
-            'validation_result': validation_result
-        }), 200
-        
-    except Exception as e:
-        logger.error(f"Error in validate_template endpoint: {str(e)}")
-        return jsonify({
-            'error': str(e),
-            'status': 'error'
-        }), 500
+    data = _VALIDATE_TEMPLATE_SCHEMA.validate(_json_body())
+    
+    template_data = data['template_data']
+    
+    # Validate template
+    validation_result = template_service.validate_template(template_data)
+    
+    return jsonify({
+        'status': 'success',
+        'validation_result': validation_result
+    }), 200
 
 @notifications_bp.route('/templates/generate', methods=['POST'])
+@json_endpoint
 def generate_notification_from_template():
     """
     Generate a complete notification from template
@@ -404,55 +549,34 @@ def generate_notification_from_template():
         }
     }
     """
-    try:
-        data = request.get_json()
-        
-        if not data:
-            return jsonify({
-                'error': 'Missing request data',
-                'status': 'error'
-            }), 400
-        
-        required_fields = ['platform', 'action_type', 'context']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({
-                    'error': f'Missing required field: {field}',
-                    'status': 'error'
-                }), 400
-        
-        platform = data['platform']
-        action_type = data['action_type']
-        context = data['context']
-        template_type = data.get('template_type', 'email')
-        
-        # Generate notification from template
-        notification = get_template_service().generate_notification_from_template(
-            platform=platform,
-            action_type=action_type,
-            context=context,
-            template_type=template_type
-        )
-        
-        if notification:
-            return jsonify({
-                'status': 'success',
-                'notification': notification
-            }), 200
-        else:
-            return jsonify({
-                'error': 'Template not found or generation failed',
-                'status': 'error'
-            }), 404
-        
-    except Exception as e:
-        logger.error(f"Error in generate_notification_from_template endpoint: {str(e)}")
+    data = _GENERATE_SCHEMA.validate(_json_body())
+    
+    platform = data['platform']
+    action_type = data['action_type']
+    context = data['context']
+    template_type = data.get('template_type', 'email')
+    
+    # Generate notification from template
+    notification = template_service.generate_notification_from_template(
+        platform=platform,
+        action_type=action_type,
+        context=context,
+        template_type=template_type
+    )
+    
+    if notification:
         return jsonify({
-            'error': str(e),
+            'status': 'success',
+            'notification': notification
+        }), 200
+    else:
+        return jsonify({
+            'error': 'Template not found or generation failed',
             'status': 'error'
-        }), 500
+        }), 404
 
 @notifications_bp.route('/templates/list', methods=['GET'])
+@json_endpoint
 def list_available_templates():
     """
     List all available templates
@@ -460,70 +584,79 @@ def list_available_templates():
     Query parameters:
     - platform: Optional platform filter
     """
-    try:
-        platform = request.args.get('platform')
-        
-        templates = get_template_service().list_available_templates(platform=platform)
-        
-        return jsonify({
-            'status': 'success',
-            'templates': templates
-        }), 200
-        
-    except Exception as e:
-        logger.error(f"Error in list_available_templates endpoint: {str(e)}")
-        return jsonify({
-            'error': str(e),
-            'status': 'error'
-        }), 500
+    platform = request.args.get('platform')
+    
+    templates = _cached_template_list(platform)
+    
+    return jsonify({
+        'status': 'success',
+        'templates': templates
+    }), 200
 
 @notifications_bp.route('/templates/statistics', methods=['GET'])
+@json_endpoint
 def get_template_statistics():
     """
     Get statistics about available templates
     """
-    try:
-        stats = get_template_service().get_template_statistics()
-        
-        return jsonify({
-            'status': 'success',
-            'statistics': stats
-        }), 200
-        
-    except Exception as e:
-        logger.error(f"Error in get_template_statistics endpoint: {str(e)}")
-        return jsonify({
-            'error': str(e),
-            'status': 'error'
-        }), 500
+    stats = _cached_stats('template_statistics', template_service.get_template_statistics)
+    
+    return jsonify({
+        'status': 'success',
+        'statistics': stats
+    }), 200
 
 @notifications_bp.route('/templates/requirements/<platform>', methods=['GET'])
+@json_endpoint
 def get_platform_requirements(platform: str):
     """
     Get platform-specific requirements and contact information
     """
-    try:
-        requirements = get_template_service().get_platform_requirements(platform)
-        
-        return jsonify({
-            'status': 'success',
-            'requirements': requirements
-        }), 200
-        
-    except Exception as e:
-        logger.error(f"Error in get_platform_requirements endpoint: {str(e)}")
-        return jsonify({
-            'error': str(e),
-            'status': 'error'
-        }), 500
+    requirements = _cached_requirements(platform)
+    
+    return jsonify({
+        'status': 'success',
+        'requirements': requirements
+    }), 200
 
 # Integration endpoint for complete workflow
 
+class _MockActionPolicy:
+    """Minimal ActionPolicy stand-in built from a request policy dictionary"""
+    
+    __slots__ = ('policy_id', 'platform_name', 'action_type', 'account_identifier',
+                 'asset_type', 'priority')
+    
+    def __init__(self, data):
+        self.policy_id = data.get('policy_id')
+        self.platform_name = data.get('platform_name')
+        self.action_type = data.get('action_type')
+        self.account_identifier = data.get('account_identifier')
+        self.asset_type = data.get('asset_type', 'unknown')
+        self.priority = data.get('priority', 1)
+    
+    def get_policy_details(self):
+        return {
+            'natural_language_policy': f"{self.action_type} my {self.platform_name} account",
+            'specific_instructions': '',
+            'conditions': []
+        }
+
+def _policy_priority(policy_data) -> int:
+    """Sort key for request policies; missing or malformed priorities count as 1"""
+    try:
+        return int(policy_data.get('priority', 1))
+    except (AttributeError, TypeError, ValueError):
+        return 1
+
 @notifications_bp.route('/execute-policies', methods=['POST'])
+@json_endpoint
 def execute_notification_policies():
     """
     Execute complete notification workflow: interpret policies and deliver notifications
     
+    Supports NDJSON streaming of delivery results like /deliver/batch.
+    
     Expected JSON payload:
     {
         "user_policies": [
@@ -545,96 +678,71 @@ def execute_notification_policies():
         "delivery_method": "email"
     }
     """
-    try:
-        data = request.get_json()
-        
-        if not data:
-            return jsonify({
-                'error': 'Missing request data',
-                'status': 'error'
-            }), 400
-        
-        required_fields = ['user_policies', 'user_info', 'user_id']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({
-                    'error': f'Missing required field: {field}',
-                    'status': 'error'
-                }), 400
-        
-        user_policies = data['user_policies']
-        user_info = data['user_info']
-        user_id = data['user_id']
-        delivery_method = data.get('delivery_method', 'email')
-        
-        # Convert policy dictionaries to ActionPolicy-like objects for processing
-        # In a real implementation, these would be proper ActionPolicy objects from the database
-        
-        # Step 1: Interpret policies using Action Engine
-        interpreted_policies = []
-        for policy_data in user_policies:
-            # Create a mock ActionPolicy object for the action engine
-            class MockActionPolicy:
-                def __init__(self, data):
-                    self.policy_id = data.get('policy_id')
-                    self.platform_name = data.get('platform_name')
-                    self.action_type = data.get('action_type')
-                    self.account_identifier = data.get('account_identifier')
-                    self.asset_type = data.get('asset_type', 'unknown')
-                    self.priority = data.get('priority', 1)
-                
-                def get_policy_details(self):
-                    return {
-                        'natural_language_policy': f"{self.action_type} my {self.platform_name} account",
-                        'specific_instructions': '',
-                        'conditions': []
-                    }
-            
-            mock_policy = MockActionPolicy(policy_data)
-            
-            # Generate notification using template service
-            context = {
-                **user_info,
-                'platform': policy_data.get('platform_name'),
-                'account_identifier': policy_data.get('account_identifier')
-            }
-            
-            notification = get_template_service().generate_notification_from_template(
-                platform=policy_data.get('platform_name'),
-                action_type=policy_data.get('action_type'),
-                context=context,
-                template_type='email'
-            )
-            
-            if notification:
-                notification['policy_id'] = policy_data.get('policy_id')
-                notification['delivery_method'] = delivery_method
-                interpreted_policies.append(notification)
-        
-        # Step 2: Deliver notifications
-        if interpreted_policies:
-            delivery_result = get_delivery_service().batch_deliver_notifications(
-                notifications=interpreted_policies,
-                user_id=user_id
-            )
-            
-            return jsonify({
-                'status': 'success',
-                'interpreted_policies': len(interpreted_policies),
-                'delivery_result': delivery_result
-            }), 200
-        else:
-            return jsonify({
-                'error': 'No valid notifications could be generated',
-                'status': 'error'
-            }), 400
+    data = _EXECUTE_SCHEMA.validate(_json_body())
+    
+    # Schedule the most urgent policies (priority 1) first; sorted() keeps
+    # request order within a priority level
+    user_policies = sorted(data['user_policies'], key=_policy_priority)
+    user_info = data['user_info']
+    user_id = data['user_id']
+    delivery_method = data.get('delivery_method', 'email')
+    
+    # Convert policy dictionaries to ActionPolicy-like objects for processing
+    # In a real implementation, these would be proper ActionPolicy objects from the database
+    policies = [_MockActionPolicy(policy_data) for policy_data in user_policies]
+    
+    # Step 1: Render notifications; each distinct template is resolved once
+    interpreted_policies = template_service.generate_notifications_bulk(policies, user_info)
+    for notification in interpreted_policies:
+        notification['delivery_method'] = delivery_method
+    
+    # Step 2: Deliver notifications
+    if interpreted_policies and _wants_stream():
+        return _stream_batch_delivery(
+            interpreted_policies,
+            user_id,
+            interpreted_policies=len(interpreted_policies)
+        )
+    
+    if interpreted_policies:
+        delivery_result = delivery_service.batch_deliver_notifications(
+            notifications=interpreted_policies,
+            user_id=user_id
+        )
         
-    except Exception as e:
-        logger.error(f"Error in execute_notification_policies endpoint: {str(e)}")
         return jsonify({
-            'error': str(e),
+            'status': 'success',
+            'interpreted_policies': len(interpreted_policies),
+            'delivery_result': delivery_result
+        }), 200
+    else:
+        return jsonify({
+            'error': 'No valid notifications could be generated',
             'status': 'error'
-        }), 500
+        }), 400
+
+# Conditional GET support
+
+# Cache-Control per read-only endpoint; responses also get a content ETag so
+# clients can revalidate with If-None-Match and receive a 304
+_CACHE_CONTROL = {
+    'notifications.get_delivery_status': 'private, no-cache',
+    'notifications.get_delivery_statistics': 'private, max-age=5',
+    'notifications.get_template': 'private, max-age=30',
+    'notifications.list_available_templates': 'private, max-age=30',
+    'notifications.get_template_statistics': 'private, max-age=5',
+    'notifications.get_platform_requirements': 'private, max-age=30'
+}
+
+@notifications_bp.after_request
+def add_cache_headers(response):
+    cache_control = _CACHE_CONTROL.get(request.endpoint)
+    if cache_control is None or request.method != 'GET' or response.status_code != 200:
+        return response
+    
+    response.set_etag(hashlib.blake2b(response.get_data(), digest_size=16).hexdigest())
+    response.headers['Cache-Control'] = cache_control
+    return response.make_conditional(request)
 
 # Error handling
 
@@ -2,30 +2,120 @@
 Digital Asset Management API Endpoints
 Handles digital asset registration, trusted contact management, and action policy creation
 """
-from flask import Blueprint, request, jsonify, session, current_app
+from flask import Blueprint, request, jsonify, session, current_app, g
+from app import db
 from app.models.user_profile import UserProfile
 from app.models.trusted_contact import TrustedContact
 from app.models.action_policy import ActionPolicy
 from app.services.database import DatabaseService
 from app.services.audit import AuditService
-from datetime import datetime
+from app.services.kyc_verification import KYCVerificationService
+from app.services.background_tasks import get_contact_verification_runner
 from functools import wraps
+import hashlib
+import json
 import re
+import string
 
 vault_bp = Blueprint('vault', __name__, url_prefix='/api/vault')
 
+# Compiled once at import time
+AADHAAR_CLEAN_RE = re.compile(r'[\s-]')
+
+EMAIL_LOCAL_CHARS = frozenset(string.ascii_letters + string.digits + '._%+-')
+EMAIL_DOMAIN_CHARS = frozenset(string.ascii_letters + string.digits + '.-')
+
+# Required trusted contact fields, in the order they are checked, with their normalization
+CONTACT_REQUIRED_FIELDS = (
+    ('contact_name', str.strip),
+    ('contact_email', lambda value: value.strip().lower()),
+    ('contact_phone', str.strip),
+    ('relationship', str.strip),
+    ('contact_aadhaar_number', lambda value: AADHAAR_CLEAN_RE.sub('', value)),
+    ('contact_pan_number', lambda value: value.strip().upper()),
+    ('contact_address_line1', str.strip),
+    ('contact_city', str.strip),
+    ('contact_state', str.strip),
+    ('contact_pincode', str.strip),
+)
+
+ASSET_TYPES = frozenset(('email', 'bank', 'social_media', 'other'))
+ACTION_TYPES = frozenset(('delete', 'memorialize', 'transfer', 'lock'))
+
+
+# Asset fields that are safe to return; credentials are never included
+SAFE_ASSET_FIELDS = ('platform_name', 'account_identifier', 'added_at')
+
+def _static_error(message: str, status: int):
+    """
+    Build a factory for an error response whose message never changes
+    
+    The JSON body is encoded once here; each call only wraps the bytes in a new
+    response, since after_request hooks add headers to the response object.
+    
+    Args:
+        message: Error message for the 'error' field
+        status: HTTP status code
+        
+    Returns:
+        Callable returning a fresh JSON response
+    """
+    body = json.dumps({'error': message}, separators=(',', ':')).encode('utf-8')
+    
+    def respond():
+        return current_app.response_class(body, status=status, mimetype='application/json')
+    return respond
+
+ERR_AUTH_REQUIRED = _static_error('Authentication required', 401)
+ERR_INVALID_SESSION = _static_error('Invalid session', 401)
+ERR_MFA_REQUIRED = _static_error('MFA verification required', 403)
+ERR_INTERNAL = _static_error('Internal server error', 500)
+ERR_INVALID_ASSET_TYPE = _static_error("Invalid asset type. Must be one of: ['email', 'bank', 'social_media', 'other']", 400)
+ERR_INVALID_ACTION_TYPE = _static_error("Invalid action type. Must be one of: ['delete', 'memorialize', 'transfer', 'lock']", 400)
+ERR_INVALID_EMAIL = _static_error('Invalid email format', 400)
+ERR_CREDENTIALS_NOT_DICT = _static_error('Credentials must be a dictionary', 400)
+ERR_CONTACT_NOT_FOUND = _static_error('Trusted contact not found', 404)
+ERR_POLICY_NOT_FOUND = _static_error('Action policy not found', 404)
+ERR_POLICY_EXISTS = _static_error('Policy already exists for this asset', 409)
+
+def is_valid_email(email: str) -> bool:
+    """
+    Check an email address in one linear pass
+    
+    Accepts the addresses matched by the previous email regex (ASCII local
+    part, dotted domain ending in a TLD of two or more letters) without
+    running the regex engine.
+    
+    Args:
+        email: Email address to check
+        
+    Returns:
+        True if the address is well formed
+    """
+    local, at, domain = email.partition('@')
+    if not (local and at and domain):
+        return False
+    if not (EMAIL_LOCAL_CHARS.issuperset(local) and EMAIL_DOMAIN_CHARS.issuperset(domain)):
+        return False
+    
+    host, dot, tld = domain.rpartition('.')
+    return bool(host and dot) and len(tld) >= 2 and tld.isalpha()
+
 def require_auth(f):
     """Decorator to require authentication for protected endpoints"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
         if 'user_id' not in session:
-            return jsonify({'error': 'Authentication required'}), 401
+            return ERR_AUTH_REQUIRED()
         
         # Verify user still exists and is active
         user = DatabaseService.get_by_id(UserProfile, session['user_id'])
         if not user or user.status != 'active':
             session.clear()
-            return jsonify({'error': 'Invalid session'}), 401
+            return ERR_INVALID_SESSION()
+        
+        # Make the loaded user available to the handler
+        g.current_user = user
         
         return f(*args, **kwargs)
     return decorated_function
@@ -35,7 +125,7 @@ def require_mfa(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
         if 'mfa_verified' not in session or not session['mfa_verified']:
-            return jsonify({'error': 'MFA verification required'}), 403
+            return ERR_MFA_REQUIRED()
         return f(*args, **kwargs)
     return decorated_function
 
@@ -47,9 +137,11 @@ def require_mfa(f):
 def get_digital_assets():
     """Get all digital assets for the authenticated user"""
     try:
-        user = DatabaseService.get_by_id(UserProfile, session['user_id'])
-        if not user:
-            return jsonify({'error': 'User not found'}), 404
+        user = g.current_user
+        
+        etag = _assets_etag(user)
+        if etag is not None and etag in request.if_none_match:
+            return _not_modified(etag)
         
         # Get decrypted metadata
         metadata = user.get_decrypted_metadata()
@@ -57,23 +149,19 @@ def get_digital_assets():
             return jsonify({'assets': {}}), 200
         
         # Remove sensitive credential information for API response
-        safe_assets = {}
-        for asset_type, assets in metadata.items():
-            if asset_type in ['email', 'bank', 'social_media', 'other']:
-                safe_assets[asset_type] = []
-                for asset in assets:
-                    safe_asset = {
-                        'platform_name': asset.get('platform_name'),
-                        'account_identifier': asset.get('account_identifier'),
-                        'added_at': asset.get('added_at')
-                    }
-                    safe_assets[asset_type].append(safe_asset)
+        safe_assets = {
+            asset_type: [{field: asset.get(field) for field in SAFE_ASSET_FIELDS} for asset in assets]
+            for asset_type, assets in metadata.items()
+            if asset_type in ASSET_TYPES
+        }
         
-        return jsonify({'assets': safe_assets}), 200
+        response = jsonify({'assets': safe_assets})
+        response.set_etag(etag)
+        return response
         
     except Exception as e:
         current_app.logger.error(f"Get assets error: {str(e)}")
-        return jsonify({'error': 'Internal server error'}), 500
+        return ERR_INTERNAL()
 
 @vault_bp.route('/assets', methods=['POST'])
 @require_auth
@@ -109,17 +197,14 @@ def add_digital_asset():
         credentials = data['credentials']
         
         # Validate asset type
-        valid_asset_types = ['email', 'bank', 'social_media', 'other']
-        if asset_type not in valid_asset_types:
-            return jsonify({'error': f'Invalid asset type. Must be one of: {valid_asset_types}'}), 400
+        if not isinstance(asset_type, str) or asset_type not in ASSET_TYPES:
+            return ERR_INVALID_ASSET_TYPE()
         
         # Validate credentials is a dictionary
         if not isinstance(credentials, dict):
-            return jsonify({'error': 'Credentials must be a dictionary'}), 400
+            return ERR_CREDENTIALS_NOT_DICT()
         
-        user = DatabaseService.get_by_id(UserProfile, session['user_id'])
-        if not user:
-            return jsonify({'error': 'User not found'}), 404
+        user = g.current_user
         
         # Add digital asset using the model method
         user.add_digital_asset(asset_type, platform_name, account_identifier, credentials)
@@ -127,14 +212,13 @@ def add_digital_asset():
         # Save updated metadata
         if DatabaseService.safe_update(user, encrypted_metadata=user.encrypted_metadata):
             # Log asset addition
-            AuditService.log_user_action(
+            AuditService.enqueue_user_action(
                 user_id=user.user_id,
                 action='asset_added',
                 details={
                     'asset_type': asset_type,
                     'platform_name': platform_name,
-                    'account_identifier': account_identifier,
-                    'timestamp': datetime.utcnow().isoformat()
+                    'account_identifier': account_identifier
                 }
             )
             
@@ -151,7 +235,7 @@ def add_digital_asset():
             
     except Exception as e:
         current_app.logger.error(f"Add asset error: {str(e)}")
-        return jsonify({'error': 'Internal server error'}), 500
+        return ERR_INTERNAL()
 
 @vault_bp.route('/assets/<asset_type>', methods=['GET'])
 @require_auth
@@ -159,13 +243,14 @@ def add_digital_asset():
 def get_assets_by_type(asset_type):
     """Get digital assets of a specific type"""
     try:
-        valid_asset_types = ['email', 'bank', 'social_media', 'other']
-        if asset_type not in valid_asset_types:
-            return jsonify({'error': f'Invalid asset type. Must be one of: {valid_asset_types}'}), 400
+        if not isinstance(asset_type, str) or asset_type not in ASSET_TYPES:
+            return ERR_INVALID_ASSET_TYPE()
         
-        user = DatabaseService.get_by_id(UserProfile, session['user_id'])
-        if not user:
-            return jsonify({'error': 'User not found'}), 404
+        user = g.current_user
+        
+        etag = _assets_etag(user)
+        if etag is not None and etag in request.if_none_match:
+            return _not_modified(etag)
         
         # Get assets of specific type
         assets = user.get_digital_assets_by_type(asset_type)
@@ -180,11 +265,34 @@ def get_assets_by_type(asset_type):
             }
             safe_assets.append(safe_asset)
         
-        return jsonify({'assets': safe_assets}), 200
+        response = jsonify({'assets': safe_assets})
+        if etag is not None:
+            response.set_etag(etag)
+        return response
         
     except Exception as e:
         current_app.logger.error(f"Get assets by type error: {str(e)}")
-        return jsonify({'error': 'Internal server error'}), 500
+        return ERR_INTERNAL()
+
+def _assets_etag(user):
+    """
+    ETag for responses built from the user's digital assets
+    
+    The encrypted metadata changes whenever the assets do, so hashing it identifies
+    the response without decrypting anything.
+    
+    Returns:
+        ETag value, or None if the user has no assets yet
+    """
+    if not user.encrypted_metadata:
+        return None
+    return hashlib.blake2b(user.encrypted_metadata.encode('utf-8'), digest_size=16).hexdigest()
+
+def _not_modified(etag):
+    """Build a 304 response for a conditional GET whose ETag still matches"""
+    response = current_app.response_class(status=304)
+    response.set_etag(etag)
+    return response
 
 # Trusted Contact Management Endpoints
 
@@ -193,15 +301,18 @@ def get_assets_by_type(asset_type):
 def get_trusted_contacts():
     """Get all trusted contacts for the authenticated user"""
     try:
-        contacts = DatabaseService.get_all(TrustedContact, user_id=session['user_id'])
+        # Read-only listing: plain column rows, without building ORM instances
+        rows = db.session.query(*TrustedContact.__table__.columns).filter(
+            TrustedContact.user_id == session['user_id']
+        ).all()
         
         return jsonify({
-            'contacts': [contact.to_dict() for contact in contacts]
+            'contacts': [TrustedContact.serialize(row) for row in rows]
         }), 200
         
     except Exception as e:
         current_app.logger.error(f"Get trusted contacts error: {str(e)}")
-        return jsonify({'error': 'Internal server error'}), 500
+        return ERR_INTERNAL()
 
 @vault_bp.route('/trusted-contacts', methods=['POST'])
 @require_auth
@@ -230,37 +341,25 @@ def add_trusted_contact():
         data = request.get_json()
         
         # Validate required fields
-        required_fields = [
-            'contact_name', 'contact_email', 'contact_phone', 'relationship',
-            'contact_aadhaar_number', 'contact_pan_number', 'contact_address_line1',
-            'contact_city', 'contact_state', 'contact_pincode'
-        ]
-        for field in required_fields:
-            if not data.get(field):
+        # Check and normalize the required fields in one pass
+        values = []
+        for field, normalize in CONTACT_REQUIRED_FIELDS:
+            value = data.get(field)
+            if not value:
                 return jsonify({'error': f'Missing required field: {field}'}), 400
+            values.append(normalize(value))
         
-        # Extract and validate data
-        contact_name = data['contact_name'].strip()
-        contact_email = data['contact_email'].lower().strip()
-        contact_phone = data['contact_phone'].strip()
-        relationship = data['relationship'].strip()
-        contact_aadhaar_number = re.sub(r'[\s-]', '', data['contact_aadhaar_number'])
-        contact_pan_number = data['contact_pan_number'].upper().strip()
-        contact_address_line1 = data['contact_address_line1'].strip()
+        (contact_name, contact_email, contact_phone, relationship,
+         contact_aadhaar_number, contact_pan_number, contact_address_line1,
+         contact_city, contact_state, contact_pincode) = values
         contact_address_line2 = data.get('contact_address_line2', '').strip()
-        contact_city = data['contact_city'].strip()
-        contact_state = data['contact_state'].strip()
-        contact_pincode = data['contact_pincode'].strip()
         authorization_level = data.get('authorization_level', 'basic')
         
         # Validate email format
-        email_regex = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
-        if not email_regex.match(contact_email):
-            return jsonify({'error': 'Invalid email format'}), 400
+        if not is_valid_email(contact_email):
+            return ERR_INVALID_EMAIL()
         
         # Validate KYC data using the KYC service
-        from app.services.kyc_verification import KYCVerificationService
-        
         kyc_data = {
             'phone_number': contact_phone,
             'aadhaar_number': contact_aadhaar_number,
@@ -280,30 +379,6 @@ def add_trusted_contact():
                 'validation_errors': validation_result['errors']
             }), 400
         
-        # Check if contact already exists for this user (by email, phone, Aadhaar, or PAN)
-        existing_contact = TrustedContact.query.filter(
-            (TrustedContact.user_id == session['user_id']) &
-            ((TrustedContact.contact_email == contact_email) |
-             (TrustedContact.contact_phone == contact_phone) |
-             (TrustedContact.contact_aadhaar_number == contact_aadhaar_number) |
-             (TrustedContact.contact_pan_number == contact_pan_number))
-        ).first()
-        
-        if existing_contact:
-            if existing_contact.contact_email == contact_email:
-                return jsonify({'error': 'Trusted contact with this email already exists'}), 409
-            elif existing_contact.contact_phone == contact_phone:
-                return jsonify({'error': 'Trusted contact with this phone number already exists'}), 409
-            elif existing_contact.contact_aadhaar_number == contact_aadhaar_number:
-                return jsonify({'error': 'Trusted contact with this Aadhaar number already exists'}), 409
-            elif existing_contact.contact_pan_number == contact_pan_number:
-                return jsonify({'error': 'Trusted contact with this PAN number already exists'}), 409
-        
-        # Verify identity documents for trusted contact
-        identity_verification = KYCVerificationService.verify_identity_documents(
-            contact_aadhaar_number, contact_pan_number, contact_name, None
-        )
-        
         # Create new trusted contact
         contact = TrustedContact(
             user_id=session['user_id'],
@@ -319,13 +394,27 @@ def add_trusted_contact():
             contact_state=contact_state,
             contact_pincode=contact_pincode,
             authorization_level=authorization_level,
-            identity_verification_score=str(identity_verification['verification_score']),
-            identity_documents_verified='verified' if identity_verification['status'] == 'verified' else 'pending'
+            identity_documents_verified='pending'  # Set by the background verification
         )
         
-        if DatabaseService.safe_add(contact):
+        # The unique indexes on (user_id, email/phone/Aadhaar/PAN) reject duplicates
+        inserted = DatabaseService.add_unique(contact)
+        if inserted is False:
+            return jsonify({'error': _duplicate_contact_error(
+                session['user_id'], contact_email, contact_phone, contact_aadhaar_number, contact_pan_number
+            )}), 409
+        
+        if inserted:
+            # Verify identity documents off the request path
+            get_contact_verification_runner().submit(
+                KYCVerificationService.verify_contact_identity,
+                session['user_id'], contact.contact_id,
+                contact_aadhaar_number, contact_pan_number, contact_name,
+                owner=session['user_id']
+            )
+            
             # Log contact addition
-            AuditService.log_user_action(
+            AuditService.enqueue_user_action(
                 user_id=session['user_id'],
                 action='trusted_contact_added',
                 details={
@@ -333,26 +422,58 @@ def add_trusted_contact():
                     'contact_email': contact_email,
                     'contact_phone': contact_phone[-4:],  # Only log last 4 digits
                     'relationship': relationship,
-                    'authorization_level': authorization_level,
-                    'identity_verification_score': identity_verification['verification_score'],
-                    'timestamp': datetime.utcnow().isoformat()
+                    'authorization_level': authorization_level
                 }
             )
             
+            # 202: the contact is stored, identity verification is still running
             return jsonify({
                 'message': 'Trusted contact added successfully with enhanced security verification',
                 'contact': contact.to_dict(),
                 'identity_verification': {
-                    'status': identity_verification['status'],
-                    'verification_score': identity_verification['verification_score']
+                    'status': 'pending',
+                    'verification_score': None
                 }
-            }), 201
+            }), 202
         else:
             return jsonify({'error': 'Failed to add trusted contact'}), 500
             
     except Exception as e:
         current_app.logger.error(f"Add trusted contact error: {str(e)}")
-        return jsonify({'error': 'Internal server error'}), 500
+        return ERR_INTERNAL()
+
+def _duplicate_contact_error(user_id, contact_email, contact_phone, contact_aadhaar_number, contact_pan_number):
+    """
+    Find which field made a new trusted contact collide with an existing one
+    
+    Only runs after the INSERT was rejected, and fetches just the compared columns.
+    
+    Returns:
+        Error message for the 409 response
+    """
+    existing_contact = db.session.query(
+        TrustedContact.contact_email,
+        TrustedContact.contact_phone,
+        TrustedContact.contact_aadhaar_number,
+        TrustedContact.contact_pan_number
+    ).filter(
+        (TrustedContact.user_id == user_id) &
+        ((TrustedContact.contact_email == contact_email) |
+         (TrustedContact.contact_phone == contact_phone) |
+         (TrustedContact.contact_aadhaar_number == contact_aadhaar_number) |
+         (TrustedContact.contact_pan_number == contact_pan_number))
+    ).first()
+    
+    if existing_contact is not None:
+        if existing_contact.contact_email == contact_email:
+            return 'Trusted contact with this email already exists'
+        elif existing_contact.contact_phone == contact_phone:
+            return 'Trusted contact with this phone number already exists'
+        elif existing_contact.contact_aadhaar_number == contact_aadhaar_number:
+            return 'Trusted contact with this Aadhaar number already exists'
+        elif existing_contact.contact_pan_number == contact_pan_number:
+            return 'Trusted contact with this PAN number already exists'
+    return 'Trusted contact already exists'
 
 @vault_bp.route('/trusted-contacts/<contact_id>', methods=['PUT'])
 @require_auth
@@ -378,7 +499,7 @@ def update_trusted_contact(contact_id):
         ).first()
         
         if not contact:
-            return jsonify({'error': 'Trusted contact not found'}), 404
+            return ERR_CONTACT_NOT_FOUND()
         
         # Track changes for audit log
         changes = {}
@@ -403,21 +524,25 @@ def update_trusted_contact(contact_id):
                 contact.relationship = new_relationship
         
         if changes:
+            # Serialize before committing: the commit expires the instance, and
+            # reading it afterwards would reload the whole row
+            contact_dict = contact.to_dict()
+            
+            # Only the changed columns are dirty, so this is a single UPDATE of just those
             if DatabaseService.safe_update(contact, **{k: v['new'] for k, v in changes.items()}):
                 # Log contact update
-                AuditService.log_user_action(
+                AuditService.enqueue_user_action(
                     user_id=session['user_id'],
                     action='trusted_contact_updated',
                     details={
                         'contact_id': contact_id,
-                        'changes': changes,
-                        'timestamp': datetime.utcnow().isoformat()
+                        'changes': changes
                     }
                 )
                 
                 return jsonify({
                     'message': 'Trusted contact updated successfully',
-                    'contact': contact.to_dict()
+                    'contact': contact_dict
                 }), 200
             else:
                 return jsonify({'error': 'Failed to update trusted contact'}), 500
@@ -426,7 +551,7 @@ def update_trusted_contact(contact_id):
             
     except Exception as e:
         current_app.logger.error(f"Update trusted contact error: {str(e)}")
-        return jsonify({'error': 'Internal server error'}), 500
+        return ERR_INTERNAL()
 
 @vault_bp.route('/trusted-contacts/<contact_id>', methods=['DELETE'])
 @require_auth
@@ -441,19 +566,22 @@ def delete_trusted_contact(contact_id):
         ).first()
         
         if not contact:
-            return jsonify({'error': 'Trusted contact not found'}), 404
+            return ERR_CONTACT_NOT_FOUND()
         
-        contact_info = contact.to_dict()  # Save for audit log
+        # Summary for the audit log; the contact's PII is not copied into it
+        contact_info = {
+            'relationship': contact.relationship,
+            'contact_email_hash': hashlib.blake2b(contact.contact_email.encode('utf-8'), digest_size=8).hexdigest()
+        }
         
         if DatabaseService.safe_delete(contact):
             # Log contact deletion
-            AuditService.log_user_action(
+            AuditService.enqueue_user_action(
                 user_id=session['user_id'],
                 action='trusted_contact_deleted',
                 details={
                     'contact_id': contact_id,
-                    'contact_info': contact_info,
-                    'timestamp': datetime.utcnow().isoformat()
+                    'contact_info': contact_info
                 }
             )
             
@@ -463,7 +591,7 @@ def delete_trusted_contact(contact_id):
             
     except Exception as e:
         current_app.logger.error(f"Delete trusted contact error: {str(e)}")
-        return jsonify({'error': 'Internal server error'}), 500
+        return ERR_INTERNAL()
 
 # Action Policy Management Endpoints
 
@@ -475,15 +603,16 @@ def get_action_policies():
         policies = DatabaseService.get_all(ActionPolicy, user_id=session['user_id'])
         
         # Include decrypted policy details for user's own policies
+        details_by_id = ActionPolicy.bulk_get_policy_details(policies)
+        
         policy_list = []
         for policy in policies:
             policy_dict = policy.to_dict()
-            try:
-                policy_details = policy.get_policy_details()
-                if policy_details:
-                    policy_dict['policy_details_decrypted'] = policy_details
-            except Exception as e:
-                current_app.logger.warning(f"Could not decrypt policy details for {policy.policy_id}: {str(e)}")
+            policy_details = details_by_id.get(policy.policy_id)
+            if policy_details:
+                policy_dict['policy_details_decrypted'] = policy_details
+            elif policy.policy_details:
+                current_app.logger.warning(f"Could not decrypt policy details for {policy.policy_id}")
             
             policy_list.append(policy_dict)
         
@@ -491,7 +620,7 @@ def get_action_policies():
         
     except Exception as e:
         current_app.logger.error(f"Get action policies error: {str(e)}")
-        return jsonify({'error': 'Internal server error'}), 500
+        return ERR_INTERNAL()
 
 @vault_bp.route('/policies', methods=['POST'])
 @require_auth
@@ -531,24 +660,12 @@ def create_action_policy():
         priority = data.get('priority', 1)
         
         # Validate asset type
-        valid_asset_types = ['email', 'bank', 'social_media', 'other']
-        if asset_type not in valid_asset_types:
-            return jsonify({'error': f'Invalid asset type. Must be one of: {valid_asset_types}'}), 400
+        if not isinstance(asset_type, str) or asset_type not in ASSET_TYPES:
+            return ERR_INVALID_ASSET_TYPE()
         
         # Validate action type
-        valid_action_types = ['delete', 'memorialize', 'transfer', 'lock']
-        if action_type not in valid_action_types:
-            return jsonify({'error': f'Invalid action type. Must be one of: {valid_action_types}'}), 400
-        
-        # Check if policy already exists for this asset
-        existing_policy = ActionPolicy.query.filter_by(
-            user_id=session['user_id'],
-            platform_name=platform_name,
-            account_identifier=account_identifier
-        ).first()
-        
-        if existing_policy:
-            return jsonify({'error': 'Policy already exists for this asset'}), 409
+        if not isinstance(action_type, str) or action_type not in ACTION_TYPES:
+            return ERR_INVALID_ACTION_TYPE()
         
         # Create new action policy
         policy = ActionPolicy(
@@ -568,9 +685,14 @@ def create_action_policy():
                 conditions
             )
         
-        if DatabaseService.safe_add(policy):
+        # The unique index on (user_id, platform_name, account_identifier) rejects duplicates
+        inserted = DatabaseService.add_unique(policy)
+        if inserted is False:
+            return ERR_POLICY_EXISTS()
+        
+        if inserted:
             # Log policy creation
-            AuditService.log_user_action(
+            AuditService.enqueue_user_action(
                 user_id=session['user_id'],
                 action='policy_created',
                 details={
@@ -578,8 +700,7 @@ def create_action_policy():
                     'asset_type': asset_type,
                     'platform_name': platform_name,
                     'account_identifier': account_identifier,
-                    'action_type': action_type,
-                    'timestamp': datetime.utcnow().isoformat()
+                    'action_type': action_type
                 }
             )
             
@@ -592,7 +713,7 @@ def create_action_policy():
             
     except Exception as e:
         current_app.logger.error(f"Create action policy error: {str(e)}")
-        return jsonify({'error': 'Internal server error'}), 500
+        return ERR_INTERNAL()
 
 @vault_bp.route('/policies/<policy_id>', methods=['PUT'])
 @require_auth
@@ -620,7 +741,7 @@ def update_action_policy(policy_id):
         ).first()
         
         if not policy:
-            return jsonify({'error': 'Action policy not found'}), 404
+            return ERR_POLICY_NOT_FOUND()
         
         # Track changes for audit log
         changes = {}
@@ -628,9 +749,8 @@ def update_action_policy(policy_id):
         # Update action type if provided
         if 'action_type' in data:
             new_action_type = data['action_type']
-            valid_action_types = ['delete', 'memorialize', 'transfer', 'lock']
-            if new_action_type not in valid_action_types:
-                return jsonify({'error': f'Invalid action type. Must be one of: {valid_action_types}'}), 400
+            if not isinstance(new_action_type, str) or new_action_type not in ACTION_TYPES:
+                return ERR_INVALID_ACTION_TYPE()
             
             if new_action_type != policy.action_type:
                 changes['action_type'] = {'old': policy.action_type, 'new': new_action_type}
@@ -667,21 +787,25 @@ def update_action_policy(policy_id):
             if policy_details_updated:
                 update_fields['policy_details'] = policy.policy_details
             
+            # Serialize before committing: the commit expires the instance, and
+            # reading it afterwards would reload the whole row
+            policy_dict = policy.to_dict()
+            
+            # Only the changed columns are dirty, so this is a single UPDATE of just those
             if DatabaseService.safe_update(policy, **update_fields):
                 # Log policy update
-                AuditService.log_user_action(
+                AuditService.enqueue_user_action(
                     user_id=session['user_id'],
                     action='policy_updated',
                     details={
                         'policy_id': policy_id,
-                        'changes': changes,
-                        'timestamp': datetime.utcnow().isoformat()
+                        'changes': changes
                     }
                 )
                 
                 return jsonify({
                     'message': 'Action policy updated successfully',
-                    'policy': policy.to_dict()
+                    'policy': policy_dict
                 }), 200
             else:
                 return jsonify({'error': 'Failed to update action policy'}), 500
@@ -690,7 +814,7 @@ def update_action_policy(policy_id):
             
     except Exception as e:
         current_app.logger.error(f"Update action policy error: {str(e)}")
-        return jsonify({'error': 'Internal server error'}), 500
+        return ERR_INTERNAL()
 
 @vault_bp.route('/policies/<policy_id>', methods=['DELETE'])
 @require_auth
@@ -705,19 +829,24 @@ def delete_action_policy(policy_id):
         ).first()
         
         if not policy:
-            return jsonify({'error': 'Action policy not found'}), 404
-        
-        policy_info = policy.to_dict()  # Save for audit log
+            return ERR_POLICY_NOT_FOUND()
+        
+        # Summary for the audit log; same fields as the policy_created entry
+        policy_info = {
+            'asset_type': policy.asset_type,
+            'platform_name': policy.platform_name,
+            'account_identifier': policy.account_identifier,
+            'action_type': policy.action_type
+        }
         
         if DatabaseService.safe_delete(policy):
             # Log policy deletion
-            AuditService.log_user_action(
+            AuditService.enqueue_user_action(
                 user_id=session['user_id'],
                 action='policy_deleted',
                 details={
                     'policy_id': policy_id,
-                    'policy_info': policy_info,
-                    'timestamp': datetime.utcnow().isoformat()
+                    'policy_info': policy_info
                 }
             )
             
@@ -727,4 +856,28 @@ def delete_action_policy(policy_id):
             
     except Exception as e:
         current_app.logger.error(f"Delete action policy error: {str(e)}")
-        return jsonify({'error': 'Internal server error'}), 500
\ No newline at end of file
+        return ERR_INTERNAL()
+
+# Conditional GET support for the read endpoints. 'no-cache' lets clients keep
+# a copy but makes them revalidate it with If-None-Match on every use
+_CONDITIONAL_ENDPOINTS = frozenset((
+    'vault.get_digital_assets',
+    'vault.get_assets_by_type',
+    'vault.get_trusted_contacts',
+    'vault.get_action_policies'
+))
+
+@vault_bp.after_request
+def add_cache_headers(response):
+    if request.endpoint not in _CONDITIONAL_ENDPOINTS or request.method != 'GET' \
+            or response.status_code not in (200, 304):
+        return response
+    
+    response.headers['Cache-Control'] = 'private, no-cache'
+    if response.status_code == 304:
+        return response
+    
+    # Endpoints without a cheaper version identifier are tagged by their body
+    if response.get_etag()[0] is None:
+        response.set_etag(hashlib.blake2b(response.get_data(), digest_size=16).hexdigest())
+    return response.make_conditional(request)
@@ -3,7 +3,10 @@ Death Verification and Policy Execution API Endpoints
 Handles death certificate upload, verification, and automatic policy execution
 """
 from flask import Blueprint, request, jsonify, session, current_app
+from werkzeug.exceptions import RequestEntityTooLarge
 from werkzeug.utils import secure_filename
+from sqlalchemy import and_
+from app import db
 from app.models.user_profile import UserProfile
 from app.models.trusted_contact import TrustedContact
 from app.models.action_policy import ActionPolicy
@@ -11,22 +14,63 @@ from app.services.database import DatabaseService
 from app.services.audit import AuditService
 from app.services.death_verification import DeathVerificationService
 from app.services.action_engine import ActionEngineService
+from app.services.background_tasks import get_policy_task_runner
 from datetime import datetime
 from functools import wraps
-import os
 import uuid
 import base64
 
 verification_bp = Blueprint('verification', __name__, url_prefix='/api/verification')
 
 # Allowed file extensions for death certificates
-ALLOWED_EXTENSIONS = {'pdf', 'png', 'jpg', 'jpeg', 'tiff', 'bmp'}
+ALLOWED_EXTENSIONS = frozenset(('pdf', 'png', 'jpg', 'jpeg', 'tiff', 'bmp'))
+INVALID_FILE_TYPE_MSG = f'Invalid file type. Allowed types: {", ".join(ALLOWED_EXTENSIONS)}'
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+MAX_UPLOAD_SIZE = MAX_FILE_SIZE + 64 * 1024  # File plus the other multipart form fields
+FILE_TOO_LARGE_MSG = 'File size too large. Maximum 10MB allowed'
+
+def file_extension(filename):
+    """Lowercase extension of a filename without the dot, or '' if it has none"""
+    _, dot, extension = filename.rpartition('.')
+    return extension.lower() if dot else ''
 
 def allowed_file(filename):
     """Check if file extension is allowed"""
-    return '.' in filename and \
-           filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+    return file_extension(filename) in ALLOWED_EXTENSIONS
+
+def find_user_and_trusted_contact(user_email, contact_email, verified_only=True):
+    """
+    Look up a user and their trusted contact with one LEFT OUTER JOIN
+    
+    Only the columns the endpoints need are selected: the user's user_id and
+    status, and the contact's contact_id and verification_status.
+    
+    Args:
+        user_email: Email of the user (already normalized)
+        contact_email: Email of the trusted contact (already normalized)
+        verified_only: Only match contacts whose verification_status is 'verified'
+        
+    Returns:
+        Tuple of (user row or None, contact row or None); both are the same result
+        row, and the contact is None when the user has no matching trusted contact
+    """
+    join_condition = and_(
+        TrustedContact.user_id == UserProfile.user_id,
+        TrustedContact.contact_email == contact_email
+    )
+    if verified_only:
+        join_condition = and_(join_condition, TrustedContact.verification_status == 'verified')
+    
+    row = db.session.query(
+        UserProfile.user_id, UserProfile.status,
+        TrustedContact.contact_id, TrustedContact.verification_status
+    ).outerjoin(
+        TrustedContact, join_condition
+    ).filter(UserProfile.email == user_email).first()
+    
+    if row is None:
+        return None, None
+    return row, (row if row.contact_id is not None else None)
 
 def require_trusted_contact_auth(f):
     """Decorator to require trusted contact authorization"""
@@ -53,6 +97,10 @@ def upload_death_certificate():
     - contact_email: Email of the trusted contact making the request
     """
     try:
+        # Reject oversized uploads from the declared length, before the form is parsed
+        if request.content_length is not None and request.content_length > MAX_UPLOAD_SIZE:
+            return jsonify({'error': FILE_TOO_LARGE_MSG}), 413
+        
         # Check if file is present
         if 'certificate_file' not in request.files:
             return jsonify({'error': 'No certificate file provided'}), 400
@@ -68,32 +116,26 @@ def upload_death_certificate():
             return jsonify({'error': 'No file selected'}), 400
         
         # Validate file
-        if not allowed_file(file.filename):
-            return jsonify({'error': f'Invalid file type. Allowed types: {", ".join(ALLOWED_EXTENSIONS)}'}), 400
+        file_type = file_extension(file.filename)
+        if file_type not in ALLOWED_EXTENSIONS:
+            return jsonify({'error': INVALID_FILE_TYPE_MSG}), 400
         
-        # Check file size
-        file.seek(0, os.SEEK_END)
-        file_size = file.tell()
-        file.seek(0)
+        # Read the upload once, never more than one byte past the limit; the OCR
+        # client takes the whole image as bytes, so this is the only copy made
+        file_data = file.stream.read(MAX_FILE_SIZE + 1)
+        file_size = len(file_data)
         
         if file_size > MAX_FILE_SIZE:
-            return jsonify({'error': 'File size too large. Maximum 10MB allowed'}), 400
+            return jsonify({'error': FILE_TOO_LARGE_MSG}), 413
         
-        # Find deceased user
-        deceased_user = UserProfile.query.filter_by(email=deceased_user_email).first()
+        # Find deceased user and verify trusted contact authorization
+        deceased_user, trusted_contact = find_user_and_trusted_contact(deceased_user_email, contact_email)
         if not deceased_user:
             return jsonify({'error': 'Deceased user not found'}), 404
         
-        # Verify trusted contact authorization
-        trusted_contact = TrustedContact.query.filter_by(
-            user_id=deceased_user.user_id,
-            contact_email=contact_email,
-            verification_status='verified'
-        ).first()
-        
         if not trusted_contact:
             # Log unauthorized verification attempt
-            AuditService.create_log_entry(
+            AuditService.enqueue(
                 user_id=deceased_user.user_id,
                 event_type='unauthorized_verification_attempt',
                 event_description=f'Unauthorized death verification attempt by {contact_email}',
@@ -105,21 +147,20 @@ def upload_death_certificate():
             )
             return jsonify({'error': 'Unauthorized. You are not a verified trusted contact for this user'}), 403
         
-        # Read file data
-        file_data = file.read()
-        
         # Process death certificate using Azure AI Vision
         death_verification_service = DeathVerificationService()
-        verification_result = death_verification_service.process_death_certificate(file_data)
+        verification_result = death_verification_service.process_death_certificate(
+            file_data, deceased_user.user_id
+        )
         
         # Log AI service call
-        AuditService.log_ai_service_call(
+        AuditService.enqueue_ai_service_call(
             user_id=deceased_user.user_id,
             service_name='azure_vision',
             operation='death_certificate_ocr',
             input_data={
                 'file_size': file_size,
-                'file_type': file.filename.rsplit('.', 1)[1].lower(),
+                'file_type': file_type,
                 'contact_email': contact_email
             },
             output_data=verification_result,
@@ -134,14 +175,12 @@ def upload_death_certificate():
         
         # Verify death event against user profile
         extracted_data = verification_result.get('extracted_data', {})
-        death_verified = death_verification_service.verify_death_event(extracted_data, deceased_user.user_id)
+        death_event = death_verification_service.verify_death_event(extracted_data, deceased_user.user_id)
         
-        if death_verified:
-            # Update user status to deceased
-            DatabaseService.safe_update(deceased_user, status='deceased')
-            
+        # A successful verification has already set the user's status to deceased
+        if death_event.get('status') == 'success':
             # Log successful death verification
-            AuditService.create_log_entry(
+            AuditService.enqueue(
                 user_id=deceased_user.user_id,
                 event_type='death_verified',
                 event_description=f'Death verified by trusted contact {contact_email}',
@@ -153,19 +192,26 @@ def upload_death_certificate():
                 status='success'
             )
             
-            # Trigger automatic policy execution
-            execution_result = trigger_policy_execution(deceased_user.user_id, trusted_contact.contact_id)
+            # Trigger automatic policy execution in the background; it waits on
+            # Azure OpenAI, and its progress is available from /status/task/<task_id>
+            task_id = get_policy_task_runner().submit(
+                trigger_policy_execution, deceased_user.user_id, trusted_contact.contact_id,
+                owner=session['user_id']
+            )
             
             return jsonify({
                 'message': 'Death certificate verified successfully',
                 'verification_id': str(uuid.uuid4()),
                 'extracted_data': extracted_data,
                 'confidence_score': verification_result.get('confidence_score', 0),
-                'policy_execution': execution_result
+                'policy_execution': {
+                    'status': 'queued',
+                    'task_id': task_id
+                }
             }), 200
         else:
             # Log failed verification
-            AuditService.create_log_entry(
+            AuditService.enqueue(
                 user_id=deceased_user.user_id,
                 event_type='death_verification_failed',
                 event_description='Death certificate verification failed - data mismatch',
@@ -182,6 +228,9 @@ def upload_death_certificate():
                 'extracted_data': extracted_data
             }), 400
             
+    except RequestEntityTooLarge:
+        # Body without a Content-Length that ran past MAX_CONTENT_LENGTH while parsing
+        return jsonify({'error': FILE_TOO_LARGE_MSG}), 413
     except Exception as e:
         current_app.logger.error(f"Death certificate upload error: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
@@ -197,9 +246,17 @@ def trigger_policy_execution(user_id, trusted_contact_id):
     Returns:
         Dictionary with execution results
     """
+    # Audit entries are collected here and written with one multi-row INSERT at the end
+    audit_entries = []
+    
+    # One execution time for the notifications and the execution record
+    execution_time = datetime.utcnow()
+    
     try:
-        # Get all action policies for the user
-        policies = DatabaseService.get_all(ActionPolicy, user_id=user_id)
+        # Get all action policies for the user as plain column rows; they are only read
+        policies = db.session.query(*ActionPolicy.__table__.columns).filter(
+            ActionPolicy.user_id == user_id
+        ).all()
         
         if not policies:
             return {
@@ -219,16 +276,17 @@ def trigger_policy_execution(user_id, trusted_contact_id):
         # Initialize Action Engine service
         action_engine = ActionEngineService()
         
-        # Prepare policies for interpretation
+        # Prepare policies for interpretation, decrypting all policy details in one pass
+        details_by_id = ActionPolicy.bulk_get_policy_details(policies)
+        
         policy_data = []
         for policy in policies:
-            policy_dict = policy.to_dict()
-            try:
-                policy_details = policy.get_policy_details()
-                if policy_details:
-                    policy_dict['policy_details_decrypted'] = policy_details
-            except Exception as e:
-                current_app.logger.warning(f"Could not decrypt policy details for {policy.policy_id}: {str(e)}")
+            policy_dict = ActionPolicy.serialize(policy)
+            policy_details = details_by_id.get(policy.policy_id)
+            if policy_details:
+                policy_dict['policy_details_decrypted'] = policy_details
+            elif policy.policy_details and policy.policy_id not in details_by_id:
+                current_app.logger.warning(f"Could not decrypt policy details for {policy.policy_id}")
             
             policy_data.append(policy_dict)
         
@@ -236,7 +294,7 @@ def trigger_policy_execution(user_id, trusted_contact_id):
         interpreted_policies = action_engine.interpret_policies(policy_data)
         
         # Log AI service call for policy interpretation
-        AuditService.log_ai_service_call(
+        audit_entries.append(AuditService.build_ai_service_call_entry(
             user_id=user_id,
             service_name='azure_openai',
             operation='policy_interpretation',
@@ -248,20 +306,20 @@ def trigger_policy_execution(user_id, trusted_contact_id):
                 'interpreted_policies_count': len(interpreted_policies)
             },
             status='success'
-        )
+        ))
         
         # Generate platform notifications
         user_info = {
             'full_name': user.full_name,
             'email': user.email,
-            'date_of_death': datetime.utcnow().strftime('%Y-%m-%d'),  # Use current date as death date
+            'date_of_death': execution_time.strftime('%Y-%m-%d'),  # Use current date as death date
             'user_id': user_id
         }
         
-        notifications = action_engine.generate_platform_notifications(interpreted_policies, user_info)
+        notifications = action_engine.generate_platform_notifications(interpreted_policies, user_info, user_id)
         
         # Log AI service call for notification generation
-        AuditService.log_ai_service_call(
+        audit_entries.append(AuditService.build_ai_service_call_entry(
             user_id=user_id,
             service_name='azure_openai',
             operation='notification_generation',
@@ -273,17 +331,17 @@ def trigger_policy_execution(user_id, trusted_contact_id):
                 'notifications_count': len(notifications)
             },
             status='success'
-        )
+        ))
         
         # Log policy execution
         execution_details = {
             'policies_processed': len(policies),
             'notifications_generated': len(notifications),
             'trusted_contact_id': trusted_contact_id,
-            'execution_timestamp': datetime.utcnow().isoformat()
+            'execution_timestamp': execution_time.isoformat()
         }
         
-        AuditService.create_log_entry(
+        audit_entries.append(AuditService.build_log_entry(
             user_id=user_id,
             event_type='policies_executed',
             event_description=f'Automatic policy execution triggered by death verification',
@@ -293,7 +351,8 @@ def trigger_policy_execution(user_id, trusted_contact_id):
                 'notifications': notifications
             },
             status='success'
-        )
+        ))
+        AuditService.bulk_insert(audit_entries)
         
         return {
             'status': 'success',
@@ -306,8 +365,8 @@ def trigger_policy_execution(user_id, trusted_contact_id):
     except Exception as e:
         current_app.logger.error(f"Policy execution error: {str(e)}")
         
-        # Log execution failure
-        AuditService.create_log_entry(
+        # Log execution failure, along with the AI service calls made before it
+        audit_entries.append(AuditService.build_log_entry(
             user_id=user_id,
             event_type='policy_execution_failed',
             event_description=f'Policy execution failed: {str(e)}',
@@ -316,13 +375,35 @@ def trigger_policy_execution(user_id, trusted_contact_id):
                 'error': str(e)
             },
             status='failure'
-        )
+        ))
+        AuditService.bulk_insert(audit_entries)
         
         return {
             'status': 'error',
             'message': f'Policy execution failed: {str(e)}'
         }
 
+@verification_bp.route('/status/task/<task_id>', methods=['GET'])
+@require_trusted_contact_auth
+def get_task_status(task_id):
+    """
+    Get the status of a background policy execution
+    
+    Returns the task's state ('queued', 'running', 'success' or 'failure') and,
+    once finished, the execution result. Only the account that uploaded the
+    certificate can read it; other callers get 404.
+    """
+    try:
+        task = get_policy_task_runner().get_status(task_id, owner=session['user_id'])
+        if task is None:
+            return jsonify({'error': 'Task not found'}), 404
+        
+        return jsonify(task), 200
+        
+    except Exception as e:
+        current_app.logger.error(f"Get task status error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
 @verification_bp.route('/status/<user_email>', methods=['GET'])
 @require_trusted_contact_auth
 def get_verification_status(user_email):
@@ -338,17 +419,13 @@ def get_verification_status(user_email):
         if not contact_email:
             return jsonify({'error': 'Contact email is required'}), 400
         
-        # Find user
-        user = UserProfile.query.filter_by(email=user_email.lower()).first()
+        # Find user and verify trusted contact authorization
+        user, trusted_contact = find_user_and_trusted_contact(
+            user_email.lower(), contact_email, verified_only=False
+        )
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
-        # Verify trusted contact authorization
-        trusted_contact = TrustedContact.query.filter_by(
-            user_id=user.user_id,
-            contact_email=contact_email
-        ).first()
-        
         if not trusted_contact:
             return jsonify({'error': 'Unauthorized. You are not a trusted contact for this user'}), 403
         
@@ -390,18 +467,11 @@ def get_user_policies(user_email):
         if not contact_email:
             return jsonify({'error': 'Contact email is required'}), 400
         
-        # Find user
-        user = UserProfile.query.filter_by(email=user_email.lower()).first()
+        # Find user and verify trusted contact authorization
+        user, trusted_contact = find_user_and_trusted_contact(user_email.lower(), contact_email)
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
-        # Verify trusted contact authorization
-        trusted_contact = TrustedContact.query.filter_by(
-            user_id=user.user_id,
-            contact_email=contact_email,
-            verification_status='verified'
-        ).first()
-        
         if not trusted_contact:
             return jsonify({'error': 'Unauthorized. You are not a verified trusted contact for this user'}), 403
         
@@ -409,22 +479,28 @@ def get_user_policies(user_email):
         if user.status not in ['deceased', 'active']:  # Allow active for demonstration purposes
             return jsonify({'error': 'Access denied. User status does not allow policy access'}), 403
         
-        # Get all policies for the user
-        policies = DatabaseService.get_all(ActionPolicy, user_id=user.user_id)
+        # Get all policies for the user, loading only the columns returned below;
+        # the encrypted policy_details blob is never fetched
+        policies = db.session.query(
+            ActionPolicy.policy_id,
+            ActionPolicy.asset_type,
+            ActionPolicy.platform_name,
+            ActionPolicy.account_identifier,
+            ActionPolicy.action_type,
+            ActionPolicy.priority,
+            ActionPolicy.created_at
+        ).filter(ActionPolicy.user_id == user.user_id).all()
         
         # Return policies without sensitive details (trusted contacts don't need full policy details)
-        policy_list = []
-        for policy in policies:
-            policy_dict = {
-                'policy_id': policy.policy_id,
-                'asset_type': policy.asset_type,
-                'platform_name': policy.platform_name,
-                'account_identifier': policy.account_identifier,
-                'action_type': policy.action_type,
-                'priority': policy.priority,
-                'created_at': policy.created_at.isoformat() if policy.created_at else None
-            }
-            policy_list.append(policy_dict)
+        policy_list = [{
+            'policy_id': policy.policy_id,
+            'asset_type': policy.asset_type,
+            'platform_name': policy.platform_name,
+            'account_identifier': policy.account_identifier,
+            'action_type': policy.action_type,
+            'priority': policy.priority,
+            'created_at': policy.created_at.isoformat() if policy.created_at else None
+        } for policy in policies]
         
         return jsonify({
             'user_email': user_email,
@@ -457,18 +533,11 @@ def manual_policy_execution(user_email):
         if not contact_email:
             return jsonify({'error': 'Contact email is required'}), 400
         
-        # Find user
-        user = UserProfile.query.filter_by(email=user_email.lower()).first()
+        # Find user and verify trusted contact authorization
+        user, trusted_contact = find_user_and_trusted_contact(user_email.lower(), contact_email)
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
-        # Verify trusted contact authorization
-        trusted_contact = TrustedContact.query.filter_by(
-            user_id=user.user_id,
-            contact_email=contact_email,
-            verification_status='verified'
-        ).first()
-        
         if not trusted_contact:
             return jsonify({'error': 'Unauthorized. You are not a verified trusted contact for this user'}), 403
         
@@ -477,7 +546,7 @@ def manual_policy_execution(user_email):
             return jsonify({'error': 'Manual policy execution only allowed for deceased users'}), 403
         
         # Log manual execution request
-        AuditService.log_user_action(
+        AuditService.enqueue_user_action(
             user_id=user.user_id,
             action='manual_policy_execution_requested',
             details={
@@ -520,18 +589,11 @@ def get_audit_trail(user_email):
         if not contact_email:
             return jsonify({'error': 'Contact email is required'}), 400
         
-        # Find user
-        user = UserProfile.query.filter_by(email=user_email.lower()).first()
+        # Find user and verify trusted contact authorization
+        user, trusted_contact = find_user_and_trusted_contact(user_email.lower(), contact_email)
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
-        # Verify trusted contact authorization
-        trusted_contact = TrustedContact.query.filter_by(
-            user_id=user.user_id,
-            contact_email=contact_email,
-            verification_status='verified'
-        ).first()
-        
         if not trusted_contact:
             return jsonify({'error': 'Unauthorized. You are not a verified trusted contact for this user'}), 403
         
@@ -551,17 +613,14 @@ def get_audit_trail(user_email):
             except ValueError:
                 return jsonify({'error': 'Invalid end_date format. Use YYYY-MM-DD'}), 400
         
-        # Get audit trail
-        audit_trail = AuditService.get_audit_trail(
+        # Get audit trail and verify the integrity of all the user's logs in one pass
+        audit_trail, integrity_report = AuditService.get_audit_trail_with_integrity(
             user_id=user.user_id,
             event_type=event_type,
             start_date=start_date,
             end_date=end_date
         )
         
-        # Verify audit log integrity
-        integrity_report = AuditService.verify_all_logs_integrity(user_id=user.user_id)
-        
         return jsonify({
             'user_email': user_email,
             'audit_trail': audit_trail,
@@ -5,5 +5,7 @@ from .user_profile import UserProfile
 from .trusted_contact import TrustedContact
 from .action_policy import ActionPolicy
 from .audit_log import AuditLog
+from .otp_code import OtpCode
+from .background_task import BackgroundTask
 
-__all__ = ['UserProfile', 'TrustedContact', 'ActionPolicy', 'AuditLog']
\ No newline at end of file
+__all__ = ['UserProfile', 'TrustedContact', 'ActionPolicy', 'AuditLog', 'OtpCode', 'BackgroundTask']
\ No newline at end of file
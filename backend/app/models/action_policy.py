@@ -3,14 +3,18 @@ Action Policy Model - User-defined rules for digital asset management
 """
 from app import db
 from app.utils.encryption import get_encryption_service, EncryptionError
-from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, Text
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, Text, Index
 from datetime import datetime
 import uuid
 import json
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 
 class ActionPolicy(db.Model):
     __tablename__ = 'action_policies'
+    __table_args__ = (
+        # One policy per asset; also serves lookups of a user's policies
+        Index('ix_action_policies_user_asset', 'user_id', 'platform_name', 'account_identifier', unique=True),
+    )
     
     policy_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = Column(String(36), ForeignKey('user_profiles.user_id'), nullable=False)
@@ -22,6 +26,8 @@ class ActionPolicy(db.Model):
     priority = Column(Integer, default=1, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     
+    user = db.relationship('UserProfile', back_populates='action_policies')
+    
     def __repr__(self):
         return f'<ActionPolicy {self.platform_name}:{self.action_type} for {self.user_id}>'
     
@@ -54,6 +60,31 @@ class ActionPolicy(db.Model):
         except EncryptionError as e:
             raise ValueError(f"Failed to decrypt policy details: {str(e)}")
     
+    @staticmethod
+    def bulk_get_policy_details(policies: List['ActionPolicy']) -> Dict[str, Dict[str, Any]]:
+        """
+        Decrypt policy details for several policies in one pass
+        
+        Args:
+            policies: ActionPolicy instances, or result rows with policy_id and policy_details
+            
+        Returns:
+            Dictionary mapping policy_id to decrypted details; policies without
+            details, or whose details cannot be decrypted, are omitted
+        """
+        with_details = [policy for policy in policies if policy.policy_details]
+        if not with_details:
+            return {}
+        
+        decrypted = get_encryption_service().decrypt_many(
+            [policy.policy_details for policy in with_details]
+        )
+        return {
+            policy.policy_id: details
+            for policy, details in zip(with_details, decrypted)
+            if details is not None
+        }
+    
     def set_natural_language_policy(self, policy_text: str, instructions: str = "", 
                                    conditions: list = None) -> None:
         """
@@ -73,14 +104,27 @@ class ActionPolicy(db.Model):
         self.set_policy_details(policy_data)
     
     def to_dict(self):
+        return ActionPolicy.serialize(self)
+    
+    @staticmethod
+    def serialize(record) -> Dict[str, Any]:
+        """
+        Build the API representation of an action policy
+        
+        Args:
+            record: ActionPolicy instance, or a result row with the same column names
+            
+        Returns:
+            Dictionary for JSON responses
+        """
         return {
-            'policy_id': self.policy_id,
-            'user_id': self.user_id,
-            'asset_type': self.asset_type,
-            'platform_name': self.platform_name,
-            'account_identifier': self.account_identifier,
-            'action_type': self.action_type,
-            'policy_details': self.policy_details,
-            'priority': self.priority,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'policy_id': record.policy_id,
+            'user_id': record.user_id,
+            'asset_type': record.asset_type,
+            'platform_name': record.platform_name,
+            'account_identifier': record.account_identifier,
+            'action_type': record.action_type,
+            'policy_details': record.policy_details,
+            'priority': record.priority,
+            'created_at': record.created_at.isoformat() if record.created_at else None
         }
\ No newline at end of file
@@ -2,14 +2,25 @@
 Audit Log Model - Tamper-proof logging for all system actions
 """
 from app import db
-from sqlalchemy import Column, String, DateTime, ForeignKey, Text, event
+from sqlalchemy import Column, String, DateTime, ForeignKey, Text, Index, event
 from datetime import datetime
 import uuid
 import hashlib
 import json
 
+# Names of the signed fields, in the order returned by AuditLog._hashed_fields
+HASHED_FIELD_NAMES = (
+    'log_id', 'user_id', 'event_type', 'event_description', 'ai_service_used',
+    'input_data', 'output_data', 'status', 'timestamp'
+)
+
 class AuditLog(db.Model):
     __tablename__ = 'audit_logs'
+    __table_args__ = (
+        # Per-user audit trails, newest first, optionally filtered by event type
+        Index('ix_audit_logs_user_timestamp', 'user_id', 'timestamp'),
+        Index('ix_audit_logs_user_event_timestamp', 'user_id', 'event_type', 'timestamp'),
+    )
     
     log_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = Column(String(36), ForeignKey('user_profiles.user_id'), nullable=False)
@@ -22,32 +33,79 @@ class AuditLog(db.Model):
     timestamp = Column(DateTime, default=datetime.utcnow, nullable=False)
     hash_signature = Column(String(256), nullable=True)  # For tamper detection
     
-    def _generate_hash(self):
-        """Generate tamper-proof hash signature for the log entry"""
+    user = db.relationship('UserProfile', back_populates='audit_logs')
+    
+    @staticmethod
+    def _hashed_values(record):
+        """Field values covered by the signature of record, in signing order"""
         # Use current timestamp if not set
-        timestamp_str = self.timestamp.isoformat() if self.timestamp else datetime.utcnow().isoformat()
+        timestamp_str = record.timestamp.isoformat() if record.timestamp else datetime.utcnow().isoformat()
         
-        hash_data = {
-            'log_id': self.log_id,
-            'user_id': self.user_id,
-            'event_type': self.event_type,
-            'event_description': self.event_description,
-            'ai_service_used': self.ai_service_used,
-            'input_data': self.input_data,
-            'output_data': self.output_data,
-            'status': self.status,
-            'timestamp': timestamp_str
-        }
+        return (
+            record.log_id, record.user_id, record.event_type, record.event_description,
+            record.ai_service_used, record.input_data, record.output_data, record.status,
+            timestamp_str
+        )
+    
+    @staticmethod
+    def _hash_values(values):
+        """SHA-256 over the fixed binary layout of the signed values"""
+        # Fixed field order, each value length-prefixed so no field can run into
+        # the next; None is encoded distinctly from an empty string
+        parts = []
+        for value in values:
+            if value is None:
+                parts.append(b'-')
+            else:
+                data = value.encode('utf-8')
+                parts.append(b'%d:' % len(data))
+                parts.append(data)
+        
+        return hashlib.sha256(b''.join(parts)).hexdigest()
+    
+    @staticmethod
+    def _legacy_hash_values(values):
+        """Hash layout used for entries signed before the binary layout: sorted JSON"""
+        hash_data = dict(zip(HASHED_FIELD_NAMES, values))
         hash_string = json.dumps(hash_data, sort_keys=True)
         return hashlib.sha256(hash_string.encode()).hexdigest()
     
-    def verify_integrity(self):
-        """Verify the integrity of this log entry"""
-        if not self.hash_signature:
+    @staticmethod
+    def verify_record(record):
+        """
+        Verify the signature of an audit log entry
+        
+        Args:
+            record: AuditLog instance or result row with the audit_logs columns
+            
+        Returns:
+            True if the entry is intact, False otherwise
+        """
+        if not record.hash_signature:
             return False
         
-        expected_hash = self._generate_hash()
-        return self.hash_signature == expected_hash
+        values = AuditLog._hashed_values(record)
+        if record.hash_signature == AuditLog._hash_values(values):
+            return True
+        
+        # Entries written before the binary layout still carry JSON-based signatures
+        return record.hash_signature == AuditLog._legacy_hash_values(values)
+    
+    def _hashed_fields(self):
+        """Field values covered by the signature, in signing order"""
+        return AuditLog._hashed_values(self)
+    
+    def _generate_hash(self):
+        """Generate tamper-proof hash signature for the log entry"""
+        return AuditLog._hash_values(self._hashed_fields())
+    
+    def _generate_legacy_hash(self):
+        """Hash layout used for entries signed before the binary layout: sorted JSON"""
+        return AuditLog._legacy_hash_values(self._hashed_fields())
+    
+    def verify_integrity(self):
+        """Verify the integrity of this log entry"""
+        return AuditLog.verify_record(self)
     
     def __repr__(self):
         return f'<AuditLog {self.event_type} for {self.user_id}>'
@@ -66,17 +124,15 @@ class AuditLog(db.Model):
             'hash_signature': self.hash_signature
         }
 
-# Event listener to generate hash after insert
-@event.listens_for(AuditLog, 'after_insert')
-def generate_hash_after_insert(mapper, connection, target):
-    """Generate hash signature after the record is inserted and all fields are set"""
+# Event listener to sign each entry as part of its INSERT
+@event.listens_for(AuditLog, 'before_insert')
+def generate_hash_before_insert(mapper, connection, target):
+    """Fill in the defaults the hash covers and store the hash in the same INSERT"""
     if not target.hash_signature:
-        # Generate hash with all fields populated
-        target.hash_signature = target._generate_hash()
+        # Column defaults are only applied during the INSERT, so set them here
+        if target.log_id is None:
+            target.log_id = str(uuid.uuid4())
+        if target.timestamp is None:
+            target.timestamp = datetime.utcnow()
         
-        # Update the record with the hash
-        connection.execute(
-            target.__table__.update().where(
-                target.__table__.c.log_id == target.log_id
-            ).values(hash_signature=target.hash_signature)
-        )
\ No newline at end of file
+        target.hash_signature = target._generate_hash()
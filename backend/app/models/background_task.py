@@ -0,0 +1,36 @@
+"""
+Background Task Model - State of work queued on a BackgroundTaskRunner
+"""
+from app import db
+from sqlalchemy import Column, String, DateTime, Text, Index
+from datetime import datetime
+import json
+
+class BackgroundTask(db.Model):
+    __tablename__ = 'background_tasks'
+    __table_args__ = (
+        # Pruning of finished tasks by age
+        Index('ix_background_tasks_submitted_at', 'submitted_at'),
+    )
+    
+    task_id = Column(String(36), primary_key=True)
+    runner = Column(String(50), nullable=False)  # Name of the runner that queued it
+    owner_id = Column(String(36), nullable=True)  # Account allowed to read the status
+    state = Column(String(20), nullable=False, default='queued')  # 'queued', 'running', 'success', 'failure'
+    result = Column(Text, nullable=True)  # JSON string
+    error = Column(Text, nullable=True)
+    submitted_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    finished_at = Column(DateTime, nullable=True)
+    
+    def __repr__(self):
+        return f'<BackgroundTask {self.task_id}: {self.state}>'
+    
+    def to_dict(self):
+        return {
+            'task_id': self.task_id,
+            'state': self.state,
+            'submitted_at': self.submitted_at.isoformat() if self.submitted_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'result': json.loads(self.result) if self.result else None,
+            'error': self.error
+        }
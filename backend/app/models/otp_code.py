@@ -0,0 +1,22 @@
+"""
+OTP Code Model - Pending phone/email verification codes
+"""
+from app import db
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer
+from datetime import datetime
+
+class OtpCode(db.Model):
+    __tablename__ = 'otp_codes'
+    
+    user_id = Column(String(36), ForeignKey('user_profiles.user_id', ondelete='CASCADE'), primary_key=True)
+    otp_type = Column(String(10), primary_key=True)  # 'phone' or 'email'
+    otp_hash = Column(String(64), nullable=False)  # HMAC-SHA256 hex digest, never the plain code
+    expires_at = Column(DateTime, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)  # Codes checked against this OTP so far
+    
+    def __repr__(self):
+        return f'<OtpCode {self.user_id}: {self.otp_type}>'
+    
+    def is_expired(self) -> bool:
+        """Check whether the code has passed its expiry time"""
+        return datetime.utcnow() >= self.expires_at
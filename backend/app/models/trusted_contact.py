@@ -2,12 +2,19 @@
 Trusted Contact Model - Emergency contacts for death verification
 """
 from app import db
-from sqlalchemy import Column, String, DateTime, ForeignKey
+from sqlalchemy import Column, String, DateTime, ForeignKey, Index
 from datetime import datetime
 import uuid
 
 class TrustedContact(db.Model):
     __tablename__ = 'trusted_contacts'
+    __table_args__ = (
+        # A user's contacts must not share an email, phone, Aadhaar or PAN number
+        Index('ix_trusted_contacts_user_email', 'user_id', 'contact_email', unique=True),
+        Index('ix_trusted_contacts_user_phone', 'user_id', 'contact_phone', unique=True),
+        Index('ix_trusted_contacts_user_aadhaar', 'user_id', 'contact_aadhaar_number', unique=True),
+        Index('ix_trusted_contacts_user_pan', 'user_id', 'contact_pan_number', unique=True),
+    )
     
     contact_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = Column(String(36), ForeignKey('user_profiles.user_id'), nullable=False)
@@ -38,34 +45,49 @@ class TrustedContact(db.Model):
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     verified_at = Column(DateTime, nullable=True)  # When verification was completed
     
+    user = db.relationship('UserProfile', back_populates='trusted_contacts')
+    
     def __repr__(self):
         return f'<TrustedContact {self.contact_name} for {self.user_id}>'
     
     def to_dict(self):
+        return TrustedContact.serialize(self)
+    
+    @staticmethod
+    def serialize(record) -> dict:
+        """
+        Build the API representation of a trusted contact
+        
+        Args:
+            record: TrustedContact instance, or a result row with the same column names
+            
+        Returns:
+            Dictionary for JSON responses
+        """
         return {
-            'contact_id': self.contact_id,
-            'user_id': self.user_id,
-            'contact_name': self.contact_name,
-            'contact_email': self.contact_email,
-            'contact_phone': self.contact_phone,
-            'relationship': self.relationship,
-            'contact_aadhaar_number': self.contact_aadhaar_number[-4:] if self.contact_aadhaar_number else None,  # Only last 4 digits
-            'contact_pan_number': self.contact_pan_number,
+            'contact_id': record.contact_id,
+            'user_id': record.user_id,
+            'contact_name': record.contact_name,
+            'contact_email': record.contact_email,
+            'contact_phone': record.contact_phone,
+            'relationship': record.relationship,
+            'contact_aadhaar_number': record.contact_aadhaar_number[-4:] if record.contact_aadhaar_number else None,  # Only last 4 digits
+            'contact_pan_number': record.contact_pan_number,
             'contact_address': {
-                'line1': self.contact_address_line1,
-                'line2': self.contact_address_line2,
-                'city': self.contact_city,
-                'state': self.contact_state,
-                'pincode': self.contact_pincode
+                'line1': record.contact_address_line1,
+                'line2': record.contact_address_line2,
+                'city': record.contact_city,
+                'state': record.contact_state,
+                'pincode': record.contact_pincode
             },
             'verification_details': {
-                'verification_status': self.verification_status,
-                'authorization_level': self.authorization_level,
-                'identity_verification_score': self.identity_verification_score,
-                'background_check_status': self.background_check_status,
-                'identity_documents_verified': self.identity_documents_verified,
-                'relationship_proof_verified': self.relationship_proof_verified,
-                'verified_at': self.verified_at.isoformat() if self.verified_at else None
+                'verification_status': record.verification_status,
+                'authorization_level': record.authorization_level,
+                'identity_verification_score': record.identity_verification_score,
+                'background_check_status': record.background_check_status,
+                'identity_documents_verified': record.identity_documents_verified,
+                'relationship_proof_verified': record.relationship_proof_verified,
+                'verified_at': record.verified_at.isoformat() if record.verified_at else None
             },
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'created_at': record.created_at.isoformat() if record.created_at else None
         }
\ No newline at end of file
@@ -4,17 +4,18 @@ User Profile Model - Core user data and digital asset storage
 from app import db
 from app.utils.encryption import encrypt_digital_assets, decrypt_digital_assets, EncryptionError
 from sqlalchemy import Column, String, DateTime, Date, Text
+from sqlalchemy.orm import selectinload
 from datetime import datetime
 import uuid
 import json
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 
 class UserProfile(db.Model):
     __tablename__ = 'user_profiles'
     
     user_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     email = Column(String(255), unique=True, nullable=False)
-    phone_number = Column(String(15), nullable=False)  # Mobile number for OTP verification
+    phone_number = Column(String(15), nullable=False, index=True)  # Mobile number for OTP verification
     full_name = Column(String(255), nullable=False)
     date_of_birth = Column(Date, nullable=False)
     
@@ -38,14 +39,39 @@ class UserProfile(db.Model):
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     
-    # Relationships
-    trusted_contacts = db.relationship('TrustedContact', backref='user', lazy=True, cascade='all, delete-orphan')
-    action_policies = db.relationship('ActionPolicy', backref='user', lazy=True, cascade='all, delete-orphan')
-    audit_logs = db.relationship('AuditLog', backref='user', lazy=True, cascade='all, delete-orphan')
+    # Relationships. Collections are never lazy-loaded: reading one without eager
+    # loading raises, so a loop over users can't silently issue a SELECT per user.
+    # Load them with options(selectinload(UserProfile.trusted_contacts), ...).
+    trusted_contacts = db.relationship('TrustedContact', back_populates='user', lazy='raise', cascade='all, delete-orphan')
+    action_policies = db.relationship('ActionPolicy', back_populates='user', lazy='raise', cascade='all, delete-orphan')
+    audit_logs = db.relationship('AuditLog', back_populates='user', lazy='raise', cascade='all, delete-orphan')
+    
+    # (ciphertext, decrypted metadata) for this instance; not a column, so it is
+    # never persisted, and loaded instances start from this class-level default
+    _metadata_cache = None
     
     def __repr__(self):
         return f'<UserProfile {self.email}>'
     
+    @classmethod
+    def load_with_audits(cls, user_ids: List[str]) -> List['UserProfile']:
+        """
+        Load users together with their audit logs in two queries
+        
+        Args:
+            user_ids: IDs of the users to load
+            
+        Returns:
+            UserProfile instances with audit_logs populated by a single
+            SELECT ... WHERE user_id IN (...)
+        """
+        if not user_ids:
+            return []
+        
+        return cls.query.filter(cls.user_id.in_(user_ids)).options(
+            selectinload(cls.audit_logs)
+        ).all()
+    
     def set_encrypted_metadata(self, assets_data: Dict[str, Any]) -> None:
         """
         Encrypt and store digital assets metadata
@@ -57,21 +83,36 @@ class UserProfile(db.Model):
             self.encrypted_metadata = encrypt_digital_assets(assets_data)
         except EncryptionError as e:
             raise ValueError(f"Failed to encrypt metadata: {str(e)}")
+        
+        # Keep the plaintext so the next read doesn't have to decrypt it again
+        self._metadata_cache = (self.encrypted_metadata, assets_data)
     
     def get_decrypted_metadata(self) -> Optional[Dict[str, Any]]:
         """
         Decrypt and return digital assets metadata
         
         Returns:
-            Dictionary containing digital asset information or None if no metadata
+            Copy of the dictionary containing digital asset information or None
+            if no metadata; nested values are shared with the cache
         """
         if not self.encrypted_metadata:
             return None
         
+        # Decrypted metadata is cached per instance and keyed by the ciphertext,
+        # so any new value assigned to encrypted_metadata invalidates it. Callers
+        # get a copy: keys set before a failed set_encrypted_metadata must not
+        # leak into the cache
+        cache = self._metadata_cache
+        if cache is not None and cache[0] == self.encrypted_metadata:
+            return dict(cache[1])
+        
         try:
-            return decrypt_digital_assets(self.encrypted_metadata)
+            metadata = decrypt_digital_assets(self.encrypted_metadata)
         except EncryptionError as e:
             raise ValueError(f"Failed to decrypt metadata: {str(e)}")
+        
+        self._metadata_cache = (self.encrypted_metadata, metadata)
+        return dict(metadata)
     
     def add_digital_asset(self, asset_type: str, platform_name: str, 
                          account_identifier: str, credentials: Dict[str, Any]) -> None:
@@ -84,12 +125,10 @@ class UserProfile(db.Model):
             account_identifier: Account username/email/ID
             credentials: Dictionary containing login credentials and other sensitive data
         """
-        # Get existing metadata or create new
+        # Get existing metadata or create new. The asset lists are shared with the
+        # cached metadata, so copy the one that gets modified
         metadata = self.get_decrypted_metadata() or {}
-        
-        # Initialize asset type list if it doesn't exist
-        if asset_type not in metadata:
-            metadata[asset_type] = []
+        metadata[asset_type] = list(metadata.get(asset_type, []))
         
         # Add new asset
         asset_data = {
@@ -5,19 +5,51 @@ Provides AI-powered policy interpretation and notification generation
 import os
 import json
 import logging
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 
-from openai import AzureOpenAI
 from azure.core.exceptions import AzureError
 
 from app.services.azure_resilience import with_azure_retry, AzureServiceError
 from app.services.audit import AuditService
 from app.models.action_policy import ActionPolicy
 from app.models.user_profile import UserProfile
+from app.utils.app_context import with_app_context
 
 logger = logging.getLogger(__name__)
 
+# The OpenAI SDK is heavy to import, so it is loaded on first use rather than
+# when the blueprints are registered in create_app
+AzureOpenAI = None
+
+def _load_openai_client_class():
+    """Import and return the AzureOpenAI client class"""
+    global AzureOpenAI
+    if AzureOpenAI is None:
+        from openai import AzureOpenAI as client_class
+        AzureOpenAI = client_class
+    return AzureOpenAI
+
+@functools.lru_cache(maxsize=1)
+def get_openai_client(endpoint: str, api_key: str):
+    """
+    Return a shared Azure OpenAI client so its HTTP connection pool is reused
+    
+    Args:
+        endpoint: Azure OpenAI endpoint URL
+        api_key: Azure OpenAI API key
+        
+    Returns:
+        AzureOpenAI client instance
+    """
+    return _load_openai_client_class()(
+        api_key=api_key,
+        api_version="2024-02-01",
+        azure_endpoint=endpoint
+    )
+
 class ActionEngineService:
     """
     Service for interpreting natural language policies and generating platform notifications
@@ -37,17 +69,16 @@ class ActionEngineService:
             raise ValueError("Missing required Azure OpenAI configuration. Check AZURE_OPENAI_ENDPOINT, AZURE_OPENAI_KEY, and AZURE_OPENAI_DEPLOYMENT environment variables.")
         
         # Initialize Azure OpenAI client
-        self.client = AzureOpenAI(
-            api_key=self.api_key,
-            api_version="2024-02-01",
-            azure_endpoint=self.endpoint
-        )
+        self.client = get_openai_client(self.endpoint, self.api_key)
         
         # Policy interpretation configuration
         self.interpretation_temperature = 0.1  # Low temperature for consistent interpretation
         self.notification_temperature = 0.2    # Slightly higher for more natural language
         self.max_tokens = 1000
         
+        # Concurrent notification generations; each is an Azure OpenAI round-trip
+        self.notification_workers = int(os.getenv('NOTIFICATION_GENERATION_WORKERS', '8'))
+        
         # Platform-specific templates and requirements
         self.platform_requirements = {
             'gmail': {
@@ -276,50 +307,74 @@ class ActionEngineService:
         Raises:
             AzureServiceError: When Azure OpenAI service fails
         """
-        notifications = []
+        if len(policies) <= 1:
+            results = [self._notification_for_policy(policy, user_info, user_id) for policy in policies]
+        else:
+            # Generations are independent Azure OpenAI calls, so they run concurrently;
+            # map() keeps the results in policy order
+            generate = with_app_context(
+                functools.partial(self._notification_for_policy, user_info=user_info, user_id=user_id)
+            )
+            
+            with ThreadPoolExecutor(max_workers=min(self.notification_workers, len(policies)),
+                                    thread_name_prefix='notification-generation') as executor:
+                results = list(executor.map(generate, policies))
         
-        for policy in policies:
-            try:
-                # Skip policies that require manual review
-                if policy.get('requires_manual_review', False):
-                    logger.info(f"Skipping notification generation for policy {policy.get('policy_id')} - requires manual review")
-                    continue
-                
-                # Only generate notifications for actionable policies
-                action_type = policy.get('action_type', '').lower()
-                if action_type not in ['delete', 'memorialize', 'lock']:
-                    logger.info(f"Skipping notification generation for policy {policy.get('policy_id')} - action type '{action_type}' not supported")
-                    continue
-                
-                # Generate notification
-                notification = self._generate_notification_for_platform(policy, user_info, user_id)
-                notifications.append(notification)
-                
-            except Exception as e:
-                logger.error(f"Error generating notification for policy {policy.get('policy_id', 'unknown')}: {str(e)}")
-                
-                # Create error notification
-                error_notification = {
-                    'policy_id': policy.get('policy_id'),
-                    'platform': policy.get('platform_name', 'unknown'),
-                    'status': 'error',
-                    'error_message': str(e),
-                    'requires_manual_intervention': True,
-                    'generated_at': datetime.utcnow().isoformat()
-                }
-                notifications.append(error_notification)
-                
-                # Log the error
-                self.audit_service.create_log_entry(
-                    user_id=user_id,
-                    event_type="notification_generation_error",
-                    event_description=f"Error generating notification for {policy.get('platform_name', 'unknown')}: {str(e)}",
-                    ai_service_used="azure_openai",
-                    input_data={'policy_id': policy.get('policy_id')},
-                    status="failure"
-                )
+        return [notification for notification in results if notification is not None]
+    
+    def _notification_for_policy(self, policy: Dict[str, Any], user_info: Dict[str, Any],
+                                 user_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Generate the notification for one interpreted policy
         
-        return notifications
+        Args:
+            policy: Interpreted policy dictionary
+            user_info: Dictionary containing deceased person's information
+            user_id: ID of the user for audit logging
+            
+        Returns:
+            Notification dictionary (an error notification if generation failed),
+            or None if the policy is skipped
+        """
+        try:
+            # Skip policies that require manual review
+            if policy.get('requires_manual_review', False):
+                logger.info(f"Skipping notification generation for policy {policy.get('policy_id')} - requires manual review")
+                return None
+            
+            # Only generate notifications for actionable policies
+            action_type = policy.get('action_type', '').lower()
+            if action_type not in ['delete', 'memorialize', 'lock']:
+                logger.info(f"Skipping notification generation for policy {policy.get('policy_id')} - action type '{action_type}' not supported")
+                return None
+            
+            # Generate notification
+            return self._generate_notification_for_platform(policy, user_info, user_id)
+            
+        except Exception as e:
+            logger.error(f"Error generating notification for policy {policy.get('policy_id', 'unknown')}: {str(e)}")
+            
+            # Create error notification
+            error_notification = {
+                'policy_id': policy.get('policy_id'),
+                'platform': policy.get('platform_name', 'unknown'),
+                'status': 'error',
+                'error_message': str(e),
+                'requires_manual_intervention': True,
+                'generated_at': datetime.utcnow().isoformat()
+            }
+            
+            # Log the error
+            self.audit_service.create_log_entry(
+                user_id=user_id,
+                event_type="notification_generation_error",
+                event_description=f"Error generating notification for {policy.get('platform_name', 'unknown')}: {str(e)}",
+                ai_service_used="azure_openai",
+                input_data={'policy_id': policy.get('policy_id')},
+                status="failure"
+            )
+            
+            return error_notification
     
     def _create_policy_interpretation_prompt(self, policy: ActionPolicy, 
                                            policy_details: Dict[str, Any]) -> str:
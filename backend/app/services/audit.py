@@ -5,20 +5,46 @@ Provides hash-based tamper detection and automatic logging for database state ch
 from app import db
 from app.models.audit_log import AuditLog
 from app.services.database import DatabaseService
+from app.utils.json_provider import dumps_sorted
 from sqlalchemy import event
 from sqlalchemy.orm import Session
 from datetime import datetime
+from flask import current_app
+import atexit
 import hashlib
-import json
 import logging
-from typing import Dict, Any, Optional, List
+import queue
+import threading
+import time
+from typing import Dict, Any, Optional, List, Tuple
 import uuid
 
 logger = logging.getLogger(__name__)
 
+# (epoch second, formatted 'YYYY-MM-DDTHH:MM:SS') of the last timestamp built
+_timestamp_prefix = (None, '')
+
+def _utc_timestamp() -> str:
+    """
+    Current UTC time as an ISO 8601 string with microseconds
+    
+    Same layout as datetime.utcnow().isoformat(). The seconds part is formatted
+    once per second and reused, so most calls only format the microseconds.
+    """
+    global _timestamp_prefix
+    now_ns = time.time_ns()
+    seconds, remainder = divmod(now_ns, 1_000_000_000)
+    cached_second, prefix = _timestamp_prefix
+    if cached_second != seconds:
+        prefix = time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(seconds))
+        _timestamp_prefix = (seconds, prefix)
+    return f'{prefix}.{remainder // 1000:06d}'
+
 class AuditService:
     """Service for creating and managing tamper-proof audit logs"""
     
+    VERIFY_BATCH_SIZE = 1000  # Rows fetched per round-trip when verifying every log
+    
     @staticmethod
     def create_log_entry(user_id: str, event_type: str, event_description: str,
                         ai_service_used: Optional[str] = None,
@@ -42,10 +68,10 @@ class AuditService:
         """
         try:
             # Convert data dictionaries to JSON strings
-            input_json = json.dumps(input_data, sort_keys=True) if input_data else None
-            output_json = json.dumps(output_data, sort_keys=True) if output_data else None
+            input_json = dumps_sorted(input_data) if input_data else None
+            output_json = dumps_sorted(output_data) if output_data else None
             
-            # Create audit log entry without hash first
+            # Create audit log entry
             audit_log = AuditLog(
                 user_id=user_id,
                 event_type=event_type,
@@ -56,16 +82,10 @@ class AuditService:
                 status=status
             )
             
-            # Save to database first
+            # The before_insert listener signs the entry, so a single INSERT stores it with its hash
             if DatabaseService.safe_add(audit_log):
-                # Now generate and update the hash
-                audit_log.hash_signature = audit_log._generate_hash()
-                if DatabaseService.safe_update(audit_log, hash_signature=audit_log.hash_signature):
-                    logger.info(f"Audit log created: {event_type} for user {user_id}")
-                    return audit_log
-                else:
-                    logger.error(f"Failed to update hash for audit log: {event_type}")
-                    return audit_log  # Return anyway, hash can be generated later
+                logger.info(f"Audit log created: {event_type} for user {user_id}")
+                return audit_log
             else:
                 logger.error(f"Failed to save audit log: {event_type} for user {user_id}")
                 return None
@@ -74,6 +94,111 @@ class AuditService:
             logger.error(f"Error creating audit log entry: {str(e)}")
             return None
     
+    @staticmethod
+    def build_log_entry(user_id: str, event_type: str, event_description: str,
+                        ai_service_used: Optional[str] = None,
+                        input_data: Optional[Dict[str, Any]] = None,
+                        output_data: Optional[Dict[str, Any]] = None,
+                        status: str = 'success') -> AuditLog:
+        """
+        Build a complete audit log entry, including its hash signature, without saving it
+        
+        Args:
+            Same as create_log_entry
+            
+        Returns:
+            Unsaved AuditLog instance with log_id, timestamp and hash_signature set
+        """
+        audit_log = AuditLog(
+            log_id=str(uuid.uuid4()),
+            user_id=user_id,
+            event_type=event_type,
+            event_description=event_description,
+            ai_service_used=ai_service_used,
+            input_data=dumps_sorted(input_data) if input_data else None,
+            output_data=dumps_sorted(output_data) if output_data else None,
+            status=status,
+            timestamp=datetime.utcnow()
+        )
+        audit_log.hash_signature = audit_log._generate_hash()
+        return audit_log
+    
+    @staticmethod
+    def bulk_insert(entries: List[AuditLog]) -> bool:
+        """
+        Insert prepared audit log entries with a single multi-row INSERT
+        
+        Args:
+            entries: AuditLog instances from build_log_entry
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        if not entries:
+            return True
+        
+        columns = AuditLog.__table__.columns.keys()
+        rows = [{column: getattr(entry, column) for column in columns} for entry in entries]
+        
+        try:
+            with DatabaseService.transaction():
+                db.session.execute(AuditLog.__table__.insert(), rows)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to insert {len(entries)} audit log entries: {str(e)}")
+            return False
+    
+    @staticmethod
+    def enqueue(user_id: str, event_type: str, event_description: str,
+                ai_service_used: Optional[str] = None,
+                input_data: Optional[Dict[str, Any]] = None,
+                output_data: Optional[Dict[str, Any]] = None,
+                status: str = 'success') -> None:
+        """
+        Queue an audit log entry to be written by the background audit writer
+        
+        Like create_log_entry, failures are logged rather than raised to the caller.
+        
+        Args:
+            Same as create_log_entry
+        """
+        try:
+            entry = AuditService.build_log_entry(
+                user_id=user_id,
+                event_type=event_type,
+                event_description=event_description,
+                ai_service_used=ai_service_used,
+                input_data=input_data,
+                output_data=output_data,
+                status=status
+            )
+            get_audit_log_buffer().put(entry)
+        except Exception as e:
+            logger.error(f"Error queueing audit log entry: {str(e)}")
+    
+    @staticmethod
+    def enqueue_user_action(user_id: str, action: str, details: Dict[str, Any],
+                            status: str = 'success') -> None:
+        """
+        Buffered counterpart of log_user_action
+        
+        Args:
+            user_id: ID of the user performing the action
+            action: Action being performed
+            details: Dictionary with action details; a 'timestamp' is added if missing
+            status: Status of the action
+        """
+        if 'timestamp' not in details:
+            details = {**details, 'timestamp': _utc_timestamp()}
+        
+        AuditService.enqueue(
+            user_id=user_id,
+            event_type=f'user_action_{action}',
+            event_description=f'User performed action: {action}',
+            input_data=details,
+            status=status
+        )
+    
     @staticmethod
     def verify_log_integrity(log_id: str) -> bool:
         """
@@ -109,45 +234,106 @@ class AuditService:
             Dictionary with verification results
         """
         try:
-            # Get logs to verify
+            # Stream plain column rows in batches; entries are only read, so they
+            # are neither materialized as ORM objects nor all held in memory
+            query = db.session.query(*AuditLog.__table__.columns)
             if user_id:
-                logs = DatabaseService.get_all(AuditLog, user_id=user_id)
-            else:
-                logs = DatabaseService.get_all(AuditLog)
+                query = query.filter(AuditLog.user_id == user_id)
             
-            total_logs = len(logs)
-            valid_logs = 0
+            total_logs = 0
             invalid_logs = []
+            for row in query.yield_per(AuditService.VERIFY_BATCH_SIZE):
+                total_logs += 1
+                if not AuditLog.verify_record(row):
+                    invalid_logs.append(AuditService._tampered_log_entry(row))
             
+            return AuditService._integrity_report(total_logs, invalid_logs)
+            
+        except Exception as e:
+            logger.error(f"Error verifying logs integrity: {str(e)}")
+            return AuditService._failed_integrity_report(e)
+    
+    @staticmethod
+    def _tampered_log_entry(log) -> Dict[str, Any]:
+        """Summary of a log entry (AuditLog or column row) that failed integrity verification"""
+        return {
+            'log_id': log.log_id,
+            'event_type': log.event_type,
+            'timestamp': log.timestamp.isoformat() if log.timestamp else None,
+            'user_id': log.user_id
+        }
+    
+    @staticmethod
+    def _integrity_report(total_logs: int, invalid_logs: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Build the integrity report for total_logs checked entries"""
+        valid_logs = total_logs - len(invalid_logs)
+        return {
+            'total_logs': total_logs,
+            'valid_logs': valid_logs,
+            'invalid_logs': len(invalid_logs),
+            'integrity_percentage': (valid_logs / total_logs * 100) if total_logs > 0 else 100,
+            'tampered_logs': invalid_logs
+        }
+    
+    @staticmethod
+    def _failed_integrity_report(error: Exception) -> Dict[str, Any]:
+        """Integrity report returned when verification could not run"""
+        return {
+            'total_logs': 0,
+            'valid_logs': 0,
+            'invalid_logs': 0,
+            'integrity_percentage': 0,
+            'tampered_logs': [],
+            'error': str(error)
+        }
+    
+    @staticmethod
+    def get_audit_trail_with_integrity(user_id: str, event_type: Optional[str] = None,
+                                       start_date: Optional[datetime] = None,
+                                       end_date: Optional[datetime] = None) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Get a user's filtered audit trail together with the integrity report for all their logs
+        
+        Same results as get_audit_trail plus verify_all_logs_integrity(user_id), but the
+        user's logs are loaded with one query and each hash is verified once.
+        
+        Args:
+            user_id: ID of the user to get audit trail for
+            event_type: Optional event type filter for the trail
+            start_date: Optional start date filter for the trail
+            end_date: Optional end date filter for the trail
+            
+        Returns:
+            Tuple of (audit trail entries as dictionaries, integrity report)
+        """
+        try:
+            # Most recent first, as in get_audit_trail
+            logs = AuditLog.query.filter(AuditLog.user_id == user_id).order_by(AuditLog.timestamp.desc()).all()
+            
+            audit_trail = []
+            invalid_logs = []
             for log in logs:
-                if log.verify_integrity():
-                    valid_logs += 1
-                else:
-                    invalid_logs.append({
-                        'log_id': log.log_id,
-                        'event_type': log.event_type,
-                        'timestamp': log.timestamp.isoformat() if log.timestamp else None,
-                        'user_id': log.user_id
-                    })
+                intact = log.verify_integrity()
+                if not intact:
+                    invalid_logs.append(AuditService._tampered_log_entry(log))
+                
+                # The report covers every log; the trail only the filtered ones
+                if event_type and log.event_type != event_type:
+                    continue
+                if start_date and log.timestamp < start_date:
+                    continue
+                if end_date and log.timestamp > end_date:
+                    continue
+                
+                log_dict = log.to_dict()
+                log_dict['integrity_verified'] = intact
+                audit_trail.append(log_dict)
             
-            return {
-                'total_logs': total_logs,
-                'valid_logs': valid_logs,
-                'invalid_logs': len(invalid_logs),
-                'integrity_percentage': (valid_logs / total_logs * 100) if total_logs > 0 else 100,
-                'tampered_logs': invalid_logs
-            }
+            return audit_trail, AuditService._integrity_report(len(logs), invalid_logs)
             
         except Exception as e:
-            logger.error(f"Error verifying logs integrity: {str(e)}")
-            return {
-                'total_logs': 0,
-                'valid_logs': 0,
-                'invalid_logs': 0,
-                'integrity_percentage': 0,
-                'tampered_logs': [],
-                'error': str(e)
-            }
+            logger.error(f"Error getting audit trail with integrity: {str(e)}")
+            return [], AuditService._failed_integrity_report(e)
     
     @staticmethod
     def get_audit_trail(user_id: str, event_type: Optional[str] = None,
@@ -203,12 +389,15 @@ class AuditService:
         Args:
             user_id: ID of the user performing the action
             action: Action being performed
-            details: Dictionary with action details
+            details: Dictionary with action details; a 'timestamp' is added if missing
             status: Status of the action
             
         Returns:
             Created AuditLog instance or None
         """
+        if 'timestamp' not in details:
+            details = {**details, 'timestamp': _utc_timestamp()}
+        
         return AuditService.create_log_entry(
             user_id=user_id,
             event_type=f'user_action_{action}',
@@ -245,6 +434,49 @@ class AuditService:
             status=status
         )
     
+    @staticmethod
+    def build_ai_service_call_entry(user_id: str, service_name: str, operation: str,
+                                    input_data: Dict[str, Any], output_data: Dict[str, Any],
+                                    status: str = 'success') -> AuditLog:
+        """
+        Build the entry log_ai_service_call would write, without saving it, for bulk_insert
+        
+        Args:
+            Same as log_ai_service_call
+            
+        Returns:
+            Unsaved AuditLog instance with log_id, timestamp and hash_signature set
+        """
+        return AuditService.build_log_entry(
+            user_id=user_id,
+            event_type=f'ai_service_{operation}',
+            event_description=f'AI service call: {service_name} - {operation}',
+            ai_service_used=service_name,
+            input_data=input_data,
+            output_data=output_data,
+            status=status
+        )
+    
+    @staticmethod
+    def enqueue_ai_service_call(user_id: str, service_name: str, operation: str,
+                                input_data: Dict[str, Any], output_data: Dict[str, Any],
+                                status: str = 'success') -> None:
+        """
+        Buffered counterpart of log_ai_service_call
+        
+        Args:
+            Same as log_ai_service_call
+        """
+        AuditService.enqueue(
+            user_id=user_id,
+            event_type=f'ai_service_{operation}',
+            event_description=f'AI service call: {service_name} - {operation}',
+            ai_service_used=service_name,
+            input_data=input_data,
+            output_data=output_data,
+            status=status
+        )
+    
     @staticmethod
     def log_database_change(user_id: str, table_name: str, operation: str,
                            record_id: str, changes: Dict[str, Any]) -> Optional[AuditLog]:
@@ -274,6 +506,81 @@ class AuditService:
             status='success'
         )
 
+class AuditLogBuffer:
+    """
+    Collects audit log entries in memory and writes them from a background thread
+    with multi-row INSERTs, keeping audit writes off the request path
+    """
+    
+    FLUSH_INTERVAL = 0.2  # seconds between flushes
+    MAX_BATCH_SIZE = 500
+    
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+        atexit.register(self.drain)
+    
+    def put(self, entry: AuditLog) -> None:
+        """Queue an entry built by AuditService.build_log_entry"""
+        self._ensure_worker()
+        self._queue.put((current_app._get_current_object(), entry))
+    
+    def _ensure_worker(self) -> None:
+        """Start the writer thread on first use (after any worker fork)"""
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+                self._worker.start()
+    
+    def _take_batch(self, first_item) -> List:
+        """Collect up to MAX_BATCH_SIZE queued items, starting with first_item"""
+        batch = [first_item]
+        while len(batch) < self.MAX_BATCH_SIZE:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+    
+    def _run(self) -> None:
+        """Write queued entries every FLUSH_INTERVAL"""
+        while True:
+            batch = self._take_batch(self._queue.get())
+            self._write(batch)
+            time.sleep(self.FLUSH_INTERVAL)
+    
+    def _write(self, batch: List) -> None:
+        """Insert one batch, grouped by the application that queued it"""
+        by_app = {}
+        for app, entry in batch:
+            by_app.setdefault(app, []).append(entry)
+        
+        for app, entries in by_app.items():
+            with app.app_context():
+                AuditService.bulk_insert(entries)
+    
+    def drain(self) -> None:
+        """Write everything still queued; called at interpreter shutdown"""
+        while True:
+            try:
+                first_item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            self._write(self._take_batch(first_item))
+
+# Global audit buffer instance
+_audit_log_buffer = None
+
+def get_audit_log_buffer() -> AuditLogBuffer:
+    """Get or create the global audit log buffer"""
+    global _audit_log_buffer
+    if _audit_log_buffer is None:
+        _audit_log_buffer = AuditLogBuffer()
+    return _audit_log_buffer
+
 # Database event listeners for automatic logging
 class DatabaseChangeLogger:
     """Automatic logging of database state changes using SQLAlchemy events"""
@@ -0,0 +1,148 @@
+"""
+Background Task Runner - Runs slow work started by API requests off the request thread
+Tasks run on a thread pool inside an application context and their status can be polled by id
+"""
+from flask import current_app
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+import json
+import logging
+import os
+import threading
+import uuid
+
+from app import db
+from app.models.background_task import BackgroundTask
+from app.services.database import DatabaseService
+
+logger = logging.getLogger(__name__)
+
+class BackgroundTaskRunner:
+    """
+    Runs callables on a dedicated thread pool and tracks their state by task id
+    
+    Status is stored in the background_tasks table, so a task can be polled from
+    any worker process and its record survives a worker restart. Finished tasks
+    are pruned after RETENTION.
+    """
+    
+    RETENTION = timedelta(days=int(os.environ.get('BACKGROUND_TASK_RETENTION_DAYS', '7')))
+    
+    def __init__(self, name: str, max_workers: int):
+        """
+        Initialize the runner
+        
+        Args:
+            name: Prefix for the pool's thread names, also recorded with each task
+            max_workers: Number of tasks that run at the same time
+        """
+        self.name = name
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+    
+    def submit(self, func: Callable, *args, owner: Optional[str] = None, **kwargs) -> str:
+        """
+        Queue func(*args, **kwargs) to run in the current application's context
+        
+        Args:
+            func: Callable to run; its result must be JSON serializable
+            owner: ID of the account that submitted the task; only it can read the status
+        
+        Returns:
+            Task ID for get_status
+        """
+        task_id = str(uuid.uuid4())
+        app = current_app._get_current_object()
+        now = datetime.utcnow()
+        
+        # Recorded before the task is queued, so its first update finds the row
+        with DatabaseService.transaction():
+            db.session.add(BackgroundTask(
+                task_id=task_id, runner=self.name, owner_id=owner,
+                state='queued', submitted_at=now
+            ))
+            BackgroundTask.query.filter(
+                BackgroundTask.submitted_at < now - self.RETENTION,
+                BackgroundTask.state.in_(('success', 'failure'))
+            ).delete(synchronize_session=False)
+        
+        with self._lock:
+            # Created on first use, so the pool's threads start after any worker fork
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix=self.name)
+            executor = self._executor
+        
+        executor.submit(self._run, app, task_id, func, args, kwargs)
+        return task_id
+    
+    def get_status(self, task_id: str, owner: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Get the state of a task
+        
+        Args:
+            task_id: ID returned by submit
+            owner: ID of the account asking; must match the owner given to submit
+        
+        Returns:
+            Dictionary with the task's status ('queued', 'running', 'success' or 'failure'),
+            or None if the task is unknown or belongs to someone else
+        """
+        task = BackgroundTask.query.filter_by(task_id=task_id, owner_id=owner).first()
+        return task.to_dict() if task else None
+    
+    def _update(self, task_id: str, **fields) -> None:
+        """Update a task's stored status fields"""
+        try:
+            with DatabaseService.transaction():
+                BackgroundTask.query.filter_by(task_id=task_id).update(
+                    fields, synchronize_session=False
+                )
+        except Exception:
+            logger.exception('Failed to record state of background task %s', task_id)
+    
+    def _run(self, app, task_id: str, func: Callable, args: tuple, kwargs: dict) -> None:
+        """Run one task and record its outcome"""
+        with app.app_context():
+            self._update(task_id, state='running')
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                logger.exception('Background task %s failed', task_id)
+                db.session.rollback()
+                self._update(task_id, state='failure', error=str(e),
+                             finished_at=datetime.utcnow())
+                return
+            
+            self._update(task_id, state='success', result=json.dumps(result, default=str),
+                         finished_at=datetime.utcnow())
+
+# Global runners: policy execution waits on Azure OpenAI, contact
+# verification on the identity document provider
+_policy_task_runner = None
+_contact_verification_runner = None
+_runners_lock = threading.Lock()
+
+def get_policy_task_runner() -> BackgroundTaskRunner:
+    """Get or create the global policy execution task runner"""
+    global _policy_task_runner
+    if _policy_task_runner is None:
+        with _runners_lock:
+            if _policy_task_runner is None:
+                _policy_task_runner = BackgroundTaskRunner(
+                    'policy-execution', int(os.environ.get('POLICY_EXECUTION_WORKERS', '2'))
+                )
+    return _policy_task_runner
+
+def get_contact_verification_runner() -> BackgroundTaskRunner:
+    """Get or create the global trusted contact verification task runner"""
+    global _contact_verification_runner
+    if _contact_verification_runner is None:
+        with _runners_lock:
+            if _contact_verification_runner is None:
+                _contact_verification_runner = BackgroundTaskRunner(
+                    'contact-verification', int(os.environ.get('CONTACT_VERIFICATION_WORKERS', '2'))
+                )
+    return _contact_verification_runner
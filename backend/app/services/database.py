@@ -3,7 +3,7 @@ Database service for connection and session management
 Provides centralized database operations and transaction handling
 """
 from app import db
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from contextlib import contextmanager
 from typing import Any, Optional
 import logging
@@ -56,6 +56,52 @@ class DatabaseService:
             logger.error(f"Failed to add model instance: {str(e)}")
             return False
     
+    @staticmethod
+    def add_unique(model_instance: Any) -> Optional[bool]:
+        """
+        Insert a model instance whose uniqueness is enforced by a unique index
+        
+        The INSERT itself is the duplicate check, so no SELECT is needed first
+        and concurrent requests cannot both insert the same row.
+        
+        Args:
+            model_instance: SQLAlchemy model instance to add
+            
+        Returns:
+            True if inserted, False if a unique index rejected the row, None on other failures
+        """
+        try:
+            db.session.add(model_instance)
+            db.session.commit()
+            return True
+        except IntegrityError as e:
+            db.session.rollback()
+            if DatabaseService.is_unique_violation(e):
+                return False
+            # NOT NULL and foreign key violations are not duplicates
+            logger.error(f"Failed to add model instance: {str(e)}")
+            return None
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Failed to add model instance: {str(e)}")
+            return None
+    
+    @staticmethod
+    def is_unique_violation(error: IntegrityError) -> bool:
+        """
+        Check whether an IntegrityError comes from a unique constraint or index
+        
+        Args:
+            error: IntegrityError raised by a flush or commit
+            
+        Returns:
+            True for unique violations, False for other integrity errors
+        """
+        # PostgreSQL reports SQLSTATE 23505; SQLite only has the message
+        if getattr(error.orig, 'pgcode', None) == '23505':
+            return True
+        return 'unique constraint' in str(error.orig).lower()
+    
     @staticmethod
     def safe_update(model_instance: Any, **kwargs) -> bool:
         """
@@ -110,9 +156,9 @@ class DatabaseService:
             Model instance or None if not found
         """
         try:
-            # Determine the primary key column name
-            primary_key = model_class.__table__.primary_key.columns.keys()[0]
-            return model_class.query.filter(getattr(model_class, primary_key) == record_id).first()
+            # Session.get checks the identity map first, so repeated lookups
+            # within a request don't issue another SELECT
+            return db.session.get(model_class, record_id)
         except Exception as e:
             logger.error(f"Failed to get record by ID: {str(e)}")
             return None
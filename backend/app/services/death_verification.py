@@ -5,12 +5,16 @@ Integrates with Azure AI Vision for OCR and document analysis
 import os
 import re
 import json
+import time
+import hashlib
 import logging
+import functools
+import threading
+from collections import OrderedDict
 from datetime import datetime, date
 from typing import Dict, Optional, Tuple, Any
 from difflib import SequenceMatcher
 
-from azure.ai.vision.imageanalysis import ImageAnalysisClient
 from azure.core.credentials import AzureKeyCredential
 from azure.core.exceptions import AzureError
 
@@ -22,6 +26,88 @@ from app.services.error_handling import DeathVerificationErrorHandler
 
 logger = logging.getLogger(__name__)
 
+# The Azure AI Vision SDK is loaded on first use to keep app start-up fast
+ImageAnalysisClient = None
+
+def _load_vision_client_class():
+    """Import and return the ImageAnalysisClient class"""
+    global ImageAnalysisClient
+    if ImageAnalysisClient is None:
+        from azure.ai.vision.imageanalysis import ImageAnalysisClient as client_class
+        ImageAnalysisClient = client_class
+    return ImageAnalysisClient
+
+@functools.lru_cache(maxsize=1)
+def get_vision_client(endpoint: str, key: str):
+    """
+    Return a shared Azure AI Vision client so its HTTP connection pool is reused
+    
+    Args:
+        endpoint: Azure AI Vision endpoint URL
+        key: Azure AI Vision API key
+        
+    Returns:
+        ImageAnalysisClient instance
+    """
+    return _load_vision_client_class()(
+        endpoint=endpoint,
+        credential=AzureKeyCredential(key)
+    )
+
+class OcrTextCache:
+    """
+    In-process cache of OCR text keyed by the SHA-256 of the certificate bytes
+    
+    Re-uploads of the same certificate (retries, another trusted contact, manual
+    re-verification) reuse the extracted text instead of calling Azure AI Vision again.
+    """
+    
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        """
+        Initialize the cache
+        
+        Args:
+            max_entries: Number of certificates kept; the least recently used are evicted
+            ttl_seconds: How long extracted text is reused
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def key_for(image_data: bytes) -> str:
+        """Cache key for a certificate's bytes"""
+        return hashlib.sha256(image_data).hexdigest()
+    
+    def get(self, key: str) -> Optional[str]:
+        """Get cached text, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            
+            expires_at, text = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            
+            self._entries.move_to_end(key)
+            return text
+    
+    def put(self, key: str, text: str) -> None:
+        """Store extracted text for a certificate"""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, text)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+_ocr_text_cache = OcrTextCache(
+    max_entries=int(os.getenv('OCR_CACHE_MAX_ENTRIES', '256')),
+    ttl_seconds=int(os.getenv('OCR_CACHE_TTL_SECONDS', '86400'))
+)
+
 class DeathVerificationService:
     """Service for processing death certificates using Azure AI Vision"""
     
@@ -34,10 +120,7 @@ class DeathVerificationService:
             raise ValueError("Azure Vision endpoint and key must be configured in environment variables")
         
         try:
-            self.client = ImageAnalysisClient(
-                endpoint=self.endpoint,
-                credential=AzureKeyCredential(self.key)
-            )
+            self.client = get_vision_client(self.endpoint, self.key)
         except Exception as e:
             logger.error(f"Failed to initialize Azure AI Vision client: {str(e)}")
             raise
@@ -57,7 +140,7 @@ class DeathVerificationService:
         """
         try:
             # Log the verification attempt
-            self.audit_service.create_log_entry(
+            self.audit_service.enqueue(
                 user_id=user_id,
                 event_type="death_certificate_processing_started",
                 event_description="Started processing death certificate with Azure AI Vision",
@@ -91,7 +174,7 @@ class DeathVerificationService:
             }
             
             # Log the processing result
-            self.audit_service.create_log_entry(
+            self.audit_service.enqueue(
                 user_id=user_id,
                 event_type="death_certificate_processing_completed",
                 event_description=f"Death certificate processing completed with status: {result['status']}",
@@ -107,7 +190,7 @@ class DeathVerificationService:
             error_msg = f"Azure service resilience error: {str(e)}"
             logger.error(error_msg)
             
-            self.audit_service.create_log_entry(
+            self.audit_service.enqueue(
                 user_id=user_id,
                 event_type="death_certificate_processing_failed",
                 event_description=error_msg,
@@ -126,7 +209,7 @@ class DeathVerificationService:
             error_msg = f"Azure AI Vision service error: {str(e)}"
             logger.error(error_msg)
             
-            self.audit_service.create_log_entry(
+            self.audit_service.enqueue(
                 user_id=user_id,
                 event_type="death_certificate_processing_failed",
                 event_description=error_msg,
@@ -143,7 +226,7 @@ class DeathVerificationService:
             error_msg = f"Unexpected error processing death certificate: {str(e)}"
             logger.error(error_msg)
             
-            self.audit_service.create_log_entry(
+            self.audit_service.enqueue(
                 user_id=user_id,
                 event_type="death_certificate_processing_failed",
                 event_description=error_msg,
@@ -207,7 +290,7 @@ class DeathVerificationService:
                 success = self._update_user_status_to_deceased(user_profile)
                 
                 if success:
-                    self.audit_service.create_log_entry(
+                    self.audit_service.enqueue(
                         user_id=user_id,
                         event_type="death_event_verified",
                         event_description=f"Death event verified for user {user_profile.full_name}. Status updated to deceased.",
@@ -228,7 +311,7 @@ class DeathVerificationService:
                         'verification_details': verification_details
                     }
             else:
-                self.audit_service.create_log_entry(
+                self.audit_service.enqueue(
                     user_id=user_id,
                     event_type="death_verification_failed",
                     event_description="Death verification failed - name or date mismatch",
@@ -247,7 +330,7 @@ class DeathVerificationService:
             error_msg = f"Error during death event verification: {str(e)}"
             logger.error(error_msg)
             
-            self.audit_service.create_log_entry(
+            self.audit_service.enqueue(
                 user_id=user_id,
                 event_type="death_verification_error",
                 event_description=error_msg,
@@ -264,6 +347,9 @@ class DeathVerificationService:
         """
         Extract text from image using Azure AI Vision OCR with retry logic
         
+        Text extracted from the same bytes is reused from the OCR cache; empty
+        results (service unavailable) are not cached.
+        
         Args:
             image_data: Binary image data
             
@@ -287,8 +373,13 @@ class DeathVerificationService:
             
             return extracted_text.strip()
         
+        cache_key = OcrTextCache.key_for(image_data)
+        cached_text = _ocr_text_cache.get(cache_key)
+        if cached_text is not None:
+            return cached_text
+        
         try:
-            return _perform_ocr(image_data)
+            extracted_text = _perform_ocr(image_data)
         except AzureServiceError as e:
             logger.error(f"Azure Vision service error with resilience handling: {str(e)}")
             # Provide graceful degradation - return empty string to trigger manual review
@@ -296,6 +387,10 @@ class DeathVerificationService:
         except Exception as e:
             logger.error(f"Failed to extract text from image: {str(e)}")
             raise
+        
+        if extracted_text:
+            _ocr_text_cache.put(cache_key, extracted_text)
+        return extracted_text
     
     def _parse_death_certificate(self, text: str) -> Dict[str, Any]:
         """
@@ -579,7 +674,7 @@ class DeathVerificationService:
             
             if success:
                 # Log the status change
-                self.audit_service.create_log_entry(
+                self.audit_service.enqueue(
                     user_id=user_profile.user_id,
                     event_type="user_status_updated",
                     event_description=f"User status updated to 'deceased' for {user_profile.full_name}",
@@ -588,7 +683,7 @@ class DeathVerificationService:
                 )
                 
                 # Log asset freezing (conceptual - actual freezing would be implemented in asset management)
-                self.audit_service.create_log_entry(
+                self.audit_service.enqueue(
                     user_id=user_profile.user_id,
                     event_type="digital_assets_frozen",
                     event_description="All digital assets have been frozen due to verified death event",
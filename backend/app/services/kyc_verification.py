@@ -3,13 +3,99 @@ KYC (Know Your Customer) Verification Service
 Handles identity verification using Aadhaar, PAN, and other Indian identity documents
 """
 import re
+import hashlib
+import hmac
+import logging
+import queue
+import threading
+import time
 import requests
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional, Tuple
+from typing import Dict, Any, List, Optional, Tuple
+from flask import current_app
+from app import db
+from app.models.otp_code import OtpCode
+from app.models.trusted_contact import TrustedContact
 from app.services.audit import AuditService
+from app.services.database import DatabaseService
 import random
 import string
 
+logger = logging.getLogger(__name__)
+
+class OtpDispatcher:
+    """
+    Coalesces outgoing OTP messages and delivers them in batches on a background
+    thread, so handlers don't wait on SMS/email gateways
+    """
+    
+    FLUSH_INTERVAL = 0.05  # seconds to wait for more messages before flushing
+    MAX_BATCH_SIZE = 100
+    
+    def __init__(self):
+        self._queue = queue.Queue(maxsize=10000)
+        self._lock = threading.Lock()
+        self._worker = None
+    
+    def enqueue(self, otp_type: str, destination: str, otp: str) -> None:
+        """
+        Queue an OTP message for the next batch
+        
+        Args:
+            otp_type: 'phone' or 'email'
+            destination: Mobile number or email address
+            otp: 6-digit OTP code
+        """
+        self._ensure_worker()
+        self._queue.put((current_app._get_current_object(), otp_type, destination, otp))
+    
+    def _ensure_worker(self) -> None:
+        """Start the drain thread on first use (after any worker fork)"""
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name='otp-dispatcher', daemon=True)
+                self._worker.start()
+    
+    def _run(self) -> None:
+        """Drain the queue, flushing every FLUSH_INTERVAL or MAX_BATCH_SIZE messages"""
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.FLUSH_INTERVAL
+            while len(batch) < self.MAX_BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._flush(batch)
+    
+    def _flush(self, batch: List[Tuple]) -> None:
+        """Deliver one batch, grouped by the application that queued it"""
+        by_app = {}
+        for app, otp_type, destination, otp in batch:
+            by_app.setdefault(app, []).append((otp_type, destination, otp))
+        
+        for app, messages in by_app.items():
+            try:
+                with app.app_context():
+                    KYCVerificationService.send_otp_batch(messages)
+            except Exception:
+                logger.exception('Failed to deliver OTP batch')
+
+# Global dispatcher instance
+_otp_dispatcher = None
+
+def get_otp_dispatcher() -> OtpDispatcher:
+    """Get or create the global OTP dispatcher"""
+    global _otp_dispatcher
+    if _otp_dispatcher is None:
+        _otp_dispatcher = OtpDispatcher()
+    return _otp_dispatcher
+
 class KYCVerificationService:
     """Service for handling KYC verification processes"""
     
@@ -19,6 +105,50 @@ class KYCVerificationService:
     PHONE_PATTERN = re.compile(r'^[6-9]\d{9}$')  # Indian mobile numbers
     PINCODE_PATTERN = re.compile(r'^[1-9][0-9]{5}$')
     
+    # All four identity fields of a well-formed submission, joined with NUL separators,
+    # checked in a single match before falling back to per-field validation for errors
+    KYC_RECORD_PATTERN = re.compile(
+        r'[2-9][0-9]{11}\x00[A-Z]{5}[0-9]{4}[A-Z]\x00[6-9][0-9]{9}\x00[1-9][0-9]{5}'
+    )
+    
+    # Free-text fields every KYC submission must fill in, with their error messages
+    REQUIRED_FIELD_ERRORS = {
+        field: f"{field.replace('_', ' ').title()} is required"
+        for field in ('full_name', 'date_of_birth', 'address_line1', 'city', 'state', 'email')
+    }
+    
+    # Separator cleanup patterns
+    AADHAAR_CLEAN_PATTERN = re.compile(r'[\s-]')
+    PHONE_CLEAN_PATTERN = re.compile(r'[\s\-\+]')
+    
+    # Verhoeff algorithm tables for Aadhaar checksum validation
+    VERHOEFF_MULTIPLICATION = (
+        (0, 1, 2, 3, 4, 5, 6, 7, 8, 9),
+        (1, 2, 3, 4, 0, 6, 7, 8, 9, 5),
+        (2, 3, 4, 0, 1, 7, 8, 9, 5, 6),
+        (3, 4, 0, 1, 2, 8, 9, 5, 6, 7),
+        (4, 0, 1, 2, 3, 9, 5, 6, 7, 8),
+        (5, 9, 8, 7, 6, 0, 4, 3, 2, 1),
+        (6, 5, 9, 8, 7, 1, 0, 4, 3, 2),
+        (7, 6, 5, 9, 8, 2, 1, 0, 4, 3),
+        (8, 7, 6, 5, 9, 3, 2, 1, 0, 4),
+        (9, 8, 7, 6, 5, 4, 3, 2, 1, 0)
+    )
+    VERHOEFF_PERMUTATION = (
+        (0, 1, 2, 3, 4, 5, 6, 7, 8, 9),
+        (1, 5, 7, 6, 2, 8, 3, 0, 9, 4),
+        (5, 8, 0, 3, 7, 9, 6, 1, 4, 2),
+        (8, 9, 1, 6, 0, 4, 3, 5, 2, 7),
+        (9, 4, 5, 3, 1, 2, 6, 8, 7, 0),
+        (4, 2, 8, 6, 5, 7, 3, 9, 0, 1),
+        (2, 7, 9, 3, 8, 0, 6, 4, 1, 5),
+        (7, 0, 4, 6, 9, 1, 3, 2, 5, 8)
+    )
+    
+    # OTP validity window in seconds
+    OTP_TTL_SECONDS = 600
+    MAX_OTP_ATTEMPTS = 5  # Codes that may be checked against one OTP before it is discarded
+    
     @staticmethod
     def validate_aadhaar(aadhaar_number: str) -> Tuple[bool, str]:
         """
@@ -34,7 +164,7 @@ class KYCVerificationService:
             return False, "Aadhaar number is required"
         
         # Remove spaces and hyphens
-        aadhaar_clean = re.sub(r'[\s-]', '', aadhaar_number)
+        aadhaar_clean = KYCVerificationService.AADHAAR_CLEAN_PATTERN.sub('', aadhaar_number)
         
         if len(aadhaar_clean) != 12:
             return False, "Aadhaar number must be 12 digits"
@@ -56,36 +186,11 @@ class KYCVerificationService:
         """
         Verify Aadhaar checksum using Verhoeff algorithm
         """
-        # Verhoeff algorithm tables
-        multiplication_table = [
-            [0, 1, 2, 3, 4, 5, 6, 7, 8, 9],
-            [1, 2, 3, 4, 0, 6, 7, 8, 9, 5],
-            [2, 3, 4, 0, 1, 7, 8, 9, 5, 6],
-            [3, 4, 0, 1, 2, 8, 9, 5, 6, 7],
-            [4, 0, 1, 2, 3, 9, 5, 6, 7, 8],
-            [5, 9, 8, 7, 6, 0, 4, 3, 2, 1],
-            [6, 5, 9, 8, 7, 1, 0, 4, 3, 2],
-            [7, 6, 5, 9, 8, 2, 1, 0, 4, 3],
-            [8, 7, 6, 5, 9, 3, 2, 1, 0, 4],
-            [9, 8, 7, 6, 5, 4, 3, 2, 1, 0]
-        ]
-        
-        permutation_table = [
-            [0, 1, 2, 3, 4, 5, 6, 7, 8, 9],
-            [1, 5, 7, 6, 2, 8, 3, 0, 9, 4],
-            [5, 8, 0, 3, 7, 9, 6, 1, 4, 2],
-            [8, 9, 1, 6, 0, 4, 3, 5, 2, 7],
-            [9, 4, 5, 3, 1, 2, 6, 8, 7, 0],
-            [4, 2, 8, 6, 5, 7, 3, 9, 0, 1],
-            [2, 7, 9, 3, 8, 0, 6, 4, 1, 5],
-            [7, 0, 4, 6, 9, 1, 3, 2, 5, 8]
-        ]
-        
-        inverse_table = [0, 4, 3, 2, 1, 5, 6, 7, 8, 9]
-        
         check = 0
         for i, digit in enumerate(reversed(aadhaar)):
-            check = multiplication_table[check][permutation_table[i % 8][int(digit)]]
+            check = KYCVerificationService.VERHOEFF_MULTIPLICATION[check][
+                KYCVerificationService.VERHOEFF_PERMUTATION[i % 8][int(digit)]
+            ]
         
         return check == 0
     
@@ -127,7 +232,7 @@ class KYCVerificationService:
         if not phone_number:
             return False, "Phone number is required"
         
-        phone_clean = re.sub(r'[\s\-\+]', '', phone_number)
+        phone_clean = KYCVerificationService.PHONE_CLEAN_PATTERN.sub('', phone_number)
         
         # Remove country code if present
         if phone_clean.startswith('91') and len(phone_clean) == 12:
@@ -236,6 +341,153 @@ class KYCVerificationService:
             print(f"Failed to send email OTP: {str(e)}")
             return False
     
+    @staticmethod
+    def verify_contact_identity(user_id: str, contact_id: str, aadhaar: str, pan: str, name: str) -> Dict[str, Any]:
+        """
+        Verify a saved trusted contact's identity documents and store the result on the contact
+        
+        Runs on the contact verification task runner, off the request path.
+        
+        Args:
+            user_id: ID of the user who owns the contact
+            contact_id: ID of the trusted contact to update with the result
+            aadhaar: Contact's Aadhaar number
+            pan: Contact's PAN number
+            name: Contact's full name
+            
+        Returns:
+            Verification status and score
+        """
+        result = KYCVerificationService.verify_identity_documents(aadhaar, pan, name, None)
+        
+        db.session.query(TrustedContact).filter_by(contact_id=contact_id).update({
+            'identity_verification_score': str(result['verification_score']),
+            'identity_documents_verified': 'verified' if result['status'] == 'verified' else 'pending'
+        }, synchronize_session=False)
+        db.session.commit()
+        
+        AuditService.enqueue_user_action(
+            user_id=user_id,
+            action='trusted_contact_identity_verified',
+            details={
+                'contact_id': contact_id,
+                'identity_verification_score': result['verification_score'],
+                'status': result['status']
+            }
+        )
+        
+        return {'status': result['status'], 'verification_score': result['verification_score']}
+    
+    @staticmethod
+    def _hash_otp(user_id: str, otp_type: str, otp: str) -> str:
+        """
+        Hash an OTP so the plain code is never stored
+        
+        Keyed with the app's SECRET_KEY and bound to the user and OTP type, so a
+        lookup table of all 10^6 codes can't reverse stored hashes.
+        """
+        message = f'{user_id}:{otp_type}:{otp}'.encode('utf-8')
+        return hmac.new(current_app.config['SECRET_KEY'].encode('utf-8'), message, hashlib.sha256).hexdigest()
+    
+    @staticmethod
+    def store_otp(user_id: str, otp_type: str, otp: str) -> None:
+        """
+        Store a hashed OTP server-side, replacing any pending code of the same type
+        
+        Args:
+            user_id: User the OTP was issued to
+            otp_type: 'phone' or 'email'
+            otp: 6-digit OTP code
+        """
+        with DatabaseService.transaction():
+            db.session.merge(OtpCode(
+                user_id=user_id,
+                otp_type=otp_type,
+                otp_hash=KYCVerificationService._hash_otp(user_id, otp_type, otp),
+                expires_at=datetime.utcnow() + timedelta(seconds=KYCVerificationService.OTP_TTL_SECONDS),
+                attempts=0
+            ))
+    
+    @staticmethod
+    def check_otp(user_id: str, otp_type: str, otp: str) -> str:
+        """
+        Check a submitted OTP against the stored hash
+        Expired, locked and successfully verified codes are removed
+        
+        Each code can be checked at most MAX_OTP_ATTEMPTS times. The attempt is
+        counted with a conditional UPDATE before comparing, so concurrent guesses
+        can't exceed the limit either.
+        
+        Args:
+            user_id: User the OTP was issued to
+            otp_type: 'phone' or 'email'
+            otp: Submitted 6-digit OTP code
+            
+        Returns:
+            'valid', 'invalid', 'expired', 'locked' or 'missing'
+        """
+        record = OtpCode.query.filter_by(user_id=user_id, otp_type=otp_type).first()
+        if not record:
+            return 'missing'
+        
+        if record.is_expired():
+            DatabaseService.safe_delete(record)
+            return 'expired'
+        
+        # Read before the commit below expires the instance: a concurrent check
+        # may delete the row, and reloading it would then fail
+        otp_hash = record.otp_hash
+        
+        with DatabaseService.transaction():
+            counted = db.session.query(OtpCode).filter(
+                OtpCode.user_id == user_id,
+                OtpCode.otp_type == otp_type,
+                OtpCode.attempts < KYCVerificationService.MAX_OTP_ATTEMPTS
+            ).update({OtpCode.attempts: OtpCode.attempts + 1}, synchronize_session=False)
+        
+        if not counted:
+            # Attempts used up: the code can no longer be verified
+            DatabaseService.safe_delete(record)
+            return 'locked'
+        
+        if not hmac.compare_digest(otp_hash, KYCVerificationService._hash_otp(user_id, otp_type, otp)):
+            return 'invalid'
+        
+        DatabaseService.safe_delete(record)
+        return 'valid'
+    
+    @staticmethod
+    def dispatch_otp(otp_type: str, destination: str, otp: str) -> None:
+        """
+        Queue an OTP for batched delivery on a background thread
+        
+        Args:
+            otp_type: 'phone' or 'email'
+            destination: Mobile number or email address
+            otp: 6-digit OTP code
+        """
+        get_otp_dispatcher().enqueue(otp_type, destination, otp)
+    
+    @staticmethod
+    def send_otp_batch(messages: List[Tuple[str, str, str]]) -> List[bool]:
+        """
+        Send a batch of OTP messages (mock implementation)
+        In production, post each channel's messages to the gateway's batch endpoint
+        
+        Args:
+            messages: List of (otp_type, destination, otp) tuples
+            
+        Returns:
+            List of send results in the same order as messages
+        """
+        results = []
+        for otp_type, destination, otp in messages:
+            if otp_type == 'phone':
+                results.append(KYCVerificationService.send_otp_sms(destination, otp))
+            else:
+                results.append(KYCVerificationService.send_otp_email(destination, otp))
+        return results
+    
     @staticmethod
     def verify_identity_documents(aadhaar: str, pan: str, name: str, dob: str) -> Dict[str, Any]:
         """
@@ -299,6 +551,27 @@ class KYCVerificationService:
                 'timestamp': datetime.utcnow().isoformat()
             }
     
+    @staticmethod
+    def _matches_kyc_record(kyc_data: Dict[str, Any]) -> bool:
+        """
+        Check Aadhaar, PAN, phone and pincode together with a single regex match
+        
+        Applies the same cleanup as the individual validators. Returns False for any
+        malformed field, in which case the per-field validators report the errors.
+        """
+        aadhaar = KYCVerificationService.AADHAAR_CLEAN_PATTERN.sub('', kyc_data.get('aadhaar_number') or '')
+        phone = KYCVerificationService.PHONE_CLEAN_PATTERN.sub('', kyc_data.get('phone_number') or '')
+        if phone.startswith('91') and len(phone) == 12:
+            phone = phone[2:]
+        pan = (kyc_data.get('pan_number') or '').upper().strip()
+        pincode = (kyc_data.get('pincode') or '').strip()
+        
+        record = '\x00'.join((aadhaar, pan, phone, pincode))
+        if not KYCVerificationService.KYC_RECORD_PATTERN.fullmatch(record):
+            return False
+        
+        return KYCVerificationService._verify_aadhaar_checksum(aadhaar)
+    
     @staticmethod
     def validate_all_kyc_data(kyc_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -311,6 +584,16 @@ class KYCVerificationService:
             Dictionary with validation results
         """
         errors = {}
+        required_field_errors = KYCVerificationService.REQUIRED_FIELD_ERRORS
+        
+        # Fast path: a well-formed submission passes one combined match plus the checksum
+        if KYCVerificationService._matches_kyc_record(kyc_data) and \
+                all(kyc_data.get(field, '').strip() for field in required_field_errors):
+            return {
+                'is_valid': True,
+                'errors': errors,
+                'validated_at': datetime.utcnow().isoformat()
+            }
         
         # Validate Aadhaar
         aadhaar_valid, aadhaar_error = KYCVerificationService.validate_aadhaar(
@@ -341,14 +624,9 @@ class KYCVerificationService:
             errors['pincode'] = pincode_error
         
         # Validate required fields
-        required_fields = [
-            'full_name', 'date_of_birth', 'address_line1', 
-            'city', 'state', 'email'
-        ]
-        
-        for field in required_fields:
+        for field, message in required_field_errors.items():
             if not kyc_data.get(field, '').strip():
-                errors[field] = f"{field.replace('_', ' ').title()} is required"
+                errors[field] = message
         
         return {
             'is_valid': len(errors) == 0,
@@ -7,19 +7,24 @@ import json
 import logging
 import smtplib
 import time
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future, as_completed
 from datetime import datetime, timedelta
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
 from email import encoders
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Tuple, Iterator
 from enum import Enum
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
+from flask import current_app, has_app_context
 
 from app.services.audit import AuditService
 from app.services.azure_resilience import with_azure_retry, AzureServiceError
+from app.utils.app_context import with_app_context
 
 logger = logging.getLogger(__name__)
 
@@ -39,13 +44,190 @@ class DeliveryMethod(Enum):
     WEBHOOK = "webhook"
     FORM_SUBMISSION = "form"
 
+_http_session = None
+_http_session_lock = threading.Lock()
+
+def get_http_session() -> requests.Session:
+    """
+    Get the process-wide HTTP session used for API and webhook deliveries
+    
+    The session keeps connections alive between deliveries, so platform
+    endpoints are not re-dialled (TCP and TLS handshakes) for every message.
+    
+    Returns:
+        Shared requests.Session with retry handling
+    """
+    global _http_session
+    if _http_session is None:
+        with _http_session_lock:
+            if _http_session is None:
+                session = requests.Session()
+                retry_strategy = Retry(
+                    total=3,
+                    status_forcelist=[429, 500, 502, 503, 504],
+                    allowed_methods=["HEAD", "GET", "OPTIONS", "POST"],  # Updated parameter name
+                    backoff_factor=1
+                )
+                adapter = HTTPAdapter(
+                    max_retries=retry_strategy,
+                    pool_connections=int(os.getenv('HTTP_POOL_CONNECTIONS', '10')),
+                    pool_maxsize=int(os.getenv('HTTP_POOL_MAXSIZE', '32'))
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _http_session = session
+    return _http_session
+
+class SMTPConnectionPool:
+    """
+    Reusable authenticated SMTP connections for the duration of a batch
+    
+    Connections are opened on demand, handed back after each successful send
+    and closed together when the batch finishes.
+    """
+    
+    def __init__(self, server: str, port: int, username: str, password: str):
+        self.server = server
+        self.port = port
+        self.username = username
+        self.password = password
+        self._lock = threading.Lock()
+        self._idle = []
+        self._closed = False
+    
+    def acquire(self) -> smtplib.SMTP:
+        """
+        Get an idle connection or open and authenticate a new one
+        
+        Returns:
+            Connected and logged-in SMTP client
+        """
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        
+        connection = smtplib.SMTP(self.server, self.port)
+        connection.starttls()
+        connection.login(self.username, self.password)
+        return connection
+    
+    def release(self, connection: smtplib.SMTP):
+        """
+        Return a healthy connection for reuse by later sends
+        
+        Args:
+            connection: Connection obtained from acquire()
+        """
+        with self._lock:
+            if not self._closed:
+                self._idle.append(connection)
+                return
+        self.discard(connection)
+    
+    def discard(self, connection: smtplib.SMTP):
+        """
+        Close a connection that should not be reused
+        
+        Args:
+            connection: Connection obtained from acquire()
+        """
+        try:
+            connection.quit()
+        except Exception:
+            connection.close()
+    
+    def close(self):
+        """Close all idle connections"""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        
+        for connection in idle:
+            self.discard(connection)
+
+class TokenBucket:
+    """
+    Thread-safe token bucket limiting outbound deliveries per second
+    """
+    
+    def __init__(self, rate: float, capacity: float = None):
+        """
+        Initialize the bucket
+        
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum burst size; defaults to one second of tokens
+        """
+        self.rate = rate
+        self.capacity = capacity or max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        """Take one token, sleeping until one is available"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+# Limits shared by every batch in the process, so concurrent requests cannot
+# together exceed what the outbound SMTP/HTTP providers accept
+_inflight_deliveries = threading.BoundedSemaphore(int(os.getenv('NOTIF_MAX_INFLIGHT', '32')))
+_delivery_rate = float(os.getenv('NOTIFICATION_RATE_LIMIT', '0'))
+_delivery_rate_limiter = TokenBucket(_delivery_rate) if _delivery_rate > 0 else None
+
+def chunk_notifications(notifications: List[Dict[str, Any]], max_count: int,
+                        max_bytes: int) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Split notifications into sub-batches bounded by count and serialized size
+    
+    A notification larger than max_bytes on its own still forms a sub-batch
+    by itself rather than being dropped.
+    
+    Args:
+        notifications: List of notification dictionaries
+        max_count: Maximum notifications per sub-batch
+        max_bytes: Maximum serialized payload bytes per sub-batch
+        
+    Yields:
+        Lists of notifications in their original order
+    """
+    chunk = []
+    chunk_bytes = 0
+    
+    for notification in notifications:
+        size = len(json.dumps(notification, default=str))
+        if chunk and (len(chunk) >= max_count or chunk_bytes + size > max_bytes):
+            yield chunk
+            chunk = []
+            chunk_bytes = 0
+        chunk.append(notification)
+        chunk_bytes += size
+    
+    if chunk:
+        yield chunk
+
 class NotificationDeliveryService:
     """
     Service for delivering notifications to platforms with status tracking and retry logic
     """
     
-    def __init__(self):
-        """Initialize the Notification Delivery Service"""
+    def __init__(self, session: requests.Session = None):
+        """
+        Initialize the Notification Delivery Service
+        
+        Args:
+            session: HTTP session for API and webhook calls; defaults to the
+                process-wide session from get_http_session()
+        """
         self.audit_service = AuditService()
         
         # Email configuration
@@ -61,20 +243,27 @@ class NotificationDeliveryService:
         self.max_retry_delay = int(os.getenv('MAX_RETRY_DELAY', '3600'))   # 1 hour
         self.retry_multiplier = float(os.getenv('RETRY_MULTIPLIER', '2.0'))
         
+        # Concurrency for batch delivery; each notification is an SMTP/HTTP round-trip
+        self.max_workers = int(os.getenv('NOTIFICATION_MAX_WORKERS', '8'))
+        self._executor = None
+        
+        # Sub-batch limits for large batch requests
+        self.chunk_max_count = int(os.getenv('NOTIFICATION_CHUNK_SIZE', '100'))
+        self.chunk_max_bytes = int(os.getenv('NOTIFICATION_CHUNK_MAX_BYTES', '1000000'))
+        self._chunk_executor = None
+        
         # Delivery tracking
         self.delivery_status = {}  # In-memory status tracking (should be database in production)
+        # Content of notifications scheduled for retry, dropped once they succeed or run out of attempts
+        self._retry_notifications = {}
+        # Records are added by batch and retry threads while others iterate them
+        self._status_lock = threading.RLock()
         
-        # HTTP session for API calls
-        self.session = requests.Session()
-        retry_strategy = Retry(
-            total=3,
-            status_forcelist=[429, 500, 502, 503, 504],
-            allowed_methods=["HEAD", "GET", "OPTIONS", "POST"],  # Updated parameter name
-            backoff_factor=1
-        )
-        adapter = HTTPAdapter(max_retries=retry_strategy)
-        self.session.mount("http://", adapter)
-        self.session.mount("https://", adapter)
+        # HTTP session for API calls, shared across service instances
+        self.session = session or get_http_session()
+        
+        # SMTP connections pooled per batch; see _deliver_for_batch
+        self._local = threading.local()
         
         # Platform-specific API configurations
         self.platform_apis = {
@@ -128,7 +317,27 @@ class NotificationDeliveryService:
             'delivery_details': {}
         }
         
-        self.delivery_status[notification_id] = delivery_record
+        with self._status_lock:
+            self.delivery_status[notification_id] = delivery_record
+        
+        return self._attempt_delivery(notification, delivery_record, user_id)
+    
+    def _attempt_delivery(self, notification: Dict[str, Any],
+                          delivery_record: Dict[str, Any],
+                          user_id: str = None) -> Dict[str, Any]:
+        """
+        Make one delivery attempt and update its tracking record
+        
+        Args:
+            notification: Notification dictionary containing delivery details
+            delivery_record: Tracking record; its attempts count carries across retries
+            user_id: User ID for audit logging
+            
+        Returns:
+            Dictionary containing delivery result and status
+        """
+        notification_id = delivery_record['notification_id']
+        method = delivery_record['delivery_method']
         
         # Log delivery attempt
         if user_id:
@@ -160,6 +369,7 @@ class NotificationDeliveryService:
             delivery_record.update(result)
             delivery_record['last_attempt'] = datetime.utcnow().isoformat()
             delivery_record['attempts'] += 1
+            self._retry_notifications.pop(notification_id, None)
             
             # Log successful delivery
             if user_id and result.get('status') == DeliveryStatus.SENT.value:
@@ -191,6 +401,10 @@ class NotificationDeliveryService:
                 )
                 delivery_record['next_retry'] = (datetime.utcnow() + timedelta(seconds=retry_delay)).isoformat()
                 delivery_record['status'] = DeliveryStatus.RETRY.value
+                self._retry_notifications[notification_id] = notification
+            else:
+                delivery_record['next_retry'] = None
+                self._retry_notifications.pop(notification_id, None)
             
             # Log delivery error
             if user_id:
@@ -264,15 +478,25 @@ class NotificationDeliveryService:
                 )
                 msg.attach(part)
         
-        # Send email
+        # Send email, reusing a pooled connection during batch delivery
+        smtp_pool = getattr(self._local, 'smtp_pool', None)
         try:
-            server = smtplib.SMTP(self.smtp_server, self.smtp_port)
-            server.starttls()
-            server.login(self.smtp_username, self.smtp_password)
-            
-            text = msg.as_string()
-            server.sendmail(self.from_email, to_email, text)
-            server.quit()
+            if smtp_pool is not None:
+                server = smtp_pool.acquire()
+                try:
+                    server.sendmail(self.from_email, to_email, msg.as_string())
+                except smtplib.SMTPException:
+                    smtp_pool.discard(server)
+                    raise
+                smtp_pool.release(server)
+            else:
+                server = smtplib.SMTP(self.smtp_server, self.smtp_port)
+                server.starttls()
+                server.login(self.smtp_username, self.smtp_password)
+                
+                text = msg.as_string()
+                server.sendmail(self.from_email, to_email, text)
+                server.quit()
             
             return {
                 'status': DeliveryStatus.SENT.value,
@@ -514,25 +738,24 @@ class NotificationDeliveryService:
                 input_data={'batch_id': batch_id, 'notification_count': len(notifications)}
             )
         
-        # Deliver each notification
-        for notification in notifications:
-            try:
-                result = self.deliver_notification(notification, user_id=user_id)
-                batch_results['delivery_results'].append(result)
-                
-                if result.get('status') in [DeliveryStatus.SENT.value, DeliveryStatus.DELIVERED.value]:
-                    batch_results['successful_deliveries'] += 1
-                else:
-                    batch_results['failed_deliveries'] += 1
-                    
-            except Exception as e:
-                logger.error(f"Error in batch delivery for notification {notification.get('policy_id', 'unknown')}: {str(e)}")
+        # Deliver notifications concurrently; results keep the input order
+        smtp_pool = self._create_smtp_pool()
+        deliver_one = with_app_context(functools.partial(self._deliver_for_batch, smtp_pool=smtp_pool))
+        try:
+            if len(notifications) > 1:
+                results = list(self._get_executor().map(deliver_one, notifications, [user_id] * len(notifications)))
+            else:
+                results = [deliver_one(notification, user_id) for notification in notifications]
+        finally:
+            smtp_pool.close()
+        
+        for result in results:
+            batch_results['delivery_results'].append(result)
+            
+            if result.get('status') in [DeliveryStatus.SENT.value, DeliveryStatus.DELIVERED.value]:
+                batch_results['successful_deliveries'] += 1
+            else:
                 batch_results['failed_deliveries'] += 1
-                batch_results['delivery_results'].append({
-                    'notification_id': notification.get('policy_id', 'unknown'),
-                    'status': DeliveryStatus.FAILED.value,
-                    'error_message': str(e)
-                })
         
         batch_results['completed_at'] = datetime.utcnow().isoformat()
         
@@ -549,6 +772,159 @@ class NotificationDeliveryService:
         
         return batch_results
     
+    def batch_deliver_chunked(self, notifications: List[Dict[str, Any]], 
+                              user_id: str = None) -> Dict[str, Any]:
+        """
+        Deliver a large batch as concurrent sub-batches bounded by count and size
+        
+        Args:
+            notifications: List of notification dictionaries
+            user_id: User ID for audit logging
+            
+        Returns:
+            Dictionary containing the combined batch delivery results
+        """
+        chunks = list(chunk_notifications(notifications, self.chunk_max_count, self.chunk_max_bytes))
+        if len(chunks) <= 1:
+            return self.batch_deliver_notifications(notifications, user_id=user_id)
+        
+        if self._chunk_executor is None:
+            self._chunk_executor = ThreadPoolExecutor(
+                max_workers=int(os.getenv('NOTIFICATION_MAX_CHUNKS', '4')),
+                thread_name_prefix='notification-chunk'
+            )
+        
+        deliver_chunk = with_app_context(self.batch_deliver_notifications)
+        chunk_results = list(self._chunk_executor.map(deliver_chunk, chunks, [user_id] * len(chunks)))
+        
+        combined = {
+            'batch_id': chunk_results[0]['batch_id'],
+            'chunk_batch_ids': [result['batch_id'] for result in chunk_results],
+            'total_notifications': len(notifications),
+            'successful_deliveries': 0,
+            'failed_deliveries': 0,
+            'delivery_results': [],
+            'started_at': min(result['started_at'] for result in chunk_results),
+            'completed_at': max(result['completed_at'] for result in chunk_results)
+        }
+        for result in chunk_results:
+            combined['successful_deliveries'] += result['successful_deliveries']
+            combined['failed_deliveries'] += result['failed_deliveries']
+            combined['delivery_results'].extend(result['delivery_results'])
+        
+        return combined
+    
+    def batch_deliver_stream(self, notifications: List[Dict[str, Any]], 
+                             user_id: str = None) -> Iterator[Dict[str, Any]]:
+        """
+        Deliver multiple notifications concurrently, yielding each result as it settles
+        
+        Unlike batch_deliver_notifications, results are not collected into one
+        batch record, so callers can forward early results while later
+        deliveries are still in flight.
+        
+        Args:
+            notifications: List of notification dictionaries
+            user_id: User ID for audit logging
+            
+        Yields:
+            Delivery result dictionaries in completion order
+        """
+        batch_id = f"batch_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}_{hash(str(notifications)) % 10000}"
+        successful = 0
+        failed = 0
+        
+        if user_id:
+            self.audit_service.create_log_entry(
+                user_id=user_id,
+                event_type="notification_batch_delivery_start",
+                event_description=f"Starting streamed batch delivery of {len(notifications)} notifications",
+                input_data={'batch_id': batch_id, 'notification_count': len(notifications)}
+            )
+        
+        smtp_pool = self._create_smtp_pool()
+        deliver_one = with_app_context(functools.partial(self._deliver_for_batch, smtp_pool=smtp_pool))
+        executor = self._get_executor()
+        futures = [executor.submit(deliver_one, notification, user_id) for notification in notifications]
+        
+        try:
+            for future in as_completed(futures):
+                result = future.result()
+                if result.get('status') in [DeliveryStatus.SENT.value, DeliveryStatus.DELIVERED.value]:
+                    successful += 1
+                else:
+                    failed += 1
+                yield result
+        finally:
+            for future in futures:
+                future.cancel()
+            smtp_pool.close()
+        
+        if user_id:
+            self.audit_service.create_log_entry(
+                user_id=user_id,
+                event_type="notification_batch_delivery_complete",
+                event_description=f"Streamed batch delivery complete: {successful} successful, {failed} failed",
+                input_data={'batch_id': batch_id},
+                output_data={'successful_deliveries': successful, 'failed_deliveries': failed},
+                status="success" if failed == 0 else "partial_success"
+            )
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """
+        Get the thread pool used for batch delivery, creating it on first use
+        
+        Returns:
+            ThreadPoolExecutor shared by all batches on this service
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix='notification-delivery'
+            )
+        return self._executor
+    
+    def _create_smtp_pool(self) -> SMTPConnectionPool:
+        """
+        Create an SMTP connection pool for one batch
+        
+        Returns:
+            SMTPConnectionPool using this service's SMTP settings
+        """
+        return SMTPConnectionPool(
+            self.smtp_server, self.smtp_port, self.smtp_username, self.smtp_password
+        )
+    
+    def _deliver_for_batch(self, notification: Dict[str, Any], 
+                           user_id: str = None,
+                           smtp_pool: SMTPConnectionPool = None) -> Dict[str, Any]:
+        """
+        Deliver one notification of a batch, converting errors into a failed result
+        
+        Args:
+            notification: Notification dictionary
+            user_id: User ID for audit logging
+            smtp_pool: SMTP connections shared by the batch
+            
+        Returns:
+            Dictionary containing delivery result
+        """
+        self._local.smtp_pool = smtp_pool
+        try:
+            with _inflight_deliveries:
+                if _delivery_rate_limiter is not None:
+                    _delivery_rate_limiter.acquire()
+                return self.deliver_notification(notification, user_id=user_id)
+        except Exception as e:
+            logger.error(f"Error in batch delivery for notification {notification.get('policy_id', 'unknown')}: {str(e)}")
+            return {
+                'notification_id': notification.get('policy_id', 'unknown'),
+                'status': DeliveryStatus.FAILED.value,
+                'error_message': str(e)
+            }
+        finally:
+            self._local.smtp_pool = None
+    
     def get_delivery_status(self, notification_id: str) -> Optional[Dict[str, Any]]:
         """
         Get delivery status for a specific notification
@@ -571,8 +947,12 @@ class NotificationDeliveryService:
         pending_retries = []
         current_time = datetime.utcnow()
         
-        for notification_id, record in self.delivery_status.items():
+        with self._status_lock:
+            records = list(self.delivery_status.values())
+        
+        for record in records:
             if (record['status'] == DeliveryStatus.RETRY.value and 
+                record['attempts'] < self.max_retries and
                 record.get('next_retry') and
                 datetime.fromisoformat(record['next_retry']) <= current_time):
                 pending_retries.append(record)
@@ -589,7 +969,11 @@ class NotificationDeliveryService:
         Returns:
             Dictionary containing retry processing results
         """
-        pending_retries = self.get_pending_retries()
+        # Claim the due records so the retry worker and the API can't both retry one
+        with self._status_lock:
+            pending_retries = self.get_pending_retries()
+            for retry_record in pending_retries:
+                retry_record['status'] = DeliveryStatus.PENDING.value
         
         if not pending_retries:
             return {
@@ -610,17 +994,7 @@ class NotificationDeliveryService:
             notification_id = retry_record['notification_id']
             
             try:
-                # Get original notification (this would come from database in real implementation)
-                # For now, we'll create a minimal notification for retry
-                notification = {
-                    'policy_id': notification_id,
-                    'platform': retry_record['platform'],
-                    'delivery_method': retry_record['delivery_method'],
-                    'subject': f"Retry: Death Notification for {retry_record['platform']}",
-                    'body': "This is a retry of a previously failed notification."
-                }
-                
-                result = self.deliver_notification(notification, user_id=user_id)
+                result = self._retry_delivery(retry_record, user_id=user_id)
                 retry_results['results'].append(result)
                 
                 if result.get('status') in [DeliveryStatus.SENT.value, DeliveryStatus.DELIVERED.value]:
@@ -630,6 +1004,7 @@ class NotificationDeliveryService:
                     
             except Exception as e:
                 logger.error(f"Error processing retry for notification {notification_id}: {str(e)}")
+                retry_record['status'] = DeliveryStatus.FAILED.value
                 retry_results['failed_retries'] += 1
                 retry_results['results'].append({
                     'notification_id': notification_id,
@@ -639,6 +1014,31 @@ class NotificationDeliveryService:
         
         return retry_results
     
+    def _retry_delivery(self, record: Dict[str, Any], user_id: str = None) -> Dict[str, Any]:
+        """
+        Re-send a notification scheduled for retry, keeping its tracking record
+        
+        Args:
+            record: Tracking record of the failed notification
+            user_id: User ID for audit logging
+            
+        Returns:
+            Dictionary containing delivery result and status
+        """
+        notification = self._retry_notifications.get(record['notification_id'])
+        if notification is None:
+            # Content is only kept in memory for retries scheduled by this process;
+            # fall back to a minimal notification
+            notification = {
+                'policy_id': record['notification_id'],
+                'platform': record['platform'],
+                'delivery_method': record['delivery_method'],
+                'subject': f"Retry: Death Notification for {record['platform']}",
+                'body': "This is a retry of a previously failed notification."
+            }
+        
+        return self._attempt_delivery(notification, record, user_id)
+    
     def update_delivery_status(self, notification_id: str, status: str, 
                              details: Dict[str, Any] = None) -> bool:
         """
@@ -652,14 +1052,15 @@ class NotificationDeliveryService:
         Returns:
             Boolean indicating success
         """
-        if notification_id not in self.delivery_status:
-            return False
-        
-        self.delivery_status[notification_id]['status'] = status
-        self.delivery_status[notification_id]['updated_at'] = datetime.utcnow().isoformat()
-        
-        if details:
-            self.delivery_status[notification_id]['delivery_details'].update(details)
+        with self._status_lock:
+            if notification_id not in self.delivery_status:
+                return False
+            
+            self.delivery_status[notification_id]['status'] = status
+            self.delivery_status[notification_id]['updated_at'] = datetime.utcnow().isoformat()
+            
+            if details:
+                self.delivery_status[notification_id]['delivery_details'].update(details)
         
         return True
     
@@ -670,8 +1071,11 @@ class NotificationDeliveryService:
         Returns:
             Dictionary containing delivery statistics
         """
+        with self._status_lock:
+            records = list(self.delivery_status.values())
+        
         stats = {
-            'total_notifications': len(self.delivery_status),
+            'total_notifications': len(records),
             'status_counts': {},
             'platform_counts': {},
             'method_counts': {},
@@ -680,7 +1084,7 @@ class NotificationDeliveryService:
         
         successful_count = 0
         
-        for record in self.delivery_status.values():
+        for record in records:
             status = record['status']
             platform = record['platform']
             method = record['delivery_method']
@@ -702,4 +1106,229 @@ class NotificationDeliveryService:
         if stats['total_notifications'] > 0:
             stats['success_rate'] = successful_count / stats['total_notifications']
         
-        return stats
\ No newline at end of file
+        return stats
+
+
+class MessageBatcher:
+    """
+    Coalesces single notification deliveries into batch deliveries
+    
+    Notifications added within max_wait_time of each other are flushed together
+    through one batch call, or sooner once max_batch_size notifications or
+    max_batch_bytes of serialized payload are pending. Flushed batches are
+    delivered on a thread pool so a slow batch doesn't hold up collecting the next.
+    """
+    
+    def __init__(self, flush_batch, max_batch_size: int = None,
+                 max_wait_time: float = None, max_batch_bytes: int = None,
+                 max_workers: int = None):
+        """
+        Initialize the batcher
+        
+        Args:
+            flush_batch: Callable taking (notifications, user_id) and returning
+                a batch result with a 'delivery_results' list in input order
+            max_batch_size: Maximum notifications per flush
+            max_wait_time: Seconds to wait for more notifications before flushing
+            max_batch_bytes: Maximum serialized payload bytes per flush
+            max_workers: Batches delivered concurrently
+        """
+        self.flush_batch = flush_batch
+        self.max_batch_size = max_batch_size or int(os.getenv('NOTIFICATION_BATCH_SIZE', '50'))
+        self.max_wait_time = max_wait_time if max_wait_time is not None else \
+            int(os.getenv('NOTIFICATION_BATCH_WAIT_MS', '20')) / 1000.0
+        self.max_batch_bytes = max_batch_bytes or int(os.getenv('NOTIFICATION_BATCH_MAX_BYTES', '262144'))
+        self.max_workers = max_workers or int(os.getenv('NOTIFICATION_BATCH_WORKERS', '4'))
+        
+        self._condition = threading.Condition()
+        self._pending = []  # (app, user_id, notification, size, future)
+        self._pending_bytes = 0
+        self._thread = None
+        self._executor = None
+    
+    def add(self, notification: Dict[str, Any], user_id: str = None) -> Future:
+        """
+        Queue a notification for the next batch
+        
+        Args:
+            notification: Notification dictionary
+            user_id: User ID for audit logging
+            
+        Returns:
+            Future resolved with the notification's delivery result
+        """
+        size = len(json.dumps(notification, default=str))
+        app = current_app._get_current_object() if has_app_context() else None
+        future = Future()
+        
+        with self._condition:
+            if self._thread is None:
+                # Separate from the delivery service's pool, which each batch
+                # call itself waits on
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix='notification-batch'
+                )
+                self._thread = threading.Thread(
+                    target=self._run, name='notification-batcher', daemon=True
+                )
+                self._thread.start()
+            
+            self._pending.append((app, user_id, notification, size, future))
+            self._pending_bytes += size
+            self._condition.notify()
+        
+        return future
+    
+    def _is_full(self) -> bool:
+        """Check whether the pending notifications hit a flush limit"""
+        return (len(self._pending) >= self.max_batch_size or
+                self._pending_bytes >= self.max_batch_bytes)
+    
+    def _take_batch(self) -> List[Tuple]:
+        """
+        Wait for a batch to fill or time out, then remove it from the queue
+        
+        Returns:
+            List of pending entries to flush
+        """
+        with self._condition:
+            while not self._pending:
+                self._condition.wait()
+            
+            deadline = time.monotonic() + self.max_wait_time
+            while not self._is_full():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            
+            batch = []
+            batch_bytes = 0
+            for entry in self._pending:
+                if batch and (len(batch) >= self.max_batch_size or
+                              batch_bytes + entry[3] > self.max_batch_bytes):
+                    break
+                batch.append(entry)
+                batch_bytes += entry[3]
+            
+            del self._pending[:len(batch)]
+            self._pending_bytes -= batch_bytes
+            return batch
+    
+    def _run(self):
+        """Flush batches for the lifetime of the process"""
+        while True:
+            self._flush(self._take_batch())
+    
+    def _flush(self, batch: List[Tuple]):
+        """
+        Group one batch by app and user and hand each group to the thread pool
+        
+        Args:
+            batch: Pending entries taken from the queue
+        """
+        groups = {}
+        for app, user_id, notification, size, future in batch:
+            groups.setdefault((app, user_id), []).append((notification, future))
+        
+        for (app, user_id), entries in groups.items():
+            self._executor.submit(self._deliver_group, app, user_id, entries)
+    
+    def _deliver_group(self, app, user_id: str, entries: List[Tuple]):
+        """
+        Deliver one app and user's notifications and resolve their futures
+        
+        Args:
+            app: Flask application the notifications were added under, or None
+            user_id: User ID for audit logging
+            entries: (notification, future) pairs in the order they were added
+        """
+        notifications = [notification for notification, future in entries]
+        try:
+            if app is not None:
+                with app.app_context():
+                    result = self.flush_batch(notifications, user_id)
+            else:
+                result = self.flush_batch(notifications, user_id)
+            
+            for (notification, future), delivery_result in zip(entries, result['delivery_results']):
+                future.set_result(delivery_result)
+            error = RuntimeError('Batch delivery returned no result for this notification')
+        except Exception as e:
+            logger.error(f"Error flushing notification batch of {len(entries)}: {str(e)}")
+            error = e
+        
+        # Never leave a caller waiting on a future the batch didn't resolve
+        for notification, future in entries:
+            if not future.done():
+                future.set_exception(error)
+
+
+class RetryWorker:
+    """
+    Background thread that processes the retry queue on a fixed interval
+    
+    The outcome of the most recent run is kept for status reporting.
+    """
+    
+    def __init__(self, service: 'NotificationDeliveryService', interval: float = None):
+        """
+        Initialize the worker
+        
+        Args:
+            service: Delivery service whose retry queue is processed
+            interval: Seconds between runs
+        """
+        self.service = service
+        self.interval = interval or float(os.getenv('NOTIFICATION_RETRY_INTERVAL', '60'))
+        self._lock = threading.Lock()
+        self._thread = None
+        self._last_result = None
+        self._last_run_at = None
+    
+    def start(self, app):
+        """
+        Start the worker thread for app if it is not already running
+        
+        Args:
+            app: Flask application providing the app context for each run
+        """
+        if self._thread is not None:
+            return
+        
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, args=(app,), name='notification-retry', daemon=True
+                )
+                self._thread.start()
+    
+    def _run(self, app):
+        """Process the retry queue every interval for the lifetime of the process"""
+        while True:
+            time.sleep(self.interval)
+            try:
+                with app.app_context():
+                    result = self.service.process_retry_queue()
+            except Exception as e:
+                logger.error(f"Error in background retry processing: {str(e)}")
+                continue
+            
+            with self._lock:
+                self._last_result = result
+                self._last_run_at = datetime.utcnow().isoformat()
+    
+    def last_run(self) -> Dict[str, Any]:
+        """
+        Get the result of the most recent run
+        
+        Returns:
+            Dictionary with the last retry result and when it ran (None before the first run)
+        """
+        with self._lock:
+            return {
+                'retry_result': self._last_result,
+                'last_run_at': self._last_run_at,
+                'interval_seconds': self.interval
+            }
@@ -9,6 +9,7 @@ from datetime import datetime
 from typing import Dict, List, Any, Optional
 from enum import Enum
 import re
+from collections import ChainMap
 
 from app.services.audit import AuditService
 
@@ -683,12 +684,81 @@ Date: {current_date}''',
             logger.warning(f"No template found for {platform} {action_type} {template_type}")
             return None
         
-        # Personalize template
-        personalized_template = self.personalize_template(template, context)
-        
         # Get platform requirements
         platform_reqs = self.get_platform_requirements(platform)
         
+        return self._build_notification(platform, action_type, template_type,
+                                        template, platform_reqs, context)
+    
+    def generate_notifications_bulk(self, policies: List[Any], user_info: Dict[str, Any],
+                                    template_type: str = 'email') -> List[Dict[str, Any]]:
+        """
+        Generate notifications for many policies, resolving each template once
+        
+        Policies sharing a platform and action reuse the same template and
+        platform requirements; only personalization runs per policy.
+        
+        Args:
+            policies: ActionPolicy-like objects with policy_id, platform_name,
+                action_type and account_identifier attributes
+            user_info: Context data shared by all policies
+            template_type: Template type
+            
+        Returns:
+            List of notification dictionaries in policy order, skipping policies
+            without a matching template
+        """
+        resolved = {}
+        notifications = []
+        
+        for policy in policies:
+            key = (policy.platform_name, policy.action_type)
+            if key not in resolved:
+                template = self.get_template(policy.platform_name, policy.action_type, template_type)
+                if not template:
+                    logger.warning(f"No template found for {policy.platform_name} {policy.action_type} {template_type}")
+                    resolved[key] = None
+                else:
+                    resolved[key] = (template, self.get_platform_requirements(policy.platform_name))
+            
+            if resolved[key] is None:
+                continue
+            
+            template, platform_reqs = resolved[key]
+            
+            # Layer the per-policy keys over user_info instead of copying it
+            context = ChainMap({
+                'platform': policy.platform_name,
+                'account_identifier': policy.account_identifier
+            }, user_info)
+            
+            notification = self._build_notification(policy.platform_name, policy.action_type,
+                                                    template_type, template, platform_reqs, context)
+            notification['policy_id'] = policy.policy_id
+            notifications.append(notification)
+        
+        return notifications
+    
+    def _build_notification(self, platform: str, action_type: str, template_type: str,
+                            template: Dict[str, Any], platform_reqs: Dict[str, Any],
+                            context: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Personalize a resolved template into a complete notification
+        
+        Args:
+            platform: Platform name
+            action_type: Action type
+            template_type: Template type
+            template: Template dictionary
+            platform_reqs: Platform requirements
+            context: Context data for personalization
+            
+        Returns:
+            Complete notification dictionary
+        """
+        # Personalize template
+        personalized_template = self.personalize_template(template, context)
+        
         # Create complete notification
         notification = {
             'platform': platform,
@@ -0,0 +1,31 @@
+"""
+Helpers for running Flask-dependent code on worker threads
+"""
+import functools
+from typing import Callable
+
+from flask import current_app, has_app_context
+
+
+def with_app_context(func: Callable) -> Callable:
+    """
+    Bind func to the current Flask app so it can run on a worker thread
+
+    Args:
+        func: Callable to run on another thread
+
+    Returns:
+        Callable that pushes an app context around func, or func itself
+        when called outside an app context
+    """
+    if not has_app_context():
+        return func
+
+    app = current_app._get_current_object()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with app.app_context():
+            return func(*args, **kwargs)
+
+    return wrapper
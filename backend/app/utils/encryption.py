@@ -5,10 +5,35 @@ Provides AES encryption for digital asset credentials and personal information
 import os
 import base64
 import json
+import threading
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _dumps_json(data: Any) -> bytes:
+    """Serialize data to JSON bytes with sorted keys, using orjson when it accepts the value"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_SORT_KEYS)
+        except TypeError:
+            pass
+    return json.dumps(data, sort_keys=True).encode()
+
+def _loads_json(data: bytes) -> Any:
+    """Deserialize JSON bytes, using orjson when it accepts the document"""
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # json.dumps output orjson rejects, such as NaN or Infinity
+            pass
+    return json.loads(data)
 
 class EncryptionService:
     """Service for encrypting and decrypting sensitive data"""
@@ -45,11 +70,8 @@ class EncryptionService:
             Base64 encoded encrypted string
         """
         try:
-            # Convert dict to JSON string
-            json_data = json.dumps(data, sort_keys=True)
-            
-            # Encrypt the JSON string
-            encrypted_data = self.cipher_suite.encrypt(json_data.encode())
+            # Encrypt the dict's JSON encoding
+            encrypted_data = self.cipher_suite.encrypt(_dumps_json(data))
             
             # Return base64 encoded result
             return base64.urlsafe_b64encode(encrypted_data).decode()
@@ -75,12 +97,33 @@ class EncryptionService:
             decrypted_bytes = self.cipher_suite.decrypt(encrypted_bytes)
             
             # Convert back to dictionary
-            json_data = decrypted_bytes.decode()
-            return json.loads(json_data)
+            return _loads_json(decrypted_bytes)
             
         except Exception as e:
             raise EncryptionError(f"Failed to decrypt data: {str(e)}")
     
+    def decrypt_many(self, encrypted_items: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Decrypt several base64 encoded strings with the same cipher
+        
+        Args:
+            encrypted_items: Base64 encoded encrypted strings
+            
+        Returns:
+            Decrypted dictionaries in input order; entries that cannot be
+            decrypted are None
+        """
+        decrypt = self.cipher_suite.decrypt
+        results = []
+        
+        for encrypted_data in encrypted_items:
+            try:
+                results.append(_loads_json(decrypt(base64.urlsafe_b64decode(encrypted_data.encode()))))
+            except Exception:
+                results.append(None)
+        
+        return results
+    
     def encrypt_string(self, text: str) -> str:
         """
         Encrypt a single string value
@@ -120,12 +163,20 @@ class EncryptionError(Exception):
 
 # Global encryption service instance
 _encryption_service = None
+_encryption_service_lock = threading.Lock()
 
 def get_encryption_service() -> EncryptionService:
-    """Get global encryption service instance"""
+    """
+    Get global encryption service instance
+    
+    Created once under a lock: without ENCRYPTION_KEY each instance generates
+    its own key, so concurrent first calls must not build separate services.
+    """
     global _encryption_service
     if _encryption_service is None:
-        _encryption_service = EncryptionService()
+        with _encryption_service_lock:
+            if _encryption_service is None:
+                _encryption_service = EncryptionService()
     return _encryption_service
 
 def encrypt_digital_assets(assets_data: Dict[str, Any]) -> str:
@@ -0,0 +1,84 @@
+"""
+JSON provider for Flask backed by orjson
+Falls back to Flask's default provider when orjson is not installed
+"""
+import json
+import decimal
+from collections.abc import Mapping
+from typing import Any, Union
+
+from flask import Response
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+ORJSON_AVAILABLE = orjson is not None
+_SORTED_OPTION = (orjson.OPT_SORT_KEYS | orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS) if ORJSON_AVAILABLE else 0
+
+
+def _default(obj: Any) -> Any:
+    """Serialize types that orjson does not handle natively"""
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, Mapping):
+        # ChainMap, MappingProxyType and other non-dict mappings
+        return dict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps_sorted(obj: Any) -> str:
+    """
+    Serialize obj to a compact JSON string with sorted keys, for stored JSON columns
+
+    Uses orjson when installed; values orjson rejects (such as integers wider than
+    64 bits) and installs without orjson go through json.dumps instead.
+    """
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.dumps(obj, default=_default, option=_SORTED_OPTION).decode('utf-8')
+        except TypeError:
+            pass
+    return json.dumps(obj, sort_keys=True, separators=(',', ':'), default=_default)
+
+
+class OrjsonProvider(JSONProvider):
+    """
+    Flask JSON provider that encodes and decodes with orjson
+
+    Used by jsonify() for responses and by request.get_json() for request bodies.
+    datetime, date and UUID values are encoded natively (datetimes as ISO 8601).
+    """
+
+    option = (orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS) if ORJSON_AVAILABLE else 0
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        """Serialize obj to a JSON string"""
+        if kwargs:
+            # orjson has no equivalent for json.dumps options such as indent or separators
+            kwargs.setdefault('default', _default)
+            return json.dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=_default, option=self.option).decode('utf-8')
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        """
+        Build a JSON response for jsonify()
+
+        orjson produces UTF-8 bytes, which become the response body directly
+        instead of being decoded to str by dumps() and re-encoded by the response.
+        """
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=_default, option=self.option)
+        return self._app.response_class(body, mimetype='application/json')
+
+    def loads(self, s: Union[str, bytes], **kwargs: Any) -> Any:
+        """Deserialize a JSON string or bytes"""
+        if kwargs:
+            return json.loads(s, **kwargs)
+        return orjson.loads(s)
@@ -0,0 +1,62 @@
+"""
+Declarative validation for JSON request bodies
+Each schema is built once at import time and checks a decoded body in a single pass
+"""
+from typing import Any, Dict, Tuple
+
+from werkzeug.exceptions import BadRequest
+
+
+class RequestSchema:
+    """
+    Expected shape of a JSON object: field types, required fields and nested objects
+
+    validate() raises BadRequest with a client-facing message on the first
+    problem found, so endpoints can let it propagate to their error handling.
+    """
+
+    __slots__ = ('fields', 'required', 'nested')
+
+    def __init__(self, fields: Dict[str, Tuple[Any, bool]],
+                 nested: Dict[str, 'RequestSchema'] = None):
+        """
+        Initialize the schema
+
+        Args:
+            fields: Mapping of field name to (accepted type or tuple of types, required)
+            nested: Schemas for fields whose values are themselves JSON objects
+        """
+        self.fields = tuple((name, types) for name, (types, _) in fields.items())
+        self.required = frozenset(name for name, (_, required) in fields.items() if required)
+        self.nested = nested or {}
+
+    def validate(self, data: Any, path: str = '') -> Dict[str, Any]:
+        """
+        Check a decoded JSON value against the schema
+
+        Args:
+            data: Decoded request body (or nested value)
+            path: Prefix for field names in error messages
+
+        Returns:
+            The validated dictionary, unchanged
+        """
+        if not isinstance(data, dict):
+            raise BadRequest(f"{path.rstrip('.') or 'Request body'} must be a JSON object")
+
+        missing = self.required - data.keys()
+        if missing:
+            raise BadRequest(f"Missing required fields: {', '.join(path + name for name in sorted(missing))}")
+
+        for name, types in self.fields:
+            value = data.get(name)
+            if value is None:
+                continue
+            if not isinstance(value, types):
+                raise BadRequest(f"Field '{path}{name}' has an invalid type")
+
+            nested = self.nested.get(name)
+            if nested is not None:
+                nested.validate(value, f"{path}{name}.")
+
+        return data
@@ -3,7 +3,66 @@ Database initialization script
 Creates all tables and sets up the initial schema
 """
 from app import create_app, db
-from app.models import UserProfile, TrustedContact, ActionPolicy, AuditLog
+from app.models import UserProfile, TrustedContact, ActionPolicy, AuditLog, OtpCode, BackgroundTask
+
+# Models whose unique indexes reject duplicates on insert (see DatabaseService.add_unique)
+UNIQUE_INDEX_MODELS = (TrustedContact, ActionPolicy)
+
+def remove_duplicates(model, index):
+    """
+    Delete rows that repeat an earlier row's values for a unique index
+    
+    Args:
+        model: Model class owning the index
+        index: Unique SQLAlchemy Index on the model's table
+    
+    Returns:
+        Number of rows deleted; the oldest row of each duplicate group is kept
+    """
+    columns = [column.name for column in index.columns]
+    primary_key = model.__table__.primary_key.columns.values()[0]
+    
+    seen = set()
+    removed = 0
+    for row in model.query.order_by(model.created_at, primary_key).all():
+        key = tuple(getattr(row, column) for column in columns)
+        if key in seen:
+            db.session.delete(row)
+            removed += 1
+        else:
+            seen.add(key)
+    
+    db.session.commit()
+    return removed
+
+def ensure_unique_indexes():
+    """
+    Create the unique indexes that create_all skips on existing tables
+    
+    Indexes missing from the database, or present under the same name but
+    not unique, are (re)created after removing rows that would violate them.
+    """
+    inspector = db.inspect(db.engine)
+    
+    for model in UNIQUE_INDEX_MODELS:
+        existing = {
+            index['name']: index.get('unique', False)
+            for index in inspector.get_indexes(model.__tablename__)
+        }
+        
+        for index in model.__table__.indexes:
+            if not index.unique or existing.get(index.name):
+                continue
+            
+            if index.name in existing:
+                index.drop(bind=db.engine)
+            
+            removed = remove_duplicates(model, index)
+            if removed:
+                print(f"Removed {removed} duplicate rows from {model.__tablename__} for {index.name}")
+            
+            index.create(bind=db.engine, checkfirst=True)
+            print(f"Created unique index {index.name}")
 
 def init_database():
     """Initialize the database with all tables"""
@@ -14,10 +73,13 @@ def init_database():
         db.create_all()
         print("Database tables created successfully!")
         
+        # create_all leaves existing tables alone, including their indexes
+        ensure_unique_indexes()
+        
         # Verify tables were created
         inspector = db.inspect(db.engine)
         tables = inspector.get_table_names()
         print(f"Created tables: {tables}")
 
 if __name__ == '__main__':
-    init_database()
\ No newline at end of file
+    init_database()
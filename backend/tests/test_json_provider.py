@@ -0,0 +1,79 @@
+"""
+Tests for the orjson-backed Flask JSON provider
+"""
+import unittest
+from unittest.mock import patch
+from datetime import datetime
+
+from flask import Flask, request, jsonify
+
+from app.utils.json_provider import OrjsonProvider, ORJSON_AVAILABLE, dumps_sorted
+
+
+@unittest.skipUnless(ORJSON_AVAILABLE, "orjson is not installed")
+class TestOrjsonProvider(unittest.TestCase):
+    """Test cases for OrjsonProvider"""
+
+    def setUp(self):
+        """Set up a minimal app using the provider"""
+        self.app = Flask(__name__)
+        self.app.json = OrjsonProvider(self.app)
+
+        @self.app.route('/echo', methods=['POST'])
+        def echo():
+            return jsonify({'received': request.get_json()})
+
+        self.client = self.app.test_client()
+
+    def test_request_body_parsed_with_provider(self):
+        """Test that request.get_json() decodes through the provider's loads"""
+        with patch.object(OrjsonProvider, 'loads', wraps=self.app.json.loads) as mock_loads:
+            response = self.client.post('/echo', data=b'{"email": "user@example.com"}',
+                                        content_type='application/json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json(), {'received': {'email': 'user@example.com'}})
+        mock_loads.assert_called()
+
+    def test_malformed_body_returns_400(self):
+        """Test that invalid JSON still produces a 400 response"""
+        response = self.client.post('/echo', data=b'{"email":', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_dumps_handles_datetime_and_decimal(self):
+        """Test that non-native values are serialized"""
+        from decimal import Decimal
+
+        with self.app.app_context():
+            payload = self.app.json.dumps({
+                'timestamp': datetime(2024, 1, 1, 12, 0, 0),
+                'score': Decimal('0.95')
+            })
+
+        self.assertEqual(payload, '{"timestamp":"2024-01-01T12:00:00+00:00","score":"0.95"}')
+
+    def test_dumps_handles_non_dict_mappings(self):
+        """Test that ChainMap values such as template contexts are serialized"""
+        from collections import ChainMap
+
+        with self.app.app_context():
+            payload = self.app.json.dumps({'context': ChainMap({'platform': 'google'}, {'full_name': 'John Doe'})})
+
+        self.assertEqual(payload, '{"context":{"full_name":"John Doe","platform":"google"}}')
+
+
+class TestDumpsSorted(unittest.TestCase):
+    """Test cases for dumps_sorted"""
+
+    def test_keys_sorted_at_every_level(self):
+        """Test that output is compact and key order does not depend on insertion order"""
+        payload = dumps_sorted({'b': 1, 'a': {'d': 2, 'c': [3]}})
+        self.assertEqual(payload, '{"a":{"c":[3],"d":2},"b":1}')
+
+    def test_wide_integers_fall_back_to_json(self):
+        """Test that values orjson rejects are still serialized"""
+        self.assertEqual(dumps_sorted({'n': 2 ** 70}), '{"n":%d}' % 2 ** 70)
+
+
+if __name__ == '__main__':
+    unittest.main()
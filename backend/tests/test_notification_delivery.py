@@ -5,8 +5,11 @@ import unittest
 from unittest.mock import patch, MagicMock
 import json
 from datetime import datetime
+from types import SimpleNamespace
 
-from app.services.notification_delivery import NotificationDeliveryService, DeliveryStatus, DeliveryMethod
+from app.services.notification_delivery import (
+    NotificationDeliveryService, DeliveryStatus, DeliveryMethod, MessageBatcher, chunk_notifications
+)
 from app.services.notification_templates import NotificationTemplateService
 
 class TestNotificationDeliveryService(unittest.TestCase):
@@ -149,6 +152,35 @@ class TestNotificationDeliveryService(unittest.TestCase):
             # Verify deliver_notification was called for each notification
             self.assertEqual(mock_deliver.call_count, 2)
     
+    def test_batch_delivery_stream(self):
+        """Test that streamed batch delivery yields one result per notification"""
+        notifications = [
+            self.sample_notification,
+            {**self.sample_notification, 'policy_id': 'test-policy-456'}
+        ]
+        
+        with patch.object(self.service, 'deliver_notification') as mock_deliver:
+            mock_deliver.side_effect = lambda notification, user_id=None: {
+                'status': DeliveryStatus.SENT.value,
+                'notification_id': notification['policy_id']
+            }
+            
+            results = list(self.service.batch_deliver_stream(notifications, user_id='test-user-123'))
+        
+        self.assertEqual(
+            sorted(result['notification_id'] for result in results),
+            ['test-policy-123', 'test-policy-456']
+        )
+        self.assertEqual(mock_deliver.call_count, 2)
+    
+    def test_chunk_notifications_limits(self):
+        """Test that sub-batches respect both the count and byte limits"""
+        small = [{'policy_id': str(i)} for i in range(7)]
+        self.assertEqual([len(chunk) for chunk in chunk_notifications(small, 3, 1000000)], [3, 3, 1])
+        
+        large = [{'body': 'x' * 100} for _ in range(5)]
+        self.assertEqual([len(chunk) for chunk in chunk_notifications(large, 100, 250)], [2, 2, 1])
+    
     def test_retry_logic(self):
         """Test retry logic for failed deliveries"""
         # Test getting pending retries (should be empty initially)
@@ -346,6 +378,60 @@ class TestNotificationTemplateService(unittest.TestCase):
         self.assertIn('google', stats['platforms_with_templates'])
         self.assertIn('delete', stats['action_types_supported'])
         self.assertIn('email', stats['template_types_available'])
+    
+    def test_generate_notifications_bulk(self):
+        """Test bulk generation resolves templates per policy and skips unknown ones"""
+        policies = [
+            SimpleNamespace(policy_id='p1', platform_name='google', action_type='delete',
+                            account_identifier='john.doe@gmail.com'),
+            SimpleNamespace(policy_id='p2', platform_name='google', action_type='delete',
+                            account_identifier='john.doe2@gmail.com'),
+            SimpleNamespace(policy_id='p3', platform_name='google', action_type='no_such_action',
+                            account_identifier='john.doe@gmail.com')
+        ]
+        
+        with patch.object(self.service, 'get_template', wraps=self.service.get_template) as mock_get:
+            notifications = self.service.generate_notifications_bulk(policies, self.sample_context)
+        
+        self.assertEqual([n['policy_id'] for n in notifications], ['p1', 'p2'])
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertEqual(notifications[1]['personalization_context']['account_identifier'], 'john.doe2@gmail.com')
+
+class TestMessageBatcher(unittest.TestCase):
+    """Test cases for MessageBatcher"""
+    
+    def setUp(self):
+        """Set up a batcher with a recording flush function"""
+        self.flushed = []
+        
+        def flush_batch(notifications, user_id):
+            self.flushed.append((list(notifications), user_id))
+            return {
+                'delivery_results': [
+                    {'status': DeliveryStatus.SENT.value, 'notification_id': n['policy_id']}
+                    for n in notifications
+                ]
+            }
+        
+        self.batcher = MessageBatcher(flush_batch, max_batch_size=2, max_wait_time=5.0)
+    
+    def test_full_batch_flushes_once(self):
+        """Test that notifications added together are delivered in one batch"""
+        first = self.batcher.add({'policy_id': 'p1'}, user_id='user-1')
+        second = self.batcher.add({'policy_id': 'p2'}, user_id='user-1')
+        
+        self.assertEqual(first.result(timeout=2)['notification_id'], 'p1')
+        self.assertEqual(second.result(timeout=2)['notification_id'], 'p2')
+        self.assertEqual(self.flushed, [([{'policy_id': 'p1'}, {'policy_id': 'p2'}], 'user-1')])
+    
+    def test_batches_split_by_user(self):
+        """Test that notifications for different users are flushed separately"""
+        first = self.batcher.add({'policy_id': 'p1'}, user_id='user-1')
+        second = self.batcher.add({'policy_id': 'p2'}, user_id='user-2')
+        
+        first.result(timeout=2)
+        second.result(timeout=2)
+        self.assertEqual(sorted(user_id for _, user_id in self.flushed), ['user-1', 'user-2'])
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
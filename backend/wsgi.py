@@ -0,0 +1,7 @@
+"""
+Ghost Identity Protection System - WSGI Entry Point
+Used by production WSGI servers, e.g. `gunicorn wsgi:application`
+"""
+from app import create_app
+
+application = create_app()